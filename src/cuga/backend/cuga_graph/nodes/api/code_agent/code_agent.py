@@ -3,6 +3,7 @@ from typing import Any
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage, BaseMessage
+from langgraph.config import get_stream_writer
 
 from cuga.backend.cuga_graph.nodes.api.code_agent.model import CodeAgentOutput
 from cuga.backend.cuga_graph.nodes.shared.base_agent import BaseAgent
@@ -176,8 +177,9 @@ class CodeAgent(BaseAgent):
         logger.debug(f"Generated code: {code}")
 
         # Run code in sandbox
+        execution_info = {}
         try:
-            execution_output, _ = await run_code(code)
+            execution_output, execution_info = await run_code(code, on_output=self.output_streamer())
         except Exception as e:
             logger.error(f"Error running code: {e}")
             execution_output = str(e)
@@ -190,7 +192,12 @@ class CodeAgent(BaseAgent):
         if out:
             steps_summary = [remaining_text]
 
-        if not out:
+        error = execution_info.get("error")
+        if error:
+            # Stopped by a sandbox limit: whatever it printed last isn't its result
+            logger.warning(f"Code execution stopped: {error['message']}")
+            out = {"variable_name": "output_status", "description": error["message"], "value": error}
+        elif not out:
             out = {
                 "variable_name": "output_status",
                 "value": execution_output,
@@ -232,6 +239,16 @@ class CodeAgent(BaseAgent):
             ).model_dump_json()
         )
 
+    @staticmethod
+    def output_streamer():
+        """Sends the code's output to the graph's custom stream as it is printed, if it is streamed."""
+        try:
+            writer = get_stream_writer()
+        except RuntimeError:
+            # Not running in a graph
+            return None
+        return lambda text: writer({"name": "CodeExecutionOutput", "data": text})
+
     @staticmethod
     def create():
         return CodeAgent(
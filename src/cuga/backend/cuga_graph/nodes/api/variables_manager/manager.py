@@ -1,15 +1,132 @@
+import ast
+import asyncio
 import json
-from typing import Any, Dict, Optional
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Set
 from datetime import datetime
 
+from langgraph.config import get_config
+from loguru import logger
+
+from cuga.config import settings
+
+# Code calling any of these can reach variables without naming them
+DYNAMIC_LOOKUPS = frozenset({"globals", "locals", "vars", "eval", "exec", "dir"})
+
+# Session of variables used outside of a graph run, unless one is set with variables_session
+DEFAULT_SESSION = "default"
+
+_session_id: ContextVar[Optional[str]] = ContextVar("cuga_variables_session", default=None)
+_warned_default_session = False
+
+
+def current_session_id() -> str:
+    """
+    The session whose variables VariablesManager works with.
+
+    Set with `variables_session`, otherwise the thread id of the graph run this is called
+    from, otherwise DEFAULT_SESSION.
+    """
+    session_id = _session_id.get()
+    if session_id is None:
+        try:
+            session_id = get_config().get("configurable", {}).get("thread_id")
+        except RuntimeError:
+            _warn_default_session()
+    return str(session_id) if session_id is not None else DEFAULT_SESSION
+
+
+def _warn_default_session():
+    """
+    Warn, once, that async code falls back to DEFAULT_SESSION: async graph nodes don't see
+    the run's config before Python 3.11, so their runs would all share one session.
+    """
+    global _warned_default_session
+    try:
+        in_task = asyncio.current_task() is not None
+    except RuntimeError:
+        in_task = False
+    if in_task and not _warned_default_session:
+        _warned_default_session = True
+        logger.warning(
+            f"No variables session is set and the graph config is not available, using "
+            f"'{DEFAULT_SESSION}': run the graph within variables_session(thread_id)"
+        )
+
+
+@contextmanager
+def variables_session(session_id: str) -> Iterator[None]:
+    """
+    Work with the variables of session_id in this context.
+
+    The previous session is set back rather than reset by token, so this can span the yields
+    of an async generator that ends up closed from another context.
+    """
+    previous = _session_id.get()
+    _session_id.set(session_id)
+    try:
+        yield
+    finally:
+        _session_id.set(previous)
+
+
+def referenced_names(code: str) -> Optional[Set[str]]:
+    """
+    Names code reads, found statically.
+
+    Returns None when that can't be told: the code doesn't parse, or it looks names up
+    dynamically (`globals()`, `eval(...)`, ...).
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return None
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    if names & DYNAMIC_LOOKUPS:
+        return None
+    return names
+
 
 class VariableMetadata:
     def __init__(self, value: Any, description: Optional[str] = None, created_at: Optional[datetime] = None):
-        self.value = value
+        self._value = value
         self.description = description or ""
         self.type = type(value).__name__
         self.created_at = created_at if created_at is not None else datetime.now()
         self.count_items = self._calculate_count(value)
+        # Set while the value is held by a VariableStore
+        self._store: Optional["VariableStore"] = None
+        self._spill_path: Optional[str] = None
+        self._size = 0
+
+    @property
+    def value(self) -> Any:
+        if self._store is not None:
+            self._store.touch(self)
+        return self._value
+
+    def peek(self) -> Any:
+        """
+        The value, for a preview: a spilled value is read from disk but stays spilled, and
+        the value isn't marked used, so previews don't push others out of memory.
+        """
+        if self._store is not None:
+            return self._store.peek(self)
+        return self._value
+
+    @property
+    def spilled(self) -> bool:
+        """Whether the value is on disk, to be read back when it is next accessed."""
+        return self._spill_path is not None
 
     def _calculate_count(self, value: Any) -> int:
         """Calculate the count of items in the value based on its type."""
@@ -38,17 +155,261 @@ class VariableMetadata:
         }
 
 
+def _pickled_size(value: Any) -> Optional[int]:
+    """Bytes value takes once pickled, or None if it can't be (it is then never spilled)."""
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return None
+
+
+class VariableStore:
+    """
+    The variables of one session.
+
+    Values of at least spill_min_bytes count towards memory_budget_bytes (0: no budget).
+    Past it, the least recently used of them are pickled to disk and read back when they
+    are next accessed, so values handed out earlier are copies once their variable spilled.
+    """
+
+    def __init__(self, memory_budget_bytes: int = 0, spill_min_bytes: int = 0):
+        self.variables: Dict[str, VariableMetadata] = {}
+        self.creation_order: list = []  # Track creation order
+        self.variable_counter: int = 0
+        self.memory_budget_bytes = memory_budget_bytes
+        self.spill_min_bytes = spill_min_bytes
+        self.resident_bytes = 0
+        # Values that can be spilled and are in memory, least recently used first
+        self._resident: "OrderedDict[int, VariableMetadata]" = OrderedDict()
+        self._directory: Optional[str] = None
+        self._lock = threading.RLock()
+
+    def put(self, name: str, metadata: VariableMetadata):
+        with self._lock:
+            if name in self.variables:
+                self._discard(self.variables[name])
+            else:
+                self.creation_order.append(name)
+            self.variables[name] = metadata
+            metadata._store = self
+            if self.memory_budget_bytes > 0:
+                size = _pickled_size(metadata._value)
+                if size is not None and size >= self.spill_min_bytes:
+                    metadata._size = size
+                    self._track(metadata)
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            metadata = self.variables.pop(name, None)
+            if metadata is None:
+                return False
+            if name in self.creation_order:
+                self.creation_order.remove(name)
+            self._discard(metadata)
+            return True
+
+    def clear(self):
+        with self._lock:
+            for metadata in self.variables.values():
+                self._discard(metadata)
+            self.variables = {}
+            self.creation_order = []
+            self.variable_counter = 0
+            if self._directory is not None:
+                shutil.rmtree(self._directory, ignore_errors=True)
+                self._directory = None
+
+    def dump(self, path: str):
+        """Pickle all the variables to path, spilled ones included, to be read back with `load`."""
+        with self._lock:
+            state = {
+                "variables": [
+                    (name, self._read(metadata), metadata.description, metadata.created_at)
+                    for name, metadata in self.variables.items()
+                ],
+                "creation_order": self.creation_order,
+                "variable_counter": self.variable_counter,
+            }
+            with open(path, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str, memory_budget_bytes: int = 0, spill_min_bytes: int = 0) -> "VariableStore":
+        """A store with the variables dumped to path."""
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        store = cls(memory_budget_bytes=memory_budget_bytes, spill_min_bytes=spill_min_bytes)
+        for name, value, description, created_at in state["variables"]:
+            store.put(name, VariableMetadata(value, description, created_at))
+        store.creation_order = state["creation_order"]
+        store.variable_counter = state["variable_counter"]
+        return store
+
+    def touch(self, metadata: VariableMetadata):
+        """Mark metadata's value used, reading it back from disk if it was spilled."""
+        with self._lock:
+            if metadata.spilled:
+                with open(metadata._spill_path, "rb") as f:
+                    metadata._value = pickle.load(f)
+                os.remove(metadata._spill_path)
+                metadata._spill_path = None
+                self._track(metadata)
+            elif id(metadata) in self._resident:
+                self._resident.move_to_end(id(metadata))
+
+    def peek(self, metadata: VariableMetadata) -> Any:
+        """metadata's value, without reading it back into memory or marking it used."""
+        with self._lock:
+            return self._read(metadata)
+
+    def spill(self, budget_bytes: int = 0, keep: Optional[VariableMetadata] = None):
+        """Spill the least recently used values until at most budget_bytes of them are in memory."""
+        with self._lock:
+            for metadata in list(self._resident.values()):
+                if self.resident_bytes <= budget_bytes:
+                    break
+                if metadata is not keep:
+                    self._spill(metadata)
+
+    def _track(self, metadata: VariableMetadata):
+        self._resident[id(metadata)] = metadata
+        self.resident_bytes += metadata._size
+        if self.resident_bytes > self.memory_budget_bytes:
+            # The value just used stays in memory even if it is over the budget on its own
+            self.spill(self.memory_budget_bytes, keep=metadata)
+
+    def _untrack(self, metadata: VariableMetadata):
+        if self._resident.pop(id(metadata), None) is not None:
+            self.resident_bytes -= metadata._size
+
+    def _spill(self, metadata: VariableMetadata):
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="cuga-variables-")
+            weakref.finalize(self, shutil.rmtree, self._directory, ignore_errors=True)
+        path = os.path.join(self._directory, f"{uuid.uuid4().hex}.pkl")
+        try:
+            with open(path, "wb") as f:
+                pickle.dump(metadata._value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"Keeping a {metadata.type} variable in memory, it could not be spilled: {e}")
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        self._untrack(metadata)
+        metadata._spill_path = path
+        metadata._value = None
+
+    def _read(self, metadata: VariableMetadata) -> Any:
+        # The value without reading it back into memory or marking it used
+        if metadata.spilled:
+            with open(metadata._spill_path, "rb") as f:
+                return pickle.load(f)
+        return metadata._value
+
+    def _discard(self, metadata: VariableMetadata):
+        # A spilled value is dropped without being read back
+        self._untrack(metadata)
+        if metadata.spilled:
+            if os.path.exists(metadata._spill_path):
+                os.remove(metadata._spill_path)
+            metadata._spill_path = None
+        metadata._store = None
+
+
 class VariablesManager(object):
+    """
+    Variables of the current session (see `current_session_id`).
+
+    The instance is shared, the variables are not: each session has its own VariableStore.
+    Past `variables.max_sessions` stores in memory, the least recently used ones are saved
+    to disk whole and loaded back the next time their session is used.
+    """
+
     _instance = None
-    variables: Dict[str, VariableMetadata] = {}
-    variable_counter: int = 0
-    _creation_order: list = []  # Track creation order
+    _stores: "OrderedDict[str, VariableStore]" = OrderedDict()
+    _stores_lock = threading.Lock()
+    # Sessions saved to disk, with the file they are in
+    _evicted: Dict[str, str] = {}
+    _evicted_directory: Optional[str] = None
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
             cls._instance = super(VariablesManager, cls).__new__(cls)
         return cls._instance
 
+    @classmethod
+    def get_store(cls, session_id: Optional[str] = None) -> VariableStore:
+        """The variable store of session_id (default: the current session), created if needed."""
+        if session_id is None:
+            session_id = current_session_id()
+        with cls._stores_lock:
+            store = cls._stores.get(session_id)
+            if store is not None:
+                cls._stores.move_to_end(session_id)
+                return store
+            store = cls._stores[session_id] = cls._new_store(cls._evicted.pop(session_id, None))
+            while len(cls._stores) > max(1, settings.variables.max_sessions):
+                cls._evict(*cls._stores.popitem(last=False))
+        return store
+
+    @classmethod
+    def drop_session(cls, session_id: str) -> bool:
+        """Forget the variables of session_id, e.g. once its conversation is over."""
+        with cls._stores_lock:
+            store = cls._stores.pop(session_id, None)
+            path = cls._evicted.pop(session_id, None)
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+        if store is not None:
+            store.clear()
+        return store is not None or path is not None
+
+    @classmethod
+    def _new_store(cls, path: Optional[str] = None) -> VariableStore:
+        """An empty store, or the one saved to path by `_evict`."""
+        memory_budget_bytes = settings.variables.memory_budget_mb * 1024 * 1024
+        spill_min_bytes = settings.variables.spill_min_bytes
+        if path is not None:
+            try:
+                return VariableStore.load(path, memory_budget_bytes, spill_min_bytes)
+            except Exception as e:
+                logger.warning(f"Starting the session over, its variables could not be loaded: {e}")
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+        return VariableStore(memory_budget_bytes=memory_budget_bytes, spill_min_bytes=spill_min_bytes)
+
+    @classmethod
+    def _evict(cls, session_id: str, store: VariableStore):
+        """Save the variables of an idle session to disk and free them."""
+        if cls._evicted_directory is None:
+            cls._evicted_directory = tempfile.mkdtemp(prefix="cuga-sessions-")
+            weakref.finalize(cls, shutil.rmtree, cls._evicted_directory, ignore_errors=True)
+        path = os.path.join(cls._evicted_directory, f"{uuid.uuid4().hex}.pkl")
+        try:
+            store.dump(path)
+        except Exception as e:
+            logger.warning(
+                f"Dropping the variables of idle session {session_id}, they could not be saved: {e}"
+            )
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            cls._evicted[session_id] = path
+        store.clear()
+
+    @property
+    def variables(self) -> Dict[str, VariableMetadata]:
+        return self.get_store().variables
+
+    @property
+    def _creation_order(self) -> list:
+        return self.get_store().creation_order
+
+    @property
+    def variable_counter(self) -> int:
+        return self.get_store().variable_counter
+
     def add_variable(self, value: Any, name: Optional[str] = None, description: Optional[str] = None) -> str:
         """
         Add a new variable with an optional name or auto-generated name and description.
@@ -61,23 +422,19 @@ class VariablesManager(object):
         Returns:
             str: The name of the variable that was created
         """
+        store = self.get_store()
         if name is None:
-            self.variable_counter += 1
-            name = f"variable_{self.variable_counter}"
+            store.variable_counter += 1
+            name = f"variable_{store.variable_counter}"
         else:
             # If a custom name is provided and it's a 'variable_X' format,
             # update the counter to avoid future collisions.
             if name.startswith("variable_") and name[9:].isdigit():
                 num = int(name[9:])
-                if num >= self.variable_counter:
-                    self.variable_counter = num
-
-        self.variables[name] = VariableMetadata(value, description)
-
-        # Track creation order
-        if name not in self._creation_order:
-            self._creation_order.append(name)
+                if num >= store.variable_counter:
+                    store.variable_counter = num
 
+        store.put(name, VariableMetadata(value, description))
         return name
 
     def get_variable(self, name: str) -> Any:
@@ -200,7 +557,7 @@ class VariablesManager(object):
                 f"- Items: {metadata.count_items}",
                 f"- Description: {metadata.description or 'No description'}",
                 f"- Created: {metadata.created_at.strftime('%Y-%m-%d %H:%M:%S')}",
-                f"- Value Preview: {self._get_value_preview(metadata.value, max_length=max_length)}",
+                f"- Value Preview: {self._get_value_preview(metadata.peek(), max_length=max_length)}",
                 "",
             ]
             summary_lines.extend(lines)
@@ -328,12 +685,33 @@ class VariablesManager(object):
 
         formatted_lines = []
         for name, metadata in self.variables.items():
-            value = metadata.value
+            value = metadata.peek()
             # Use repr() for all values to ensure valid Python syntax
             formatted_lines.append(f'{name} = {repr(value)}')
 
         return '\n'.join(formatted_lines)
 
+    def get_variables_for_code(self, code: str) -> Dict[str, Any]:
+        """
+        Get the variables that code refers to, by name.
+
+        Only these need to be handed to the code when it runs, so the cost of running it
+        doesn't grow with the variable history. Falls back to all variables when the
+        names it uses can't be found statically.
+
+        Args:
+            code (str): The Python source that will run
+
+        Returns:
+            Dict[str, Any]: Variable values by name, in creation order
+        """
+        names = referenced_names(code)
+        return {
+            name: metadata.value
+            for name, metadata in self.variables.items()
+            if names is None or name in names
+        }
+
     def get_variables_as_json(self) -> str:
         """
         Get all variables formatted as JSON strings.
@@ -346,7 +724,7 @@ class VariablesManager(object):
 
         formatted_lines = []
         for name, metadata in self.variables.items():
-            value = metadata.value
+            value = metadata.peek()
             try:
                 json_value = json.dumps(value, indent=2)
                 formatted_lines.append(f'{name} = {json_value}')
@@ -516,13 +894,7 @@ class VariablesManager(object):
         Returns:
             bool: True if variable was removed, False if not found
         """
-        if name in self.variables:
-            del self.variables[name]
-            # Also remove from creation order
-            if name in self._creation_order:
-                self._creation_order.remove(name)
-            return True
-        return False
+        return self.get_store().remove(name)
 
     def update_variable_description(self, name: str, description: str) -> bool:
         """
@@ -565,9 +937,7 @@ class VariablesManager(object):
         """
         Reset the variables manager, clearing all variables and counter.
         """
-        self.variables = {}
-        self.variable_counter = 0
-        self._creation_order = []
+        self.get_store().clear()
 
     def reset_keep_last_n(self, n: int) -> None:
         """
@@ -596,19 +966,25 @@ class VariablesManager(object):
                 if name.startswith("variable_") and name[9:].isdigit():
                     max_variable_counter = max(max_variable_counter, int(name[9:]))
 
+        # Take the values before the reset drops any that were spilled
+        values_to_keep = {name: metadata.value for name, metadata in variables_to_keep.items()}
+
         # Perform the reset
-        self.reset()
+        store = self.get_store()
+        store.clear()
 
         # Re-add the identified variables
         for name in original_creation_order:
             metadata = variables_to_keep[name]
-            self.variables[name] = VariableMetadata(
-                metadata.value, description=metadata.description, created_at=metadata.created_at
+            store.put(
+                name,
+                VariableMetadata(
+                    values_to_keep[name], description=metadata.description, created_at=metadata.created_at
+                ),
             )
-            self._creation_order.append(name)
 
         # Set the variable counter to ensure future auto-generated names don't conflict
-        self.variable_counter = max_variable_counter
+        store.variable_counter = max_variable_counter
 
     def get_variable_count(self) -> int:
         """
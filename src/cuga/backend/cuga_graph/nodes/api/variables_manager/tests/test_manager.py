@@ -1,4 +1,18 @@
-from cuga.backend.cuga_graph.nodes.api.variables_manager.manager import VariablesManager
+import asyncio
+import os
+from typing import TypedDict
+from unittest.mock import patch
+
+from langgraph.graph import START, StateGraph
+
+from cuga.backend.cuga_graph.nodes.api.variables_manager.manager import (
+    VariableMetadata,
+    VariablesManager,
+    VariableStore,
+    current_session_id,
+    variables_session,
+)
+from cuga.config import settings
 
 
 class TestVariablesManager:
@@ -196,3 +210,150 @@ class TestVariablesManager:
         # Reset and verify
         vm.reset()
         assert vm.get_variable_count() == 0
+
+    def test_variables_for_code(self):
+        """Test that only the variables code refers to are selected."""
+        vm = VariablesManager()
+        vm.reset()
+
+        vm.add_variable([1, 2, 3])
+        vm.add_variable({"key": "value"})
+        vm.add_variable("unused")
+
+        assert vm.get_variables_for_code("print(len(variable_1))\nx = f'{variable_2}'") == {
+            "variable_1": [1, 2, 3],
+            "variable_2": {"key": "value"},
+        }
+        assert vm.get_variables_for_code("print('variable_3')") == {}
+        # Names that can't be found statically fall back to every variable
+        assert len(vm.get_variables_for_code("print(globals()['variable_3'])")) == 3
+        assert len(vm.get_variables_for_code("print(variable_1")) == 3
+
+
+class TestVariableSessions:
+    """Test suite for per-session variable stores and spilling values to disk."""
+
+    def test_sessions_are_isolated(self):
+        vm = VariablesManager()
+        with variables_session("alice"):
+            vm.add_variable("a")
+        with variables_session("bob"):
+            vm.add_variable("b")
+            vm.add_variable("c")
+
+        with variables_session("alice"):
+            assert vm.get_variables_for_code("print(variable_1, variable_2)") == {"variable_1": "a"}
+        with variables_session("bob"):
+            assert vm.get_variable_names() == ["variable_1", "variable_2"]
+            assert vm.get_variable("variable_1") == "b"
+
+        assert VariablesManager.drop_session("alice")
+        with variables_session("alice"):
+            assert vm.get_variable_count() == 0
+        VariablesManager.drop_session("bob")
+
+    def test_session_of_an_abandoned_stream(self):
+        async def stream():
+            with variables_session("streamed"):
+                yield current_session_id()
+                yield current_session_id()
+
+        async def consume():
+            events = stream()
+            assert await anext(events) == "streamed"
+            # Abandoned, then closed from another task, as the event loop does for a dropped stream
+            await asyncio.create_task(events.aclose())
+
+        asyncio.run(consume())
+
+    def test_graph_thread_id_is_the_session(self):
+        class State(TypedDict):
+            value: str
+
+        def node(state: State):
+            VariablesManager().add_variable(state["value"], "stored")
+            return {}
+
+        builder = StateGraph(State)
+        builder.add_node("store", node)
+        builder.add_edge(START, "store")
+        graph = builder.compile()
+        graph.invoke({"value": "one"}, {"configurable": {"thread_id": "thread-1"}})
+        graph.invoke({"value": "two"}, {"configurable": {"thread_id": "thread-2"}})
+
+        assert VariablesManager.get_store("thread-1").variables["stored"].value == "one"
+        assert VariablesManager.get_store("thread-2").variables["stored"].value == "two"
+        VariablesManager.drop_session("thread-1")
+        VariablesManager.drop_session("thread-2")
+
+    def test_least_recently_used_values_spill_and_come_back(self):
+        store = VariableStore(memory_budget_bytes=20_000, spill_min_bytes=1_000)
+        values = {f"v{i}": [f"{i}-{n}" for n in range(1_000)] for i in range(3)}
+        for name, value in values.items():
+            store.put(name, VariableMetadata(value))
+        store.put("small", VariableMetadata("small"))
+
+        assert [name for name, m in store.variables.items() if m.spilled] == ["v0"]
+        assert store.resident_bytes <= 20_000
+
+        # Reading v0 brings it back and spills the least recently used of the others
+        assert store.variables["v0"].value == values["v0"]
+        assert [name for name, m in store.variables.items() if m.spilled] == ["v1"]
+        assert store.variables["small"].value == "small"
+
+        spill_directory = store._directory
+        assert len(os.listdir(spill_directory)) == 1
+        store.clear()
+        assert not os.path.exists(spill_directory)
+
+    def test_previews_leave_spilled_values_on_disk(self):
+        vm = VariablesManager()
+        with (
+            variables_session("previews"),
+            patch.object(settings.variables, "memory_budget_mb", 1),
+            patch.object(settings.variables, "spill_min_bytes", 1_000),
+        ):
+            for i in range(3):
+                vm.add_variable([f"{i}-{n}" * 10 for n in range(20_000)])
+            store = VariablesManager.get_store()
+            spilled = [name for name, m in store.variables.items() if m.spilled]
+            resident_bytes = store.resident_bytes
+            assert spilled
+
+            with patch.object(VariableStore, "touch") as touch:
+                assert "0-0" in vm.get_variables_summary(max_length=100)
+                assert "0-0" in vm.get_variables_formatted()
+                assert "0-0" in vm.get_variables_as_json()
+
+            touch.assert_not_called()
+            assert [name for name, m in store.variables.items() if m.spilled] == spilled
+            assert store.resident_bytes == resident_bytes
+        VariablesManager.drop_session("previews")
+
+    def test_idle_sessions_are_saved_whole_and_come_back(self):
+        vm = VariablesManager()
+        with (
+            patch.object(settings.variables, "max_sessions", 2),
+            patch.object(settings.variables, "memory_budget_mb", 0),
+        ):
+            for session in ("s1", "s2", "s3"):
+                with variables_session(session):
+                    vm.add_variable([session] * 3, description=f"from {session}")
+                    vm.add_variable(session, "named")
+
+            assert "s1" not in VariablesManager._stores
+            saved = VariablesManager._evicted["s1"]
+            assert os.path.exists(saved)
+
+            with variables_session("s1"):
+                assert vm.get_variable_names() == ["variable_1", "named"]
+                assert vm.get_variable("variable_1") == ["s1"] * 3
+                assert vm.get_variable_metadata("variable_1").description == "from s1"
+                assert vm.add_variable("next") == "variable_2"
+            assert not os.path.exists(saved)
+            # Using s1 again saved s2 in turn
+            assert list(VariablesManager._stores)[-2:] == ["s3", "s1"]
+
+        for session in ("s1", "s2", "s3"):
+            assert VariablesManager.drop_session(session)
+        assert not {"s1", "s2", "s3"} & set(VariablesManager._evicted)
@@ -7,6 +7,7 @@ from langgraph.types import Command
 
 from cuga.backend.activity_tracker.tracker import ActivityTracker
 from cuga.backend.browser_env.browser.extension_env_async import ExtensionEnv
+from cuga.backend.cuga_graph.nodes.api.variables_manager.manager import variables_session
 from cuga.backend.cuga_graph.nodes.browser.action_agent.tools.tools import format_tools
 from cuga.backend.cuga_graph.nodes.task_decomposition_planning.plan_controller_agent.prompts.load_prompt import (
     PlanControllerOutput,
@@ -310,7 +311,8 @@ class AgentLoop:
                 else [TokenUsageTracker()],
                 "thread_id": self.thread_id,
             },
-            stream_mode="updates",
+            # "custom" carries what nodes send while they run, e.g. CodeAgent's execution output
+            stream_mode=["updates", "custom"],
         )
 
     def get_langfuse_trace_id(self) -> Optional[str]:
@@ -356,10 +358,16 @@ class AgentLoop:
     async def run_stream(self, state: Optional[AgentState] = None, resume=None):
         event_stream = self.get_stream(state, resume)
         event = {}
-        async for event in event_stream:
-            event_msg = self.get_event_message(event)
-            logger.debug(f"current event: {event_msg.format()}")
-            yield event_msg.format()
+        # Set explicitly: async nodes can't read the thread id from the config before Python 3.11
+        with variables_session(self.thread_id):
+            async for mode, chunk in event_stream:
+                if mode == "custom":
+                    yield StreamEvent(name=chunk["name"], data=chunk["data"]).format()
+                    continue
+                event = chunk
+                event_msg = self.get_event_message(event)
+                logger.debug(f"current event: {event_msg.format()}")
+                yield event_msg.format()
         yield self.get_output(event)
 
     def get_output_of_obj(self, dict):
@@ -409,8 +417,12 @@ class AgentLoop:
     async def run(self, state: Optional[AgentState] = None, resume=None):
         event_stream = self.get_stream(state, resume)
         event = {}
-        async for event in event_stream:
-            event_msg = self.get_event_message(event)
-            await self.show_chat_even(event_msg)
-            logger.debug(f"current event: {event_msg.format()}")
+        with variables_session(self.thread_id):
+            async for mode, chunk in event_stream:
+                if mode == "custom":
+                    continue
+                event = chunk
+                event_msg = self.get_event_message(event)
+                await self.show_chat_even(event_msg)
+                logger.debug(f"current event: {event_msg.format()}")
         return self.get_output(event)
@@ -26,6 +26,7 @@ from cuga.backend.browser_env.browser.gym_obs.http_stream_comm import (
 )
 from cuga.backend.cuga_graph.nodes.browser.action_agent.tools.tools import format_tools
 from cuga.backend.cuga_graph.graph import DynamicAgentGraph
+from cuga.backend.cuga_graph.nodes.api.variables_manager.manager import VariablesManager
 from cuga.backend.cuga_graph.utils.controller import AgentRunner
 from cuga.backend.cuga_graph.utils.event_porcessors.action_agent_event_processor import (
     ActionAgentEventProcessor,
@@ -608,6 +609,8 @@ async def reset_agent_state():
         # Reset agent state to default
         app_state.state = default_state(page=None, observation=None, goal="")
         app_state.stop_agent = False
+        if app_state.thread_id:
+            VariablesManager.drop_session(app_state.thread_id)
         app_state.thread_id = str(uuid.uuid4())
 
         # Reset the agent graph
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from typing import Any, Callable, Optional, Set
+
+from loguru import logger
+
+from cuga.config import settings
+
+
+class PooledSession:
+    """An open sandbox session and its usage, while it belongs to the pool."""
+
+    __slots__ = ("session", "runs", "last_used")
+
+    def __init__(self, session: Any):
+        self.session = session
+        self.runs = 0
+        self.last_used = time.monotonic()
+
+
+class ContainerPool:
+    """
+    Pool of warm sandbox containers (or local worker processes, see `local_workers`).
+
+    `session_factory` opens a session (e.g. an llm_sandbox `SandboxSession`) and returns it;
+    sessions need `run(code)`, `execute_command(command)` and `close()`, all blocking, so
+    they are called in worker threads. Each run borrows an idle container, so an execution
+    costs an exec rather than a container lifecycle. Between runs the workspace is wiped,
+    and a container is replaced after `max_runs` runs, when a run or the wipe fails, or when
+    it fails the health check it gets after sitting idle for `health_check_interval`
+    seconds. At most `size` containers exist; further runs wait for one to be released.
+    A run taking longer than `run_timeout` seconds raises asyncio.TimeoutError, and its container is
+    closed (which stops the run) and replaced.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any],
+        size: int = 2,
+        max_runs: int = 50,
+        health_check_interval: float = 30.0,
+        reset_command: Optional[str] = None,
+        health_check_command: str = "true",
+        run_timeout: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.size = max(1, size)
+        self.max_runs = max_runs
+        self.health_check_interval = health_check_interval
+        self.reset_command = reset_command
+        self.health_check_command = health_check_command
+        self.run_timeout = run_timeout
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._sessions: Set[PooledSession] = set()
+        # Sessions open or being opened; never more than size
+        self._total = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+
+    @classmethod
+    def from_settings(cls, session_factory: Callable[[], Any]) -> "ContainerPool":
+        return cls(
+            session_factory,
+            size=settings.sandbox.container_pool_size,
+            max_runs=settings.sandbox.container_max_runs,
+            health_check_interval=settings.sandbox.container_health_check_interval,
+            reset_command=settings.sandbox.container_reset_command,
+            run_timeout=settings.sandbox.execution_timeout or None,
+        )
+
+    def start(self):
+        """Warm up the whole pool in the background."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not None and self._loop is not loop:
+            self._rebind()
+        self._loop = loop
+        for _ in range(self.size - self._total):
+            self._replenish()
+
+    def _rebind(self):
+        # Used from a new event loop: carry the idle sessions over and forget whatever
+        # was still being opened or run on the old one
+        idle = [self._idle.get_nowait() for _ in range(self._idle.qsize())]
+        self._idle = asyncio.Queue()
+        for pooled in idle:
+            if pooled is not None:
+                self._idle.put_nowait(pooled)
+        self._total = self._idle.qsize()
+
+    async def run(
+        self, code: str, payload: Optional[bytes] = None, on_output: Optional[Callable[[str], None]] = None
+    ) -> Any:
+        """
+        Run code in a warm container and return the session's result. A payload (the
+        pickled variables the code uses) and on_output (called, from a worker thread, with
+        output as it is produced) are passed on to sessions taking `run(code, payload, on_output)`.
+        """
+        if self._closed:
+            raise RuntimeError("The container pool is closed")
+        if self._loop is not asyncio.get_running_loop():
+            self.start()
+        pooled = await self._acquire()
+        try:
+            if on_output is not None:
+                execution = asyncio.to_thread(pooled.session.run, code, payload, on_output)
+            elif payload is not None:
+                execution = asyncio.to_thread(pooled.session.run, code, payload)
+            else:
+                execution = asyncio.to_thread(pooled.session.run, code)
+            result = await asyncio.wait_for(execution, self.run_timeout)
+        except BaseException:
+            # Cancelled runs too (a stopped agent, a client gone): the code may still be running,
+            # so the session is closed and its slot given back either way
+            await asyncio.shield(self._discard(pooled))
+            self._replenish()
+            raise
+        pooled.runs += 1
+        await asyncio.shield(self._release(pooled))
+        return result
+
+    async def _acquire(self) -> PooledSession:
+        while True:
+            if self._idle.empty() and self._total < self.size:
+                self._total += 1
+                opening = asyncio.ensure_future(self._open())
+                try:
+                    return await asyncio.shield(opening)
+                except asyncio.CancelledError:
+                    # Nobody waits for it any more: the session joins the pool once open
+                    asyncio.ensure_future(self._warm_one(opening))
+                    raise
+                except Exception:
+                    self._total -= 1
+                    raise
+            pooled = await self._idle.get()
+            if pooled is None:
+                # A replacement failed to open; look again rather than wait for one
+                continue
+            if time.monotonic() - pooled.last_used >= self.health_check_interval:
+                if not await self._command_ok(pooled, self.health_check_command):
+                    logger.warning("Sandbox container failed its health check, replacing it")
+                    await self._discard(pooled)
+                    continue
+            return pooled
+
+    async def _release(self, pooled: PooledSession):
+        if self._closed:
+            await self._discard(pooled)
+            return
+        if pooled.runs >= self.max_runs:
+            await self._discard(pooled)
+            self._replenish()
+            return
+        if self.reset_command and not await self._command_ok(pooled, self.reset_command):
+            logger.warning("Resetting the sandbox workspace failed, replacing the container")
+            await self._discard(pooled)
+            self._replenish()
+            return
+        pooled.last_used = time.monotonic()
+        self._idle.put_nowait(pooled)
+
+    async def _open(self) -> PooledSession:
+        pooled = PooledSession(await asyncio.to_thread(self.session_factory))
+        self._sessions.add(pooled)
+        return pooled
+
+    def _replenish(self):
+        if self._closed or self._total >= self.size:
+            return
+        self._total += 1
+        asyncio.create_task(self._warm_one())
+
+    async def _warm_one(self, opening: Optional[asyncio.Future] = None):
+        try:
+            pooled = await (opening if opening is not None else self._open())
+        except Exception as e:
+            self._total -= 1
+            logger.error(f"Opening a sandbox container failed: {e}")
+            # Wake up a waiting run so it can try opening one itself
+            self._idle.put_nowait(None)
+            return
+        if self._closed:
+            await self._discard(pooled)
+        else:
+            self._idle.put_nowait(pooled)
+
+    async def _command_ok(self, pooled: PooledSession, command: str) -> bool:
+        try:
+            output = await asyncio.to_thread(pooled.session.execute_command, command)
+        except Exception as e:
+            logger.debug(f"Sandbox command '{command}' failed: {e}")
+            return False
+        return getattr(output, "exit_code", 0) == 0
+
+    async def _discard(self, pooled: PooledSession):
+        self._total -= 1
+        self._sessions.discard(pooled)
+        try:
+            await asyncio.to_thread(pooled.session.close)
+        except Exception as e:
+            logger.warning(f"Closing a sandbox container failed: {e}")
+
+    async def close(self):
+        """Close every container, idle or not. Runs in progress finish and then close theirs."""
+        self._closed = True
+        while not self._idle.empty():
+            pooled = self._idle.get_nowait()
+            if pooled is not None:
+                await self._discard(pooled)
+
+    def shutdown(self):
+        """Close every container from outside the event loop, e.g. at interpreter exit."""
+        self._closed = True
+        for pooled in list(self._sessions):
+            try:
+                pooled.session.close()
+            except Exception as e:
+                logger.warning(f"Closing a sandbox container failed: {e}")
+        self._sessions.clear()
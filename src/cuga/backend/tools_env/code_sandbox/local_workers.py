@@ -0,0 +1,441 @@
+"""
+Local sandbox worker processes.
+
+`LocalWorkerSession` starts this file as a script in a separate interpreter, so the worker
+side only needs the standard library. A worker preloads the common imports once, then runs
+one execution at a time: requests and replies are length-prefixed JSON messages on its
+stdin and stdout, a request optionally followed by the pickled variables the code uses.
+The sandbox preamble is sent once, when the worker starts, and compiled and run only then.
+Each execution gets a fresh namespace and its own captured stdout and stderr, and can send
+its stdout back while it runs. A wall-clock timeout is enforced by the parent, which kills
+the worker on expiry. A memory limit (RLIMIT_AS) and a CPU time limit per execution
+(RLIMIT_CPU) are applied by the worker itself.
+"""
+
+import datetime
+import importlib
+import inspect
+import json
+import os
+import pickle
+import select
+import struct
+import subprocess
+import sys
+import time
+import types
+from collections import namedtuple
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+from io import StringIO
+from typing import Callable, Optional
+
+PRELOADED_MODULES = (
+    "asyncio",
+    "collections",
+    "concurrent.futures",
+    "functools",
+    "itertools",
+    "math",
+    "random",
+    "re",
+    "statistics",
+    "typing",
+    "urllib.error",
+    "urllib.request",
+)
+
+# Seconds a new worker gets to import its modules and report ready
+STARTUP_TIMEOUT = 30.0
+
+# JSON length, then length of the binary payload that follows it
+_HEADER = struct.Struct(">II")
+
+# An execution that hit a limit reports it as an error dict of one of these types
+TIMEOUT = "timeout"
+CPU_TIME = "cpu_time"
+MEMORY = "memory"
+
+WorkerResult = namedtuple("WorkerResult", ["exit_code", "stdout", "stderr", "error"], defaults=(None,))
+
+
+def limit_error(kind: str, limit: float) -> dict:
+    """The error reported for an execution stopped by a limit."""
+    messages = {
+        TIMEOUT: f"TimeoutError: execution exceeded {limit:g} seconds",
+        CPU_TIME: f"CpuTimeExceeded: execution used more than {limit:g} CPU seconds",
+        MEMORY: f"MemoryError: execution exceeded {limit:g} MB of memory",
+    }
+    return {"type": kind, "limit": limit, "message": messages[kind]}
+
+
+class ExecutionLimitExceeded(BaseException):
+    """Raised inside an execution that hit a limit; not an Exception, so the code can't catch it."""
+
+    def __init__(self, error: dict):
+        super().__init__(error["message"])
+        self.error = error
+
+
+class OutputBuffer(StringIO):
+    """
+    Captured output of an execution. Keeps at most max_chars (0: no limit), and when given
+    on_output, also hands what is written to it as soon as a line is complete.
+    """
+
+    def __init__(self, on_output: Optional[Callable[[str], None]] = None, max_chars: int = 0):
+        super().__init__()
+        self.on_output = on_output
+        self.max_chars = max_chars
+        self.truncated = False
+        self._size = 0
+        self._pending = []
+
+    def write(self, text: str) -> int:
+        if self.truncated:
+            return len(text)
+        written = text
+        if self.max_chars and self._size + len(text) > self.max_chars:
+            written = (
+                text[: self.max_chars - self._size] + f"\n[output truncated at {self.max_chars} characters]\n"
+            )
+            self.truncated = True
+        self._size += len(written)
+        super().write(written)
+        if self.on_output is not None:
+            self._pending.append(written)
+            if "\n" in written:
+                self.flush()
+        return len(text)
+
+    def flush(self):
+        if self._pending:
+            text = "".join(self._pending)
+            self._pending.clear()
+            self.on_output(text)
+
+
+class SandboxWorkerError(Exception):
+    """
+    A worker could not complete an execution; the worker is gone. `stdout` holds the output
+    the execution had sent back until then.
+    """
+
+    stdout = ""
+
+
+class WorkerTimeout(SandboxWorkerError):
+    def __init__(self, timeout: float):
+        self.error = limit_error(TIMEOUT, timeout)
+        super().__init__(self.error["message"])
+
+
+class WorkerCrashed(SandboxWorkerError):
+    pass
+
+
+class CompiledPreamble:
+    """
+    Preamble code compiled and run once, in a copy of a base namespace. `install` adds what
+    it defined to the namespace of a run, with its functions rebound to that namespace, so
+    they see the run's own globals instead of the ones left over from the first run.
+    """
+
+    def __init__(self, source: str, namespace: dict):
+        self.code = compile(source, '<preamble>', 'exec')
+        self._scope = dict(namespace)
+        exec(self.code, self._scope, self._scope)
+        self.definitions = {
+            name: value
+            for name, value in self._scope.items()
+            if name not in namespace or namespace[name] is not value
+        }
+
+    def install(self, namespace: dict):
+        for name, value in self.definitions.items():
+            if isinstance(value, types.FunctionType) and value.__globals__ is self._scope:
+                rebound = types.FunctionType(
+                    value.__code__, namespace, value.__name__, value.__defaults__, value.__closure__
+                )
+                rebound.__kwdefaults__ = value.__kwdefaults__
+                rebound.__qualname__ = value.__qualname__
+                rebound.__doc__ = value.__doc__
+                value = rebound
+            namespace[name] = value
+
+
+class LocalWorkerSession:
+    """
+    One worker process, driven synchronously (the pool calls it from a worker thread).
+
+    Has the session interface `ContainerPool` expects: `run(code, payload)`, `execute_command(code)`
+    (for a worker, a command is Python source too) and `close()`.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 120.0,
+        memory_limit_mb: int = 0,
+        cpu_seconds: float = 0,
+        max_output_chars: int = 0,
+        preamble: Optional[str] = None,
+    ):
+        self.timeout = timeout
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                str(memory_limit_mb),
+                str(cpu_seconds),
+                str(max_output_chars),
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        try:
+            self._receive(time.monotonic() + STARTUP_TIMEOUT)
+            if preamble:
+                # Defined in every run's namespace from then on
+                self.process.stdin.write(_encode({"preamble": preamble}))
+                self.process.stdin.flush()
+                reply = self._receive(time.monotonic() + STARTUP_TIMEOUT)
+                if reply["exit_code"] != 0:
+                    raise SandboxWorkerError(f"Sandbox preamble failed: {reply['stderr']}")
+        except (SandboxWorkerError, OSError):
+            self.close()
+            raise
+
+    def run(
+        self, code: str, payload: Optional[bytes] = None, on_output: Optional[Callable[[str], None]] = None
+    ) -> WorkerResult:
+        """
+        Run code, first defining the variables pickled in payload (see `variable_injection`).
+        on_output is called with the code's stdout as it is printed.
+        """
+        try:
+            self.process.stdin.write(_encode({"code": code, "stream": on_output is not None}, payload))
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerCrashed(f"Sandbox worker is not running: {e}")
+        deadline = time.monotonic() + self.timeout
+        streamed = []
+        try:
+            while True:
+                reply = self._receive(deadline)
+                if "output" not in reply:
+                    return WorkerResult(**reply)
+                streamed.append(reply["output"])
+                on_output(reply["output"])
+        except SandboxWorkerError as e:
+            e.stdout = "".join(streamed)
+            raise
+
+    def execute_command(self, command: str) -> WorkerResult:
+        return self.run(command)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process.stdin.close()
+        self.process.stdout.close()
+
+    def _receive(self, deadline: float) -> dict:
+        header = self._read_exactly(_HEADER.size, deadline)
+        length, _ = _HEADER.unpack(header)
+        return json.loads(self._read_exactly(length, deadline))
+
+    def _read_exactly(self, size: int, deadline: float) -> bytes:
+        fd = self.process.stdout.fileno()
+        chunks = []
+        while size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                self.process.kill()
+                raise WorkerTimeout(self.timeout)
+            chunk = os.read(fd, min(size, 1 << 20))
+            if not chunk:
+                code = self.process.wait()
+                raise WorkerCrashed(f"Sandbox worker exited unexpectedly (exit code {code})")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+
+def _encode(message: dict, payload: Optional[bytes] = None) -> bytes:
+    data = json.dumps(message).encode("utf-8")
+    return _HEADER.pack(len(data), len(payload or b"")) + data + (payload or b"")
+
+
+def _read_message(stream):
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None, None
+    length, payload_length = _HEADER.unpack(header)
+    message = json.loads(stream.read(length))
+    return message, stream.read(payload_length) if payload_length else None
+
+
+def base_namespace() -> dict:
+    namespace = {
+        '__builtins__': __builtins__,
+        '__name__': '__main__',
+        '__file__': '<string>',
+        '__doc__': None,
+        '__package__': None,
+        '__import__': __import__,
+        'importlib': importlib,
+    }
+    namespace.update(sys.modules)
+    return namespace
+
+
+def execute(
+    code_content: str,
+    payload: Optional[bytes] = None,
+    preamble: Optional[CompiledPreamble] = None,
+    on_output: Optional[Callable[[str], None]] = None,
+    max_output_chars: int = 0,
+    cpu_seconds: float = 0,
+    memory_limit_mb: int = 0,
+) -> dict:
+    """Run code the way `run_local` does, returning its exit code, captured output and error."""
+    import asyncio
+
+    stdout_buffer = OutputBuffer(on_output, max_output_chars)
+    stderr_buffer = StringIO()
+    exit_code = 0
+    error = None
+    namespace = base_namespace()
+    if preamble is not None:
+        preamble.install(namespace)
+    # The preamble may replace datetime.datetime to pin the current date; undo it afterwards
+    original_datetime = datetime.datetime
+    try:
+        _limit_cpu(cpu_seconds)
+        with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
+            if payload:
+                namespace.update(pickle.loads(payload))
+            compiled_code = compile(code_content, '<string>', 'exec')
+            exec(compiled_code, namespace, namespace)
+            wrapper = namespace.get('__cuga_async_wrapper__')
+            if wrapper is not None and inspect.iscoroutinefunction(wrapper):
+                asyncio.run(wrapper())
+    except SystemExit as e:
+        exit_code = e.code if e.code is not None else 0
+        if e.code is not None and e.code != 0:
+            stderr_buffer.write(f"SystemExit: {e.code}")
+    except ExecutionLimitExceeded as e:
+        exit_code, error = 1, e.error
+    except MemoryError:
+        exit_code = 1
+        if memory_limit_mb > 0:
+            error = limit_error(MEMORY, memory_limit_mb)
+        else:
+            stderr_buffer.write("MemoryError")
+    except Exception as e:
+        exit_code = 1
+        stderr_buffer.write(str(e))
+    finally:
+        _limit_cpu(0)
+        datetime.datetime = original_datetime
+    if error is not None:
+        stderr_buffer.write(error["message"])
+    stdout_buffer.flush()
+    return {
+        "exit_code": exit_code,
+        "stdout": stdout_buffer.getvalue(),
+        "stderr": stderr_buffer.getvalue(),
+        "error": error,
+    }
+
+
+def _limit_memory(memory_limit_mb: int):
+    try:
+        import resource
+
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # Not enforceable on this platform
+        pass
+
+
+def _limit_cpu(cpu_seconds: float):
+    """Allow this process cpu_seconds more CPU time (0: lift the limit), then stop the execution."""
+    try:
+        import resource
+        import signal
+    except ImportError:
+        return
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        if cpu_seconds <= 0:
+            resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+            return
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # The limit counts the process' whole CPU time, in whole seconds
+        soft = int(usage.ru_utime + usage.ru_stime + cpu_seconds) + 1
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ValueError, OSError):
+        # Not enforceable on this platform
+        return
+
+    def _exceeded(signum, frame):
+        raise ExecutionLimitExceeded(limit_error(CPU_TIME, cpu_seconds))
+
+    signal.signal(signal.SIGXCPU, _exceeded)
+
+
+def main():
+    # Don't let modules next to this file shadow the ones the executed code imports
+    sys.path.pop(0)
+    memory_limit_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    cpu_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+    max_output_chars = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    for name in PRELOADED_MODULES:
+        importlib.import_module(name)
+    if memory_limit_mb > 0:
+        _limit_memory(memory_limit_mb)
+
+    requests = sys.stdin.buffer
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    # Anything written to the real stdout now lands on stderr instead of the reply channel
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    replies.write(_encode({"ready": True}))
+    replies.flush()
+    preamble = None
+    while True:
+        request, payload = _read_message(requests)
+        if request is None:
+            break
+        if "preamble" in request:
+            reply = {"exit_code": 0, "stdout": "", "stderr": ""}
+            try:
+                preamble = CompiledPreamble(request["preamble"], base_namespace())
+            except Exception as e:
+                reply = {"exit_code": 1, "stdout": "", "stderr": f"{type(e).__name__}: {e}"}
+        else:
+            reply = execute(
+                request["code"],
+                payload,
+                preamble,
+                on_output=partial(_send_output, replies) if request.get("stream") else None,
+                max_output_chars=max_output_chars,
+                cpu_seconds=cpu_seconds,
+                memory_limit_mb=memory_limit_mb,
+            )
+        replies.write(_encode(reply))
+        replies.flush()
+
+
+def _send_output(replies, text: str):
+    replies.write(_encode({"output": text}))
+    replies.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Rewrite independent `call_api` awaits in generated code so they run concurrently.
+
+Two shapes are rewritten, wherever they appear in the code:
+
+- a `for` loop whose body starts with a `call_api` await, e.g. `r = await call_api(...)` or
+  `results.append(await call_api(...))`, whose arguments only depend on the loop target and
+  on names the loop body does not assign or mutate (by item or attribute assignment, or by
+  calling a method that isn't in `PURE_METHODS`). All the calls are made first, through the
+  preamble's `_gather_api_calls` (bounded by the registry connection limit), then the body
+  runs for each item with its result.
+- consecutive `name = await call_api(...)` statements whose arguments do not use each
+  other's results, which become one gathered assignment.
+
+Anything else, including loops with `break`, `return` or an `else` clause, is left as
+written, and so is the whole code when it can't be parsed or the result doesn't compile.
+
+The rewrite only looks at the code, not at what the APIs do: gathered calls are sent
+concurrently, so they may reach the app in another order than written. That is harmless
+for reads, but calls that change state (a POST creating items, a DELETE) can interfere
+with each other, which is why `sandbox.parallelize_api_calls` is off by default.
+"""
+
+import ast
+from typing import List, Optional, Set
+
+from loguru import logger
+
+API_FUNCTION = "call_api"
+GATHER_FUNCTION = "_gather_api_calls"
+
+# Calls allowed in call_api arguments: they don't have side effects
+PURE_FUNCTIONS = frozenset(
+    {
+        "str",
+        "int",
+        "float",
+        "bool",
+        "len",
+        "round",
+        "min",
+        "max",
+        "abs",
+        "sorted",
+        "list",
+        "dict",
+        "tuple",
+        "set",
+    }
+)
+PURE_METHODS = frozenset(
+    {
+        "get",
+        "keys",
+        "values",
+        "items",
+        "lower",
+        "upper",
+        "strip",
+        "split",
+        "join",
+        "replace",
+        "format",
+        "isoformat",
+        "startswith",
+        "endswith",
+    }
+)
+
+_SIMPLE_NODES = (
+    ast.Name,
+    ast.Constant,
+    ast.Attribute,
+    ast.Subscript,
+    ast.Slice,
+    ast.Dict,
+    ast.List,
+    ast.Tuple,
+    ast.Set,
+    ast.JoinedStr,
+    ast.FormattedValue,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.keyword,
+    ast.Starred,
+    ast.expr_context,
+    ast.operator,
+    ast.unaryop,
+    ast.cmpop,
+)
+
+# Loop targets that can be bound by a comprehension as well, without side effects
+_TARGET_NODES = (ast.Name, ast.Tuple, ast.List, ast.Starred, ast.expr_context)
+
+
+def parallelize_api_calls(code: str) -> str:
+    """
+    The code with its independent call_api awaits gathered, or the code itself if none are.
+
+    Gathered calls may be served in any order, whatever their HTTP method: only enable this
+    for apps whose calls don't depend on each other's side effects.
+    """
+    try:
+        tree = ast.parse(code)
+        rewriter = _ApiCallRewriter()
+        tree = rewriter.visit(tree)
+        if not rewriter.rewrites:
+            return code
+        rewritten = ast.unparse(ast.fix_missing_locations(tree))
+        compile(_as_async_body(rewritten), "<string>", "exec")
+    except Exception as e:
+        logger.debug(f"Not parallelizing API calls: {e}")
+        return code
+    logger.debug(f"Gathered the API calls of {rewriter.rewrites} loop(s) or statement group(s)")
+    return rewritten
+
+
+def _as_async_body(code: str) -> str:
+    # Generated code runs as the body of an async function
+    return (
+        "async def __cuga_check__():\n"
+        + "\n".join("    " + line for line in code.splitlines())
+        + "\n    pass\n"
+    )
+
+
+def _api_call(node: ast.AST) -> Optional[ast.Call]:
+    """The call_api call node is awaiting, if it is one."""
+    if (
+        isinstance(node, ast.Await)
+        and isinstance(node.value, ast.Call)
+        and isinstance(node.value.func, ast.Name)
+        and node.value.func.id == API_FUNCTION
+    ):
+        return node.value
+    return None
+
+
+def _is_pure(node: ast.AST) -> bool:
+    """Whether evaluating node earlier than written can't change anything."""
+    for child in ast.walk(node):
+        if isinstance(child, ast.Call):
+            func = child.func
+            if isinstance(func, ast.Name) and func.id in PURE_FUNCTIONS:
+                continue
+            if isinstance(func, ast.Attribute) and func.attr in PURE_METHODS:
+                continue
+            return False
+        if not isinstance(child, _SIMPLE_NODES):
+            return False
+    return True
+
+
+def _has_pure_arguments(call: ast.Call) -> bool:
+    return all(_is_pure(argument) for argument in call.args + call.keywords)
+
+
+def _loaded_names(node: ast.AST) -> Set[str]:
+    return {child.id for child in ast.walk(node) if isinstance(child, ast.Name)}
+
+
+def _stored_names(nodes: List[ast.AST]) -> Set[str]:
+    names = set()
+    for node in nodes:
+        for child in ast.walk(node):
+            if isinstance(child, ast.Name) and isinstance(child.ctx, (ast.Store, ast.Del)):
+                names.add(child.id)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(child.name)
+            elif isinstance(child, (ast.Global, ast.Nonlocal)):
+                names.update(child.names)
+            elif isinstance(child, ast.alias):
+                names.add((child.asname or child.name).split(".")[0])
+    return names
+
+
+def _mutated_names(nodes: List[ast.AST]) -> Set[str]:
+    """Names whose value may be changed in place: `x[k] = ...`, `x.a += ...`, `x.append(...)`."""
+    names = set()
+    for node in nodes:
+        for child in ast.walk(node):
+            if isinstance(child, (ast.Subscript, ast.Attribute)) and isinstance(
+                child.ctx, (ast.Store, ast.Del)
+            ):
+                target = child.value
+            elif (
+                isinstance(child, ast.Call)
+                and isinstance(child.func, ast.Attribute)
+                and child.func.attr not in PURE_METHODS
+            ):
+                target = child.func.value
+            else:
+                continue
+            while isinstance(target, (ast.Subscript, ast.Attribute)):
+                target = target.value
+            if isinstance(target, ast.Name):
+                names.add(target.id)
+    return names
+
+
+def _exits_loop(nodes: List[ast.AST]) -> bool:
+    for node in nodes:
+        for child in ast.walk(node):
+            if isinstance(child, (ast.Break, ast.Return, ast.Yield, ast.YieldFrom)):
+                return True
+    return False
+
+
+def _result_slot(statement: ast.stmt) -> Optional[ast.Await]:
+    """
+    The await of a statement that is `x = await call_api(...)`, `await call_api(...)` or
+    `obj.method(await call_api(...))`: forms where nothing else runs before the call.
+    """
+    if isinstance(statement, (ast.Assign, ast.AnnAssign, ast.Expr)) and statement.value is not None:
+        value = statement.value
+        if _api_call(value):
+            return value
+        if (
+            isinstance(statement, ast.Expr)
+            and isinstance(value, ast.Call)
+            and isinstance(value.func, ast.Attribute)
+            and isinstance(value.func.value, ast.Name)
+            and len(value.args) == 1
+            and not value.keywords
+            and _api_call(value.args[0])
+        ):
+            return value.args[0]
+    return None
+
+
+def _replace(root: ast.AST, old: ast.AST, new: ast.AST):
+    for node in ast.walk(root):
+        for field, value in ast.iter_fields(node):
+            if value is old:
+                setattr(node, field, new)
+            elif isinstance(value, list):
+                for i, item in enumerate(value):
+                    if item is old:
+                        value[i] = new
+
+
+class _ApiCallRewriter(ast.NodeTransformer):
+    def __init__(self):
+        self.rewrites = 0
+
+    def _name(self, kind: str) -> str:
+        return f"__cuga_{kind}_{self.rewrites}__"
+
+    def _gather(self, calls: ast.expr) -> ast.Await:
+        return ast.Await(
+            value=ast.Call(func=ast.Name(id=GATHER_FUNCTION, ctx=ast.Load()), args=[calls], keywords=[])
+        )
+
+    def visit_FunctionDef(self, node):
+        # No awaits in a plain function
+        return node
+
+    def visit_Lambda(self, node):
+        return node
+
+    def visit_ClassDef(self, node):
+        return node
+
+    def generic_visit(self, node):
+        super().generic_visit(node)
+        for field in ("body", "orelse", "finalbody"):
+            statements = getattr(node, field, None)
+            if isinstance(statements, list) and statements and isinstance(statements[0], ast.stmt):
+                setattr(node, field, self._gather_sequences(statements))
+        return node
+
+    def visit_For(self, node: ast.For):
+        node = self.generic_visit(node)
+        if node.orelse or not node.body:
+            return node
+        slot = _result_slot(node.body[0])
+        if slot is None:
+            return node
+        call = _api_call(slot)
+        body_names = _stored_names(node.body)
+        target_names = _stored_names([node.target])
+        mutated_names = _mutated_names(node.body)
+        if (
+            not _has_pure_arguments(call)
+            or not all(isinstance(n, _TARGET_NODES) for n in ast.walk(node.target))
+            or _loaded_names(call) & (body_names - target_names | mutated_names)
+            or _loaded_names(node.iter) & (body_names | mutated_names)
+            or _exits_loop(node.body)
+        ):
+            return node
+
+        self.rewrites += 1
+        items = self._name("items")
+        results = self._name("results")
+        result = self._name("result")
+        materialize = ast.Assign(
+            targets=[ast.Name(id=items, ctx=ast.Store())],
+            value=ast.Call(func=ast.Name(id="list", ctx=ast.Load()), args=[node.iter], keywords=[]),
+        )
+        fan_out = ast.Assign(
+            targets=[ast.Name(id=results, ctx=ast.Store())],
+            value=self._gather(
+                ast.ListComp(
+                    elt=call,
+                    generators=[
+                        ast.comprehension(
+                            target=node.target, iter=ast.Name(id=items, ctx=ast.Load()), ifs=[], is_async=0
+                        )
+                    ],
+                )
+            ),
+        )
+        _replace(node.body[0], slot, ast.Name(id=result, ctx=ast.Load()))
+        target = node.target
+        if isinstance(target, ast.Tuple):
+            # Brackets, or unparsing would flatten it into the outer tuple
+            target = ast.List(elts=target.elts, ctx=ast.Store())
+        loop = ast.For(
+            target=ast.Tuple(elts=[target, ast.Name(id=result, ctx=ast.Store())], ctx=ast.Store()),
+            iter=ast.Call(
+                func=ast.Name(id="zip", ctx=ast.Load()),
+                args=[ast.Name(id=items, ctx=ast.Load()), ast.Name(id=results, ctx=ast.Load())],
+                keywords=[],
+            ),
+            body=node.body,
+            orelse=[],
+        )
+        return [materialize, fan_out, loop]
+
+    def _gather_sequences(self, statements: List[ast.stmt]) -> List[ast.stmt]:
+        rewritten = []
+        group = []
+
+        def flush():
+            if len(group) > 1:
+                self.rewrites += 1
+                rewritten.append(
+                    ast.Assign(
+                        targets=[ast.Tuple(elts=[s.targets[0] for s in group], ctx=ast.Store())],
+                        value=self._gather(ast.List(elts=[s.value.value for s in group], ctx=ast.Load())),
+                    )
+                )
+            else:
+                rewritten.extend(group)
+            group.clear()
+
+        for statement in statements:
+            independent = (
+                isinstance(statement, ast.Assign)
+                and len(statement.targets) == 1
+                and isinstance(statement.targets[0], ast.Name)
+                and _api_call(statement.value) is not None
+                and _has_pure_arguments(statement.value.value)
+            )
+            if independent and group:
+                assigned = {s.targets[0].id for s in group}
+                independent = not (
+                    _loaded_names(statement.value.value) & assigned or statement.targets[0].id in assigned
+                )
+                if not independent:
+                    flush()
+                    independent = True
+            if independent:
+                group.append(statement)
+            else:
+                flush()
+                rewritten.append(statement)
+        flush()
+        return rewritten
@@ -1,12 +1,34 @@
+import asyncio
+import atexit
 import os
+import tempfile
+from functools import lru_cache, partial
 from contextlib import redirect_stdout, redirect_stderr
 from io import StringIO
-from typing import Any
-from urllib.parse import quote
+from typing import Any, Callable, Optional
 
 from cuga.backend.cuga_graph.nodes.api.variables_manager.manager import VariablesManager
 from cuga.backend.activity_tracker.tracker import ActivityTracker
 from cuga.backend.utils.id_utils import mask_with_timestamp
+from cuga.backend.tools_env.code_sandbox.container_pool import ContainerPool
+from cuga.backend.tools_env.code_sandbox.parallelize import parallelize_api_calls
+from cuga.backend.tools_env.code_sandbox.local_workers import (
+    CPU_TIME,
+    MEMORY,
+    TIMEOUT,
+    CompiledPreamble,
+    ExecutionLimitExceeded,
+    LocalWorkerSession,
+    OutputBuffer,
+    SandboxWorkerError,
+    WorkerTimeout,
+    limit_error,
+)
+from cuga.backend.tools_env.code_sandbox.variable_injection import (
+    decode_variables,
+    encode_variables,
+    loader_source,
+)
 
 
 import sys
@@ -73,31 +95,216 @@ structured_tools_invocation = """
         raise e
 """
 
+structured_tools_batch_invocation = """
+    return await _call_each(payload["calls"], max_concurrency)
+"""
 
-def get_premable(is_local=False, current_date=None):
-    registry_host = (
-        f"http://host.docker.internal:{str(settings.server_ports.registry)}/functions/call?trajectory_path={quote(tracker.get_current_trajectory_path())}"
+structured_tools_stream_invocation = """
+    result = await call_api(app_name, api_name, args)
+    for item in result if isinstance(result, list) else [result]:
+        yield item
+    return
+"""
+
+# Keep-alive HTTP/1.1 client for the registry, standard library only so it runs in any sandbox
+registry_client_code = '''
+class _RegistryResponse:
+    def __init__(self, client, key, reader, writer, status, reason, headers):
+        self._client = client
+        self._key = key
+        self._reader = reader
+        self._writer = writer
+        self._done = False
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+
+    async def chunks(self):
+        """The body, piece by piece as it arrives."""
+        reader = self._reader
+        try:
+            if self.headers.get("transfer-encoding", "").lower() == "chunked":
+                while True:
+                    size = int((await reader.readline()).split(b";")[0], 16)
+                    if size == 0:
+                        while (await reader.readline()) not in (b"\\r\\n", b"\\n", b""):
+                            pass
+                        break
+                    data = await reader.readexactly(size)
+                    await reader.readexactly(2)
+                    yield data
+            elif "content-length" in self.headers:
+                remaining = int(self.headers["content-length"])
+                while remaining:
+                    data = await reader.read(min(remaining, 65536))
+                    if not data:
+                        raise ConnectionResetError("response cut short by the registry")
+                    remaining -= len(data)
+                    yield data
+            else:
+                while True:
+                    data = await reader.read(65536)
+                    if not data:
+                        break
+                    yield data
+                self.headers["connection"] = "close"
+            self._finish(reusable=self.headers.get("connection", "").lower() != "close")
+        finally:
+            self._finish(reusable=False)
+
+    async def read(self):
+        return b"".join([chunk async for chunk in self.chunks()])
+
+    def close(self):
+        self._finish(reusable=False)
+
+    def _finish(self, reusable):
+        if not self._done:
+            self._done = True
+            self._client._release(self._key, self._reader, self._writer, reusable)
+
+
+class _RegistryClient:
+    """
+    Keep-alive connections to the registry, shared by every call of this run, with at
+    most max_connections requests in flight.
+    """
+
+    def __init__(self, max_connections):
+        self.max_connections = max_connections
+        self._idle = {}
+        self._semaphore = None
+
+    async def request(self, url, payload, timeout=None):
+        """
+        Send payload to url once a connection is free. timeout only covers connecting, sending
+        and reading the response head, not the wait for a connection.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+        await self._semaphore.acquire()
+        try:
+            return await asyncio.wait_for(self._send(url, payload), timeout)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def _send(self, url, payload):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.hostname, parts.port or 80)
+        target = parts.path + ("?" + parts.query if parts.query else "")
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"POST {target} HTTP/1.1\\r\\nHost: {parts.netloc}\\r\\n"
+            f"Content-Type: application/json\\r\\nContent-Length: {len(body)}\\r\\n\\r\\n"
+        ).encode("latin-1")
+        idle = self._idle.setdefault(key, [])
+        while True:
+            reused = bool(idle)
+            reader, writer = idle.pop() if reused else await asyncio.open_connection(*key)
+            try:
+                writer.write(head + body)
+                await writer.drain()
+                status_line = await reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("connection closed by the registry")
+            except OSError:
+                writer.close()
+                if reused:
+                    # Kept alive, but since closed by the registry: try the next one
+                    continue
+                raise
+            except BaseException:
+                # Cancelled or timed out mid-request: the connection can't be reused
+                writer.close()
+                raise
+            break
+        _, status, reason = (status_line.decode("latin-1").rstrip() + " ").split(" ", 2)
+        headers = {}
+        try:
+            while True:
+                line = await reader.readline()
+                if line in (b"\\r\\n", b"\\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+        except BaseException:
+            writer.close()
+            raise
+        return _RegistryResponse(self, key, reader, writer, int(status), reason.strip(), headers)
+
+    def _release(self, key, reader, writer, reusable):
+        if reusable:
+            self._idle[key].append((reader, writer))
+        else:
+            writer.close()
+        self._semaphore.release()
+
+
+def _raise_for_status(response):
+    if response.status >= 400:
+        print(f"HTTP Error {response.status}: {response.reason}")
+        raise Exception(f"HTTP Error: {response.status} - {response.reason}")
+
+
+async def _registry_request(url, payload, timeout):
+    try:
+        return await _registry.request(url, payload, timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        print(e)
+        raise Exception(f"URL Error: {e}")
+
+
+async def _registry_post(url, payload, timeout):
+    """POST payload to the registry and return the response body as text."""
+    response = await _registry_request(url, payload, timeout)
+    try:
+        body = await asyncio.wait_for(response.read(), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        response.close()
+        print(e)
+        raise Exception(f"URL Error: {e}")
+    _raise_for_status(response)
+    return body.decode("utf-8")
+'''
+
+
+def structured_tools_enabled() -> bool:
+    return bool(settings.features.local_sandbox and tracker.tools)
+
+
+@lru_cache(maxsize=8)
+def get_preamble_library(is_local: bool, structured_tools: bool) -> str:
+    """
+    The part of the preamble that only depends on the configuration: imports and the
+    call_api family of functions. Generated once per configuration; what changes from run to
+    run (trajectory, pinned date) is set by `get_preamble_header`.
+    """
+    registry_base = (
+        f"http://host.docker.internal:{str(settings.server_ports.registry)}"
         if not is_local
-        else f"http://localhost:{str(settings.server_ports.registry)}/functions/call?trajectory_path={quote(tracker.get_current_trajectory_path())}"
+        else f"http://localhost:{str(settings.server_ports.registry)}"
     )
 
-    # Check if structured tools should be enabled
-    if settings.features.local_sandbox and tracker.tools is not None and len(tracker.tools) > 0:
+    if structured_tools:
         tool_import_code = structured_tools_import
         tool_init_code = structured_tools_init
         tool_invocation_code = structured_tools_invocation
+        batch_invocation_code = structured_tools_batch_invocation
+        stream_invocation_code = structured_tools_stream_invocation
     else:
         logger.warning("Structured tools not enabled")
         tool_import_code = ""
         tool_init_code = ""
         tool_invocation_code = ""
+        batch_invocation_code = ""
+        stream_invocation_code = ""
 
     preamble = (
         """
 import json
 from time import sleep
-import urllib.request
-import urllib.error
+import urllib.parse
 import datetime
 import asyncio
 import concurrent.futures
@@ -110,80 +317,314 @@ import concurrent.futures
         + """
 
 """
-        + (
-            f"""
-class MyDateTime(datetime.datetime):
-    @classmethod
-    def now(cls, tz=None):
-        return cls.fromisoformat('{current_date}')
+        + registry_client_code
+        + f"""
+
+_REGISTRY_BASE = {registry_base!r}
+
+
+def _registry_url(endpoint):
+    return f"{{_REGISTRY_BASE}}/{{endpoint}}?trajectory_path={{urllib.parse.quote(_TRAJECTORY_PATH)}}"
+
+
+async def _call_each(calls, max_concurrency=None):
+    semaphore = asyncio.Semaphore(max_concurrency or 16)
+
+    async def _call_one(call):
+        async with semaphore:
+            try:
+                return await call_api(call["app_name"], call["function_name"], call["args"])
+            except Exception as e:
+                return {{"status": "exception", "message": str(e), "function_name": call["function_name"]}}
+
+    return await asyncio.gather(*(_call_one(call) for call in calls))
+
+
+async def _gather_api_calls(calls):
+    # Used by code whose independent call_api awaits were gathered (see parallelize.py):
+    # at most as many in flight as registry connections, and like the loop it replaced,
+    # the first failure stops the rest
+    semaphore = asyncio.Semaphore(_registry.max_connections)
+
+    async def _bounded(call):
+        async with semaphore:
+            return await call
+
+    tasks = [asyncio.ensure_future(_bounded(call)) for call in calls]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
 
-datetime.datetime = MyDateTime
 
-"""
-            if current_date
-            else ""
-        )
-        + """
 async def call_api(app_name, api_name, args=None):
     if args is None:
-        args = {}
+        args = {{}}
 """
         + tool_invocation_code
         + """
-
-    url = \""""
-        + registry_host
-        + """\"
-    headers = {
-        "accept": "application/json",
-        "Content-Type": "application/json"
+    url = _registry_url("functions/call")
+    payload = {
+        "function_name": api_name,
+        "app_name": app_name,
+        "args": args
     }
+    response_data = await _registry_post(url, payload, 30)
+    try:
+        response_data = json.loads(response_data)
+    except Exception as e:
+        pass
+    return response_data
+
+async def call_api_batch(calls, max_concurrency=None):
+    '''
+    Call several APIs in one round trip. Each call is an (app_name, api_name, args) tuple
+    or a dict with those keys. Results come back in the same order; a failed call is
+    returned as an error dict with "status": "exception" instead of raising.
+    '''
+    normalized = []
+    for call in calls:
+        if isinstance(call, dict):
+            app_name = call["app_name"]
+            api_name = call.get("api_name") or call.get("function_name")
+            args = call.get("args")
+        else:
+            app_name, api_name, *rest = call
+            args = rest[0] if rest else None
+        normalized.append({"app_name": app_name, "function_name": api_name, "args": args or {}})
+    payload = {"calls": normalized, "max_concurrency": max_concurrency}
+"""
+        + batch_invocation_code
+        + """
+    url = _registry_url("functions/call_batch")
+    results = json.loads(await _registry_post(url, payload, 300))["results"]
+    return [item["result"] for item in results]
+
+async def stream_api(app_name, api_name, args=None, max_bytes=None):
+    '''
+    Like call_api, but yields the items of a list response one at a time as they arrive
+    instead of loading the whole response (any other response is yielded once). Use
+    `async for item in stream_api(...)`. max_bytes caps the data received; when the
+    response is cut short a note saying how many items were received is printed.
+    '''
+    if args is None:
+        args = {}
+"""
+        + stream_invocation_code
+        + """
+    url = _registry_url("functions/call") + "&stream=true"
+    if max_bytes:
+        url += f"&max_bytes={int(max_bytes)}"
     payload = {
         "function_name": api_name,
         "app_name": app_name,
         "args": args
     }
+    response = await _registry_request(url, payload, 30)
+    try:
+        if response.status >= 400:
+            await response.read()
+            _raise_for_status(response)
+        buffer = b""
+        async for chunk in response.chunks():
+            *lines, buffer = (buffer + chunk).split(b"\\n")
+            for line in lines:
+                if not line:
+                    continue
+                record = json.loads(line)
+                if "meta" in record:
+                    meta = record["meta"]
+                    if meta["truncated"]:
+                        print(
+                            f"[{api_name}: response truncated to {meta['items']} of "
+                            f"{meta['total_items']} items ({meta['max_bytes']} bytes)]"
+                        )
+                else:
+                    yield record["item"]
+    finally:
+        response.close()
+"""
+    )
 
-    data = json.dumps(payload).encode('utf-8')
-    req = urllib.request.Request(url, data=data, headers=headers, method='POST')
+    return preamble
 
-    loop = asyncio.get_event_loop()
-    
-    def _sync_call():
-        try:
-            with urllib.request.urlopen(req, timeout=30) as response:
-                response_data = response.read().decode('utf-8')
-                try:
-                    response_data = json.loads(response_data)
-                except Exception as e:
-                    pass
-                return response_data
-        except urllib.error.HTTPError as e:
-            print(e)
-            raise Exception(f"HTTP Error: {e.code} - {e.reason}")
-        except urllib.error.URLError as e:
-            print(e)
-            raise Exception(f"URL Error: {e.reason}")
-    
-    return await loop.run_in_executor(None, _sync_call)
-        """
+
+def get_preamble_header(current_date=None) -> str:
+    """The per-run part of the preamble, defined after `get_preamble_library`."""
+    header = (
+        f"_registry = _RegistryClient(max_connections={int(settings.sandbox.api_max_connections)})\n"
+        f"_TRAJECTORY_PATH = {tracker.get_current_trajectory_path()!r}\n"
     )
+    if current_date:
+        header += f"""
+class MyDateTime(datetime.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls.fromisoformat('{current_date}')
+
+datetime.datetime = MyDateTime
+"""
+    return header
+
+
+def get_premable(is_local=False, current_date=None):
+    return get_preamble_library(is_local, structured_tools_enabled()) + get_preamble_header(current_date)
+
+
+# Where a run's pickled variables are copied inside the container (wiped between runs)
+CONTAINER_VARIABLES_PATH = "/tmp/cuga_variables.pkl"
+
+
+def _docker_client():
+    # Check for Podman socket first, fall back to Docker/Rancher Desktop
+    podman_socket = f"/run/user/{os.getuid()}/podman/podman.sock"
+    docker_socket = os.path.expanduser("~/.rd/docker.sock")
+
+    if os.path.exists(podman_socket):
+        socket_path = podman_socket
+    elif os.path.exists(docker_socket):
+        socket_path = docker_socket
+    else:
+        # Try default Docker socket as last resort
+        socket_path = "/var/run/docker.sock"
+    return docker.DockerClient(base_url=f"unix://{socket_path}")
+
+
+def limits_source(cpu_seconds: float, memory_limit_mb: int) -> str:
+    """Python source that puts the CPU time and memory limits on the interpreter running it."""
+    if cpu_seconds <= 0 and memory_limit_mb <= 0:
+        return ""
+    source = "import resource as _resource\n"
+    if memory_limit_mb > 0:
+        limit = memory_limit_mb * 1024 * 1024
+        source += f"_resource.setrlimit(_resource.RLIMIT_AS, ({limit}, {limit}))\n"
+    if cpu_seconds > 0:
+        message = limit_error(CPU_TIME, cpu_seconds)["message"]
+        source += (
+            "import signal as _signal\n"
+            "def _cpu_time_exceeded(signum, frame):\n"
+            f"    raise SystemExit({message!r})\n"
+            "_signal.signal(_signal.SIGXCPU, _cpu_time_exceeded)\n"
+            f"_resource.setrlimit(_resource.RLIMIT_CPU, ({int(cpu_seconds) + 1}, "
+            "_resource.getrlimit(_resource.RLIMIT_CPU)[1]))\n"
+        )
+    return source
+
+
+class PooledSandboxSession:
+    """A container session whose runs can be handed pickled variables, and are limited."""
+
+    def __init__(self, session, cpu_seconds: float = 0, memory_limit_mb: int = 0):
+        self.session = session
+        self.limits = limits_source(cpu_seconds, memory_limit_mb)
+        self.cpu_seconds = cpu_seconds
+        self.memory_limit_mb = memory_limit_mb
+
+    def run(
+        self, code: str, payload: Optional[bytes] = None, on_output: Optional[Callable[[str], None]] = None
+    ) -> "ExecutionResult":
+        if payload is not None:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, os.path.basename(CONTAINER_VARIABLES_PATH))
+                with open(path, "wb") as f:
+                    f.write(payload)
+                self.session.copy_to_runtime(path, CONTAINER_VARIABLES_PATH)
+            code = loader_source(CONTAINER_VARIABLES_PATH) + code
+        # Each run is a new interpreter, so the limits apply to this run alone
+        output = self.session.run(self.limits + code)
+        # The container's output only comes back once the run is over
+        if on_output is not None and output.stdout:
+            on_output(output.stdout)
+        error = None
+        stderr = output.stderr or ""
+        if output.exit_code != 0:
+            if self.cpu_seconds > 0 and limit_error(CPU_TIME, self.cpu_seconds)["message"] in stderr:
+                error = limit_error(CPU_TIME, self.cpu_seconds)
+            elif self.memory_limit_mb > 0 and stderr.rstrip().endswith("MemoryError"):
+                error = limit_error(MEMORY, self.memory_limit_mb)
+        return ExecutionResult(output.exit_code, output.stdout, output.stderr, error)
+
+    def execute_command(self, command: str):
+        return self.session.execute_command(command)
+
+    def close(self):
+        self.session.close()
+
+
+def _open_sandbox_session() -> PooledSandboxSession:
+    session = SandboxSession(
+        client=_docker_client(),
+        image="python:3.12-slim",
+        # Containers are recycled by the pool; the image stays for their replacements
+        keep_template=True,
+        commit_container=False,
+        lang="python",
+        verbose=True,
+        # The whole container is capped too, whatever the code starts
+        runtime_configs=(
+            {"mem_limit": f"{settings.sandbox.execution_memory_limit_mb}m"}
+            if settings.sandbox.execution_memory_limit_mb > 0
+            else {}
+        ),
+    )
+    session.open()
+    return PooledSandboxSession(
+        session,
+        cpu_seconds=settings.sandbox.execution_cpu_seconds,
+        memory_limit_mb=settings.sandbox.execution_memory_limit_mb,
+    )
+
+
+_container_pool: Optional[ContainerPool] = None
+
+
+def get_container_pool() -> ContainerPool:
+    """The pool of warm sandbox containers used when local_sandbox is off."""
+    global _container_pool
+    if _container_pool is None:
+        _container_pool = ContainerPool.from_settings(_open_sandbox_session)
+        atexit.register(_container_pool.shutdown)
+    return _container_pool
 
-    return preamble
+
+_worker_pool: Optional[ContainerPool] = None
+
+
+def get_worker_pool() -> ContainerPool:
+    """The pool of pre-started worker processes that run local sandbox code."""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = ContainerPool(
+            partial(
+                LocalWorkerSession,
+                timeout=settings.sandbox.execution_timeout,
+                memory_limit_mb=settings.sandbox.execution_memory_limit_mb,
+                cpu_seconds=settings.sandbox.execution_cpu_seconds,
+                max_output_chars=settings.sandbox.max_output_chars,
+                # Workers only run code without structured tools
+                preamble=get_preamble_library(True, False),
+            ),
+            size=settings.sandbox.local_worker_pool_size,
+            max_runs=settings.sandbox.local_worker_max_runs,
+            health_check_interval=settings.sandbox.container_health_check_interval,
+            health_check_command="pass",
+        )
+        atexit.register(_worker_pool.shutdown)
+    return _worker_pool
 
 
 class ExecutionResult:
-    def __init__(self, exit_code, stdout, stderr):
+    def __init__(self, exit_code, stdout, stderr, error=None):
         self.exit_code = exit_code
         self.stdout = stdout
         self.stderr = stderr
+        # Set when the execution was stopped by a limit, see `local_workers.limit_error`
+        self.error = error
 
 
-async def run_local(code_content: str) -> ExecutionResult:
-    stdout_buffer = StringIO()
-    stderr_buffer = StringIO()
-    exit_code = 0
-
+def _local_namespace() -> dict:
     import asyncio
     import concurrent.futures
 
@@ -203,9 +644,44 @@ async def run_local(code_content: str) -> ExecutionResult:
     # Add all currently loaded modules to the namespace
     # This ensures that any modules already imported in the main program are available
     namespace.update(sys.modules)
+    return namespace
+
+
+@lru_cache(maxsize=8)
+def get_compiled_preamble(is_local: bool, structured_tools: bool) -> CompiledPreamble:
+    """`get_preamble_library`, compiled and run once, for `run_local`."""
+    return CompiledPreamble(get_preamble_library(is_local, structured_tools), _local_namespace())
+
+
+async def run_local(
+    code_content: str,
+    payload: Optional[bytes] = None,
+    preamble: Optional[CompiledPreamble] = None,
+    on_output: Optional[Callable[[str], None]] = None,
+    timeout: Optional[float] = None,
+) -> ExecutionResult:
+    """
+    Run code in this process. With a compiled preamble, the code only needs the per-run
+    header (see `get_preamble_header`) ahead of its own lines. on_output is called with the
+    code's stdout as it is printed.
+
+    The timeout can only stop the code while it awaits: code that computes without awaiting
+    holds the event loop until it is done, and CPU and memory limits can't be applied to a
+    single execution here. Prefer the worker processes (`run_in_worker`) when they can be used.
+    """
+    stdout_buffer = OutputBuffer(on_output, settings.sandbox.max_output_chars)
+    stderr_buffer = StringIO()
+    exit_code = 0
+    error = None
+
+    namespace = _local_namespace()
+    if preamble is not None:
+        preamble.install(namespace)
 
     try:
         with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
+            # Fresh copies, so the code can't modify the stored variables
+            namespace.update(decode_variables(payload))
             # Use compile to get better error reporting
             compiled_code = compile(code_content, '<string>', 'exec')
             exec(compiled_code, namespace, namespace)
@@ -214,52 +690,103 @@ async def run_local(code_content: str) -> ExecutionResult:
             if '__cuga_async_wrapper__' in namespace and asyncio.iscoroutinefunction(
                 namespace['__cuga_async_wrapper__']
             ):
-                await namespace['__cuga_async_wrapper__']()
+                await asyncio.wait_for(namespace['__cuga_async_wrapper__'](), timeout)
     except SystemExit as e:
         # Handle exit() and quit() calls gracefully
         exit_code = e.code if e.code is not None else 0
         if e.code is not None and e.code != 0:
             stderr_buffer.write(f"SystemExit: {e.code}")
+    except asyncio.TimeoutError:
+        exit_code, error = 1, limit_error(TIMEOUT, timeout)
+    except ExecutionLimitExceeded as e:
+        exit_code, error = 1, e.error
     except Exception as e:
         exit_code = 1
         stderr_buffer.write(str(e))
+    if error is not None:
+        stderr_buffer.write(error["message"])
+    stdout_buffer.flush()
 
     return ExecutionResult(
-        exit_code=exit_code, stdout=stdout_buffer.getvalue(), stderr=stderr_buffer.getvalue()
+        exit_code=exit_code, stdout=stdout_buffer.getvalue(), stderr=stderr_buffer.getvalue(), error=error
     )
 
 
-async def run_code(code: str, _locals: dict[str, Any] = None) -> tuple[str, dict[str, Any]]:
+async def run_in_worker(
+    code_content: str, payload: Optional[bytes] = None, on_output: Optional[Callable[[str], None]] = None
+) -> ExecutionResult:
+    """
+    Run code like `run_local`, but in one of the local worker processes: concurrent runs
+    are isolated from each other and from the server, run in parallel, and are stopped
+    when they exceed the execution time, CPU time or memory limits.
+    """
+    try:
+        result = await get_worker_pool().run(code_content, payload, _from_thread(on_output))
+    except WorkerTimeout as e:
+        return ExecutionResult(exit_code=1, stdout=e.stdout, stderr=str(e), error=e.error)
+    except SandboxWorkerError as e:
+        return ExecutionResult(exit_code=1, stdout=e.stdout, stderr=str(e))
+    return ExecutionResult(result.exit_code, result.stdout, result.stderr, result.error)
+
+
+def _from_thread(on_output: Optional[Callable[[str], None]]) -> Optional[Callable[[str], None]]:
+    # Sessions run in worker threads: hand their output to the event loop
+    if on_output is None:
+        return None
+    loop = asyncio.get_running_loop()
+    return lambda text: loop.call_soon_threadsafe(on_output, text)
+
+
+async def run_code(
+    code: str, _locals: dict[str, Any] = None, on_output: Optional[Callable[[str], None]] = None
+) -> tuple[str, dict[str, Any]]:
     """
     Run code in a sandboxed environment.
     :param lang: The language of the code.
     :param code: The code to run.
     :param libraries: The libraries to use, it is optional.
-    :return: The output of the code.
+    :param on_output: Called with the code's stdout as it is printed.
+    :return: The output of the code, and {"error": ...} when a limit stopped it (see
+        `local_workers.limit_error`; the output is then what was printed until then,
+        followed by the error message).
     """
-    variables = var_manager.get_variables_formatted()
+    # Only the variables the code refers to are handed over, pickled; the few that
+    # can't be are still assigned from their repr
+    payload, variables = encode_variables(
+        var_manager.get_variables_for_code(code), portable=not settings.features.local_sandbox
+    )
     python_file_dir = f"./code/{tracker.experiment_folder}/{tracker.task_id}"
     os.makedirs(python_file_dir, exist_ok=True)
     python_file_dir = os.path.join(LOGGING_DIR, python_file_dir)
     file_path = python_file_dir + "/" + f"{mask_with_timestamp(tracker.task_id)}.py"
 
+    if settings.sandbox.parallelize_api_calls:
+        code = parallelize_api_calls(code)
+
     wrapped_code = f"""async def __cuga_async_wrapper__():
 {chr(10).join('    ' + line for line in code.split(chr(10)))}
 """
 
     wrapped_code_with_call = wrapped_code + "\nimport asyncio\nasyncio.run(__cuga_async_wrapper__())\n"
 
-    code_content = (
-        get_premable(is_local=settings.features.local_sandbox, current_date=tracker.current_date)
+    # The preamble library is generated (and, for local runs, compiled) once per
+    # configuration; only the header, variables and code below change from step to step
+    structured_tools = structured_tools_enabled()
+    library = get_preamble_library(settings.features.local_sandbox, structured_tools)
+    step_code = (
+        get_preamble_header(current_date=tracker.current_date)
         + "\n"
         + variables
         + "\n"
         + (wrapped_code if settings.features.local_sandbox else wrapped_code_with_call)
     )
 
+    variables_file_path = file_path[: -len(".py")] + ".variables.pkl"
     code_content_for_saving = (
-        get_premable(is_local=settings.features.local_sandbox, current_date=tracker.current_date)
+        library
+        + get_preamble_header(current_date=tracker.current_date)
         + "\n"
+        + (loader_source(variables_file_path) if payload else "")
         + variables
         + "\n"
         + wrapped_code_with_call
@@ -270,39 +797,45 @@ async def run_code(code: str, _locals: dict[str, Any] = None) -> tuple[str, dict
         with open(file_path, 'w') as f:
             f.write(code_content_for_saving)
             logger.debug(f"Wrote python file at {file_path}")
+        if payload:
+            with open(variables_file_path, 'wb') as f:
+                f.write(payload)
 
     if settings.features.local_sandbox:
         from cuga.backend.utils.code_generator import process_python_file
 
-        result = await run_local(code_content)
+        if settings.sandbox.local_worker_pool_size > 0 and not structured_tools:
+            # The workers were handed the preamble library when they started
+            result = await run_in_worker(step_code, payload, on_output)
+        else:
+            # Structured tools live in this process, so the code has to run here too
+            result = await run_local(
+                step_code,
+                payload,
+                get_compiled_preamble(True, structured_tools),
+                on_output,
+                timeout=settings.sandbox.execution_timeout or None,
+            )
         if settings.advanced_features.benchmark == "appworld":
             process_python_file(file_path, tracker.task_id)
-        return result.stdout if result.exit_code == 0 else result.stderr, {}
+        return _execution_output(result)
     else:
-        # Check for Podman socket first, fall back to Docker/Rancher Desktop
-        podman_socket = f"/run/user/{os.getuid()}/podman/podman.sock"
-        docker_socket = os.path.expanduser("~/.rd/docker.sock")
-
-        if os.path.exists(podman_socket):
-            socket_path = podman_socket
-        elif os.path.exists(docker_socket):
-            socket_path = docker_socket
-        else:
-            # Try default Docker socket as last resort
-            socket_path = "/var/run/docker.sock"
-        docker_client = docker.DockerClient(base_url=f"unix://{socket_path}")
-        with SandboxSession(
-            client=docker_client,
-            image="python:3.12-slim",
-            keep_template=False,
-            commit_container=False,
-            lang="python",
-            verbose=True,
-        ) as session:
-            result = session.run(code_content)
-            logger.debug(session.config)
-            if settings.advanced_features.benchmark == "appworld":
-                from evaluation.code_generator import process_python_file
-
-                process_python_file(file_path, tracker.task_id)
-            return result.stdout if result.exit_code == 0 else result.stderr, {}
+        # Every container run starts a new interpreter, so the whole source goes along
+        try:
+            result = await get_container_pool().run(library + step_code, payload, _from_thread(on_output))
+        except asyncio.TimeoutError:
+            error = limit_error(TIMEOUT, settings.sandbox.execution_timeout)
+            result = ExecutionResult(exit_code=1, stdout="", stderr=error["message"], error=error)
+        if settings.advanced_features.benchmark == "appworld":
+            from evaluation.code_generator import process_python_file
+
+            process_python_file(file_path, tracker.task_id)
+        return _execution_output(result)
+
+
+def _execution_output(result: ExecutionResult) -> tuple[str, dict[str, Any]]:
+    if result.error is not None:
+        # What was printed before the execution was stopped, then why it was
+        output = f"{result.stdout}\n{result.error['message']}" if result.stdout else result.error["message"]
+        return output, {"error": result.error}
+    return result.stdout if result.exit_code == 0 else result.stderr, {}
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from cuga.backend.tools_env.code_sandbox.container_pool import ContainerPool
+from cuga.backend.tools_env.code_sandbox.sandbox import ExecutionResult
+
+
+class FakeSession:
+    """Stands in for an open llm_sandbox session."""
+
+    opened = []
+
+    def __init__(self, broken_commands=()):
+        self.id = len(FakeSession.opened)
+        self.broken_commands = broken_commands
+        self.commands = []
+        self.closed = False
+        self.running = 0
+        FakeSession.opened.append(self)
+
+    def run(self, code):
+        self.running += 1
+        assert self.running == 1, "a container ran two executions at once"
+        time.sleep(0.3 if code == "slow" else 0.02)
+        self.running -= 1
+        if code == "crash":
+            raise ConnectionError("container died")
+        return ExecutionResult(exit_code=0, stdout=f"{self.id}: {code}", stderr="")
+
+    def execute_command(self, command):
+        self.commands.append(command)
+        return ExecutionResult(exit_code=1 if command in self.broken_commands else 0, stdout="", stderr="")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def reset_sessions():
+    FakeSession.opened = []
+
+
+class TestContainerPool:
+    """Test suite for the warm sandbox container pool."""
+
+    @pytest.mark.asyncio
+    async def test_containers_are_reused_and_reset(self):
+        pool = ContainerPool(FakeSession, size=2, reset_command="reset")
+
+        results = await asyncio.gather(*(pool.run(f"print({i})") for i in range(6)))
+
+        assert len(FakeSession.opened) == 2
+        assert {result.stdout.split(":")[0] for result in results} <= {"0", "1"}
+        assert sum(session.commands.count("reset") for session in FakeSession.opened) == 6
+        await pool.close()
+        assert all(session.closed for session in FakeSession.opened)
+
+    @pytest.mark.asyncio
+    async def test_containers_are_recycled_after_max_runs(self):
+        pool = ContainerPool(FakeSession, size=1, max_runs=2)
+
+        for i in range(5):
+            await pool.run(f"print({i})")
+
+        assert [session.closed for session in FakeSession.opened] == [True, True, False]
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_containers_are_replaced(self):
+        pool = ContainerPool(FakeSession, size=1)
+
+        with pytest.raises(ConnectionError):
+            await pool.run("crash")
+        result = await pool.run("print(1)")
+
+        assert FakeSession.opened[0].closed
+        assert result.stdout == "1: print(1)"
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_idle_containers_are_health_checked(self):
+        pool = ContainerPool(
+            lambda: FakeSession(broken_commands=("true",)), size=1, health_check_interval=0.05
+        )
+
+        await pool.run("print(1)")
+        await asyncio.sleep(0.06)
+        result = await pool.run("print(2)")
+
+        assert FakeSession.opened[0].commands == ["true"]
+        assert FakeSession.opened[0].closed
+        assert result.stdout.startswith("1:")
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_waiting_runs_survive_a_failed_warm_up(self):
+        attempts = []
+        lock = threading.Lock()
+
+        def flaky_factory():
+            with lock:
+                attempts.append(None)
+                if len(attempts) == 1:
+                    raise RuntimeError("docker unavailable")
+            return FakeSession()
+
+        pool = ContainerPool(flaky_factory, size=1)
+
+        result = await asyncio.wait_for(pool.run("print(1)"), timeout=2)
+
+        assert result.exit_code == 0
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_run_gives_its_container_back(self):
+        pool = ContainerPool(FakeSession, size=1)
+        for _ in range(3):
+            run = asyncio.create_task(pool.run("slow"))
+            await asyncio.sleep(0.05)
+            run.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await run
+
+        result = await asyncio.wait_for(pool.run("print(1)"), timeout=2)
+
+        assert result.stdout.endswith("print(1)")
+        # The cancelled runs' containers were closed, as their code may still be running
+        assert [session.closed for session in FakeSession.opened[:3]] == [True] * 3
+        await pool.close()
+
+    def test_shutdown_closes_busy_containers(self):
+        pool = ContainerPool(FakeSession, size=1)
+        asyncio.run(pool.run("print(1)"))
+
+        pool.shutdown()
+
+        assert FakeSession.opened[0].closed
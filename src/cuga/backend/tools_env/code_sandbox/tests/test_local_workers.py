@@ -0,0 +1,165 @@
+import asyncio
+import time
+
+import pytest
+
+from cuga.backend.tools_env.code_sandbox.container_pool import ContainerPool
+from cuga.backend.tools_env.code_sandbox.local_workers import (
+    CompiledPreamble,
+    LocalWorkerSession,
+    WorkerCrashed,
+    WorkerTimeout,
+)
+
+
+def _wrapped(body: str) -> str:
+    lines = "\n".join("    " + line for line in body.splitlines())
+    return f"async def __cuga_async_wrapper__():\n{lines}\n"
+
+
+class TestLocalWorkerSession:
+    """Test suite for a single local sandbox worker process."""
+
+    def test_runs_code_with_captured_output(self):
+        session = LocalWorkerSession()
+        try:
+            result = session.run(_wrapped("await asyncio.sleep(0)\nprint(json.dumps({'a': 1}))"))
+            error = session.run("raise ValueError('bad value')")
+            exited = session.run("exit(3)")
+        finally:
+            session.close()
+
+        assert (result.exit_code, result.stdout, result.stderr) == (0, '{"a": 1}\n', "")
+        assert (error.exit_code, error.stderr) == (1, "bad value")
+        assert (exited.exit_code, exited.stderr) == (3, "SystemExit: 3")
+
+    def test_runs_do_not_share_state(self):
+        session = LocalWorkerSession()
+        try:
+            session.run(
+                "import datetime\n"
+                "class Pinned(datetime.datetime):\n"
+                "    pass\n"
+                "datetime.datetime = Pinned\n"
+                "leaked = 1"
+            )
+            result = session.run("import datetime\nprint(datetime.datetime.__name__)\nprint(leaked)")
+        finally:
+            session.close()
+
+        assert result.stdout == "datetime\n"
+        assert result.stderr == "name 'leaked' is not defined"
+
+    def test_preamble_is_defined_in_every_run(self):
+        preamble = "import json\ncalls = []\ndef record(value):\n    calls.append(value)\n    return label\n"
+        session = LocalWorkerSession(preamble=preamble)
+        try:
+            first = session.run("label = 'first'\nprint(record(1), calls)")
+            second = session.run("label = 'second'\ncalls = []\nprint(record(2), calls)")
+        finally:
+            session.close()
+
+        assert first.stdout == "first [1]\n"
+        assert second.stdout == "second [2]\n"
+
+    def test_timeout_kills_the_worker(self):
+        session = LocalWorkerSession(timeout=0.5)
+        try:
+            with pytest.raises(WorkerTimeout):
+                session.run("while True:\n    pass")
+            with pytest.raises(WorkerCrashed):
+                session.run("print(1)")
+        finally:
+            session.close()
+
+    def test_output_is_streamed_and_kept_after_a_timeout(self):
+        session = LocalWorkerSession(timeout=1.0)
+        chunks = []
+        try:
+            with pytest.raises(WorkerTimeout) as raised:
+                session.run(
+                    _wrapped(
+                        "print('starting', flush=True)\nawait asyncio.sleep(0.1)\nprint(1)\nawait asyncio.sleep(5)"
+                    ),
+                    on_output=chunks.append,
+                )
+        finally:
+            session.close()
+
+        assert chunks == ["starting\n", "1\n"]
+        assert raised.value.stdout == "starting\n1\n"
+        assert raised.value.error["type"] == "timeout"
+
+    def test_cpu_time_limit(self):
+        session = LocalWorkerSession(cpu_seconds=1)
+        try:
+            result = session.run("try:\n    while True:\n        pass\nexcept Exception:\n    pass")
+            after = session.run("print('still alive')")
+        finally:
+            session.close()
+
+        assert result.exit_code == 1
+        assert result.error["type"] == "cpu_time"
+        assert result.stderr == "CpuTimeExceeded: execution used more than 1 CPU seconds"
+        assert after.stdout == "still alive\n"
+
+    def test_output_is_capped(self):
+        session = LocalWorkerSession(max_output_chars=10)
+        try:
+            result = session.run("for i in range(1000):\n    print(i)")
+        finally:
+            session.close()
+
+        assert result.stdout == "0\n1\n2\n3\n4\n\n[output truncated at 10 characters]\n"
+
+    def test_memory_limit(self):
+        session = LocalWorkerSession(memory_limit_mb=512)
+        try:
+            result = session.run("blob = bytearray(1024 * 1024 * 1024)")
+            after = session.run("print('still alive')")
+        finally:
+            session.close()
+
+        assert result.exit_code == 1
+        assert result.error["type"] == "memory"
+        assert after.stdout == "still alive\n"
+
+
+class TestCompiledPreamble:
+    """Test suite for preamble code compiled and run once, then installed in each run."""
+
+    def test_functions_see_the_run_namespace(self):
+        preamble = CompiledPreamble(
+            "def greet():\n    return f'hello {name}'\n", {"__builtins__": __builtins__}
+        )
+        first, second = {"name": "a"}, {"name": "b"}
+
+        preamble.install(first)
+        preamble.install(second)
+
+        assert (first["greet"](), second["greet"]()) == ("hello a", "hello b")
+        assert set(preamble.definitions) == {"greet"}
+
+
+class TestLocalWorkerPool:
+    """Test suite for running local sandbox code in a pool of worker processes."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_runs_are_isolated_and_parallel(self):
+        pool = ContainerPool(LocalWorkerSession, size=4, health_check_command="pass")
+        pool.start()
+        # Let the workers start before timing the runs
+        await pool.run("pass")
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                pool.run(_wrapped(f"for _ in range(3):\n    print({i})\n    time.sleep(0.1)"))
+                for i in range(4)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        await pool.close()
+
+        assert [result.stdout for result in results] == [f"{i}\n" * 3 for i in range(4)]
+        assert elapsed < 1.0
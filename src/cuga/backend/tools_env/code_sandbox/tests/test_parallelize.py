@@ -0,0 +1,116 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cuga.backend.tools_env.code_sandbox.parallelize import parallelize_api_calls
+from cuga.backend.tools_env.code_sandbox.sandbox import get_compiled_preamble, get_preamble_header, run_local
+
+
+def _wrapped(body: str) -> str:
+    lines = "\n".join("    " + line for line in body.splitlines())
+    return f"async def __cuga_async_wrapper__():\n{lines}\n"
+
+
+class SlowRegistryHandler(BaseHTTPRequestHandler):
+    """Answers /functions/call once `calls` are in flight at the same time, counting them."""
+
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+    calls: threading.Barrier
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = SlowRegistryHandler
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+        cls.calls.wait()
+        with cls.lock:
+            cls.in_flight -= 1
+        body = json.dumps({"name": f"user{request['args']['id']}"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def registry_url():
+    SlowRegistryHandler.peak = 0
+    SlowRegistryHandler.calls = threading.Barrier(8, timeout=5)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowRegistryHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+LOOP = """
+names = []
+for i, user in enumerate(users):
+    names.append(await call_api("app", "get_user", {"id": user["id"], "n": i}))
+print(names, i, user)
+"""
+
+
+class TestParallelizeApiCalls:
+    """Test suite for gathering independent call_api awaits in generated code."""
+
+    def test_independent_loop_and_sequence_are_gathered(self):
+        code = (
+            "a = await call_api('x', 'y', {})\n"
+            "b = await call_api('x', 'z', {'n': len(ids)})\n"
+            "c = await call_api('x', 'w', {'id': a['id']})\n" + LOOP
+        )
+
+        rewritten = parallelize_api_calls(code)
+
+        assert "a, b = await _gather_api_calls([call_api('x', 'y', {}), call_api('x', 'z'" in rewritten
+        assert "c = await call_api('x', 'w', {'id': a['id']})" in rewritten
+        assert "for [i, user], __cuga_result_1__ in zip(__cuga_items_1__, __cuga_results_1__):" in rewritten
+
+    @pytest.mark.parametrize(
+        "code",
+        [
+            # Each call depends on the previous result
+            "prev = None\nfor u in users:\n    r = await call_api('a', 'b', {'after': prev})\n    prev = r\n",
+            # The loop may stop before making every call
+            "for u in users:\n    r = await call_api('a', 'b', {'id': u})\n    if r:\n        break\n",
+            # Arguments with side effects
+            "for u in users:\n    r = await call_api('a', 'b', {'id': next(ids)})\n",
+            # The call only happens for some items
+            "for u in users:\n    r = await call_api('a', 'b', {}) if u else None\n",
+            # The body changes the arguments of the next call in place
+            "params = {'page_index': 0}\nfor i in range(3):\n"
+            "    page = await call_api('a', 'b', params)\n    params['page_index'] += 1\n",
+            "for u in users:\n    r = await call_api('a', 'b', {'seen': seen})\n    seen.append(u)\n",
+            "for u in users:\n    r = await call_api('a', 'b', {'n': state.count})\n    state.count = len(r)\n",
+            # The body grows the list being iterated
+            "for u in users:\n    r = await call_api('a', 'b', {'id': u})\n    users.extend(r)\n",
+            # Not valid Python: left alone
+            "for u in users\n    r = await call_api('a', 'b', {})\n",
+        ],
+    )
+    def test_dependent_code_is_left_alone(self, code):
+        assert parallelize_api_calls(code) == code
+
+    @pytest.mark.asyncio
+    async def test_gathered_calls_run_concurrently(self, registry_url):
+        code = "users = [{'id': n} for n in range(8)]\n" + parallelize_api_calls(LOOP)
+
+        result = await run_local(
+            get_preamble_header() + f"_REGISTRY_BASE = {registry_url!r}\n" + _wrapped(code),
+            preamble=get_compiled_preamble(True, False),
+        )
+
+        expected = [{"name": f"user{n}"} for n in range(8)]
+        assert result.stdout == f"{expected} 7 {{'id': 7}}\n"
+        assert SlowRegistryHandler.peak == 8
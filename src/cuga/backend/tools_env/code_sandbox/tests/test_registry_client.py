@@ -0,0 +1,146 @@
+import asyncio
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cuga.backend.tools_env.code_sandbox.sandbox import (
+    get_compiled_preamble,
+    get_preamble_header,
+    registry_client_code,
+    run_local,
+)
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """
+    Answers every POST with its JSON body, chunked or after 0.2s when the path asks for it.
+    Registry functions answer with the args they got.
+    """
+
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        EchoHandler.connections += 1
+        super().setup()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path.startswith("/slow"):
+            time.sleep(0.2)
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/functions/call_batch"):
+            calls = json.loads(body)["calls"]
+            body = json.dumps({"results": [{"result": {"echo": call["args"]}} for call in calls]}).encode()
+        elif self.path.startswith("/functions/call"):
+            body = json.dumps({"echo": json.loads(body)["args"]}).encode()
+        self.send_response(200)
+        if self.path.startswith("/chunked"):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for piece in (body[:3], body[3:]):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    EchoHandler.connections = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _client_namespace(max_connections=4):
+    namespace = {"asyncio": asyncio, "json": json, "urllib": urllib}
+    exec(registry_client_code, namespace)
+    namespace["_registry"] = namespace["_RegistryClient"](max_connections)
+    return namespace
+
+
+class TestRegistryClient:
+    """Test suite for the keep-alive HTTP client of the sandbox preamble."""
+
+    @pytest.mark.asyncio
+    async def test_connections_are_kept_alive_and_bounded(self, server_url):
+        namespace = _client_namespace(max_connections=2)
+        post = namespace["_registry_post"]
+
+        results = await asyncio.gather(*(post(f"{server_url}/call?i={i}", {"i": i}, 5) for i in range(10)))
+        await post(f"{server_url}/chunked", {"chunked": True}, 5)
+        await post(f"{server_url}/call", {"after": "chunked"}, 5)
+
+        assert [json.loads(result) for result in results] == [{"i": i} for i in range(10)]
+        assert EchoHandler.connections <= 2
+
+    @pytest.mark.asyncio
+    async def test_waiting_for_a_connection_does_not_count_towards_the_timeout(self, server_url):
+        namespace = _client_namespace(max_connections=2)
+        post = namespace["_registry_post"]
+
+        # 5 rounds of 0.2s: the last calls wait about 0.8s for a connection
+        results = await asyncio.gather(*(post(f"{server_url}/slow", {"i": i}, 0.5) for i in range(10)))
+
+        assert [json.loads(result) for result in results] == [{"i": i} for i in range(10)]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_call_closes_its_connection(self, server_url):
+        namespace = _client_namespace(max_connections=1)
+        registry = namespace["_registry"]
+        await namespace["_registry_post"](f"{server_url}/call", {}, 5)
+        [(_, writer)] = [connection for idle in registry._idle.values() for connection in idle]
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(namespace["_registry_post"](f"{server_url}/slow", {}, 5), 0.05)
+
+        assert writer.is_closing()
+        assert not any(registry._idle.values())
+        assert json.loads(await namespace["_registry_post"](f"{server_url}/call", {"after": 1}, 5)) == {
+            "after": 1
+        }
+
+    @pytest.mark.asyncio
+    async def test_http_errors(self, server_url):
+        namespace = _client_namespace()
+
+        with pytest.raises(Exception, match="HTTP Error: 404 - Not Found"):
+            await namespace["_registry_post"](f"{server_url}/missing", {}, 5)
+        with pytest.raises(Exception, match="URL Error"):
+            await namespace["_registry_post"]("http://127.0.0.1:1/call", {}, 5)
+
+
+class TestCallApi:
+    """Test suite for the call_api family of the preamble, run against a registry."""
+
+    @pytest.mark.asyncio
+    async def test_call_api_and_batch_share_the_client(self, server_url):
+        code = (
+            get_preamble_header()
+            + f"_REGISTRY_BASE = {server_url!r}\n"
+            + "\nasync def __cuga_async_wrapper__():\n"
+            + "    print(await call_api('app', 'get', {'a': 1}))\n"
+            + "    print(await call_api_batch([('app', 'list', {'b': 2})]))\n"
+        )
+
+        result = await run_local(code, preamble=get_compiled_preamble(True, False))
+
+        assert result.stdout == "{'echo': {'a': 1}}\n[{'echo': {'b': 2}}]\n"
+        assert EchoHandler.connections == 1
@@ -538,3 +538,25 @@ print("This won't be reached")
         assert result.exit_code == 1
         assert "Before quit" in result.stdout
         assert "SystemExit: 1" in result.stderr
+
+    @pytest.mark.asyncio
+    async def test_run_local_streams_output_and_times_out(self):
+        """Test run_local streaming stdout and stopping code that waits too long."""
+        code_content = """
+async def __cuga_async_wrapper__():
+    print("step 1")
+    await asyncio.sleep(0.05)
+    print("step 2")
+    await asyncio.sleep(10)
+"""
+        chunks = []
+        result = await run_local(code_content, on_output=chunks.append, timeout=0.5)
+
+        assert chunks == ["step 1\n", "step 2\n"]
+        assert result.exit_code == 1
+        assert result.stdout == "step 1\nstep 2\n"
+        assert result.error == {
+            "type": "timeout",
+            "limit": 0.5,
+            "message": "TimeoutError: execution exceeded 0.5 seconds",
+        }
@@ -0,0 +1,77 @@
+from collections import namedtuple
+
+import pytest
+
+from cuga.backend.tools_env.code_sandbox.local_workers import LocalWorkerSession
+from cuga.backend.tools_env.code_sandbox.sandbox import run_local
+from cuga.backend.tools_env.code_sandbox.variable_injection import (
+    decode_variables,
+    encode_variables,
+    loader_source,
+)
+
+
+class Point:
+    def __init__(self, x):
+        self.x = x
+
+    def __repr__(self):
+        return f"Point({self.x})"
+
+
+class TestVariableInjection:
+    """Test suite for handing stored variables to sandboxed code."""
+
+    def test_unpicklable_values_fall_back_to_repr(self):
+        payload, source = encode_variables({"rows": [{"a": 1}], "fn": len, "gen": (i for i in range(2))})
+
+        assert set(decode_variables(payload)) == {"rows", "fn"}
+        assert source.startswith("gen = <generator object")
+
+    def test_portable_payload_only_holds_builtin_types(self):
+        payload, source = encode_variables({"rows": [1, 2], "point": Point(3)}, portable=True)
+
+        assert decode_variables(payload) == {"rows": [1, 2]}
+        assert source == "point = Point(3)"
+        assert encode_variables({}) == (None, "")
+
+    def test_portable_payload_checks_nested_values(self):
+        Pair = namedtuple("Pair", "a b")
+        cycle = [1]
+        cycle.append(cycle)
+        values = {"rows": [{"at": Point(1)}], "pair": Pair(1, 2), "keys": {(1, "a"): {2.5}}, "cycle": cycle}
+
+        payload, source = encode_variables(values, portable=True)
+
+        assert set(decode_variables(payload)) == {"keys", "cycle"}
+        assert source == "rows = [{'at': Point(1)}]\npair = Pair(a=1, b=2)"
+
+    def test_loader_source(self, tmp_path):
+        payload, _ = encode_variables({"rows": [1, 2]})
+        path = tmp_path / "variables.pkl"
+        path.write_bytes(payload)
+        namespace = {}
+
+        exec(loader_source(str(path)), namespace)
+
+        assert namespace["rows"] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_run_local_gets_copies(self):
+        rows = [{"a": 1}]
+        payload, _ = encode_variables({"rows": rows})
+
+        result = await run_local("rows[0]['a'] = 2\nprint(rows)", payload)
+
+        assert result.stdout == "[{'a': 2}]\n"
+        assert rows == [{"a": 1}]
+
+    def test_worker_receives_the_payload(self):
+        payload, _ = encode_variables({"rows": list(range(100000))})
+        session = LocalWorkerSession()
+        try:
+            result = session.run("print(sum(rows))", payload)
+        finally:
+            session.close()
+
+        assert result.stdout == f"{sum(range(100000))}\n"
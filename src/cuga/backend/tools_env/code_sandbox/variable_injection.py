@@ -0,0 +1,63 @@
+import pickle
+from typing import Any, Dict, Optional, Tuple
+
+# Readable by every Python the sandbox runs (3.8+)
+PICKLE_PROTOCOL = 5
+
+# Types whose pickles only refer to builtins, so any interpreter can load values made of them
+# (exact types: a subclass, e.g. a namedtuple, is pickled by reference to its own class)
+PORTABLE_TYPES = (dict, list, tuple, set, frozenset, str, bytes, int, float, bool, type(None))
+_CONTAINER_TYPES = (dict, list, tuple, set, frozenset)
+
+
+def _is_portable(value: Any) -> bool:
+    """Whether value, and everything it contains, is of a PORTABLE_TYPES type."""
+    pending = [value]
+    seen = set()
+    while pending:
+        item = pending.pop()
+        if type(item) not in PORTABLE_TYPES:
+            return False
+        if type(item) in _CONTAINER_TYPES and id(item) not in seen:
+            seen.add(id(item))
+            pending.extend(item.items() if type(item) is dict else item)
+    return True
+
+
+def encode_variables(values: Dict[str, Any], portable: bool = False) -> Tuple[Optional[bytes], str]:
+    """
+    Split variables into a pickle, for the ones that can travel that way, and Python source
+    assigning the rest from their repr (the way every variable used to be injected).
+
+    With `portable`, only values made entirely of builtin types are pickled, since the code
+    will be loaded by another interpreter (a container) that may not be able to import the rest.
+    Returns the pickle (None if nothing was pickled) and the source.
+    """
+    pickled = {}
+    source_lines = []
+    for name, value in values.items():
+        if portable and not _is_portable(value):
+            source_lines.append(f"{name} = {repr(value)}")
+        else:
+            pickled[name] = value
+    try:
+        payload = pickle.dumps(pickled, protocol=PICKLE_PROTOCOL) if pickled else None
+    except Exception:
+        # Only look for the culprits when there are some
+        for name, value in list(pickled.items()):
+            try:
+                pickle.dumps(value, protocol=PICKLE_PROTOCOL)
+            except Exception:
+                source_lines.append(f"{name} = {repr(pickled.pop(name))}")
+        payload = pickle.dumps(pickled, protocol=PICKLE_PROTOCOL) if pickled else None
+    return payload, "\n".join(source_lines)
+
+
+def decode_variables(payload: Optional[bytes]) -> Dict[str, Any]:
+    """The variables of a payload made by `encode_variables`, as fresh copies."""
+    return pickle.loads(payload) if payload else {}
+
+
+def loader_source(path: str) -> str:
+    """Python source that defines the variables pickled at path, for code run from a file."""
+    return f"import pickle as _pickle\nwith open({path!r}, 'rb') as _variables:\n    globals().update(_pickle.load(_variables))\n"
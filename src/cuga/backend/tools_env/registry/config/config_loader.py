@@ -1,5 +1,5 @@
 from typing import Dict, Optional, List, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from loguru import logger
 from cuga.backend.utils.consts import ServiceType
 from cuga.backend.utils.file_utils import read_yaml_file
@@ -19,6 +19,29 @@ class ApiOverride(BaseModel):
     drop_query_parameters: Optional[List[str]] = None  # Query parameters to drop from operation
 
 
+class ResponseCacheConfig(BaseModel):
+    """Opt-in response cache of an app's safe (GET) operations"""
+
+    ttl_seconds: float = 60.0  # How long a cached response is served
+    max_entries: int = 256  # Least recently used entries are evicted beyond this
+
+
+class CallLimits(BaseModel):
+    """Concurrency and token-bucket rate limits of an app or a single tool"""
+
+    max_concurrency: Optional[int] = None  # Calls allowed in flight at once
+    rate_per_second: Optional[float] = None  # Sustained calls per second
+    burst: Optional[int] = None  # Calls allowed back to back (defaults to rate_per_second)
+
+
+class ServiceLimitsConfig(CallLimits):
+    """Admission control of an app: app-wide limits, per-tool limits and the waiting queue"""
+
+    max_queue: int = 100  # Calls allowed to wait for admission; more are rejected with 429
+    queue_timeout: float = 30.0  # Seconds a call may wait before it is rejected with 429
+    tools: Dict[str, CallLimits] = Field(default_factory=dict)  # Limits per tool name
+
+
 class ServiceConfig(BaseModel):
     url: Optional[str] = None
     command: Optional[str] = None
@@ -34,6 +57,8 @@ class ServiceConfig(BaseModel):
     tools: Optional[List[str]] = (
         None  # list of tools for a specific service - needed in case we get each tool separately
     )
+    response_cache: Optional[ResponseCacheConfig] = None  # Cache GET responses of this service
+    limits: Optional[ServiceLimitsConfig] = None  # Concurrency and rate limits of this service
 
 
 class Service(BaseModel):
@@ -134,6 +159,16 @@ def _create_service_config(service_name: str, config: dict, is_mcp_server: bool
         api_overrides = [ApiOverride(**override) for override in config['api_overrides']]
         service_config.api_overrides = api_overrides
 
+    # `response_cache: true` enables the cache with default limits
+    cache_cfg = config.get('response_cache')
+    if isinstance(cache_cfg, dict):
+        service_config.response_cache = ResponseCacheConfig(**cache_cfg)
+    elif cache_cfg is True:
+        service_config.response_cache = ResponseCacheConfig()
+
+    if config.get('limits'):
+        service_config.limits = ServiceLimitsConfig(**config['limits'])
+
     return service_config
 
 
@@ -1,14 +1,17 @@
 import json
 import re
-from typing import Any, Dict, List, Literal, Optional, TypeAlias
+from typing import Any, Callable, Dict, List, Literal, Optional, TypeAlias, get_args, get_origin
 from urllib.parse import urlencode
 
 import requests
 from loguru import logger
 from mcp.server.fastmcp import FastMCP
-from pydantic import BaseModel
+from mcp.server.fastmcp.tools import Tool
+from mcp.server.fastmcp.utilities.func_metadata import FuncMetadata, func_metadata
+from pydantic import BaseModel, Field
 
 from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.mcp_manager.http_pool import HttpClientPool
 from cuga.backend.tools_env.registry.mcp_manager.openapi_parser import (
     SimpleOpenAPIParser,
 )
@@ -79,6 +82,113 @@ def build_model(model_name: str, field_defs: dict[str, FieldSpec]) -> type:
     return type(model_name, (BaseModel,), attrs)
 
 
+JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", type(None): "null"}
+
+
+def _field_title(field_name: str) -> str:
+    # pydantic's default field title: "page_size" -> "Page Size"
+    return field_name.title().replace('_', ' ')
+
+
+def _type_json_schema(field_type: Any) -> Dict[str, Any]:
+    """JSON schema pydantic generates for the field types produced by `extract_field_definitions`."""
+    if field_type is Any:
+        return {}
+    origin = get_origin(field_type)
+    if origin is Literal:
+        expected = list(get_args(field_type))
+        result: Dict[str, Any] = {"const": expected[0]} if len(expected) == 1 else {"enum": expected}
+        types = {type(value) for value in expected}
+        if len(types) == 1 and next(iter(types)) in JSON_TYPES:
+            result["type"] = JSON_TYPES[next(iter(types))]
+        return result
+    if origin is dict:
+        value_schema = _type_json_schema(get_args(field_type)[1])
+        return {"additionalProperties": value_schema or True, "type": "object"}
+    if field_type is list:
+        return {"items": {}, "type": "array"}
+    if field_type is dict:
+        return {"additionalProperties": True, "type": "object"}
+    if field_type in JSON_TYPES:
+        return {"type": JSON_TYPES[field_type]}
+    raise TypeError(f"Unsupported field type {field_type}")
+
+
+def _model_json_schema(model_name: str, field_defs: dict[str, FieldSpec], defs: Dict[str, Any]) -> None:
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    for field_name, spec in field_defs.items():
+        if field_name.startswith('_'):
+            # pydantic treats underscored names as private attributes, not fields
+            continue
+        if isinstance(spec, dict):
+            sub_name = f"{model_name}{_titleize(field_name)}"
+            _model_json_schema(sub_name, spec, defs)
+            properties[field_name] = {"$ref": f"#/$defs/{sub_name}", "default": None}
+            continue
+        field_type, default = spec
+        field_schema = {**_type_json_schema(field_type), "title": _field_title(field_name)}
+        if default is ...:
+            required.append(field_name)
+        else:
+            field_schema["default"] = default
+        properties[field_name] = field_schema
+
+    schema: Dict[str, Any] = {"properties": properties}
+    if required:
+        schema["required"] = required
+    schema.update({"title": model_name, "type": "object"})
+    defs[model_name] = schema
+
+
+def handler_parameters_schema(handler_name: str, model_name: str, field_defs: dict[str, FieldSpec]) -> dict:
+    """
+    JSON schema of a tool handler's `(params: <model>, headers: dict = None)` arguments,
+    computed straight from the field definitions. It matches what FastMCP derives from the
+    pydantic model, without building the model.
+    """
+    defs: Dict[str, Any] = {}
+    _model_json_schema(model_name, field_defs, defs)
+    return {
+        "$defs": defs,
+        "properties": {
+            "params": {"$ref": f"#/$defs/{model_name}"},
+            "headers": {"additionalProperties": True, "default": None, "title": "Headers", "type": "object"},
+        },
+        "required": ["params"],
+        "title": f"{handler_name}Arguments",
+        "type": "object",
+    }
+
+
+class LazyTool(Tool):
+    """
+    FastMCP tool whose handler and pydantic input model are built on its first call.
+
+    `parameters` is precomputed from the field definitions, so listing tools doesn't build
+    any model and only the tools that are actually used pay for one.
+    """
+
+    fn: Optional[Callable[..., Any]] = Field(default=None, exclude=True)
+    fn_metadata: Optional[FuncMetadata] = None
+    build_handler: Callable[[], Callable[..., Any]] = Field(exclude=True)
+
+    @property
+    def output_schema(self) -> dict[str, Any] | None:
+        # Handlers are not annotated with a return type, so they have no output schema
+        return None
+
+    def ensure_built(self):
+        if self.fn_metadata is None:
+            fn = self.build_handler()
+            self.fn = fn
+            self.fn_metadata = func_metadata(fn)
+
+    async def run(self, arguments: dict[str, Any], context=None, convert_result: bool = False) -> Any:
+        self.ensure_built()
+        return await super().run(arguments, context=context, convert_result=convert_result)
+
+
 TYPE_MAP: Dict[str, Any] = {
     "string": str,
     "integer": int,
@@ -448,6 +558,66 @@ def get_operation_override_parameters(
     return parameters if parameters else None
 
 
+def prepare_request(api, all_params: dict, headers: dict, base_url: str, name: str, schemas):
+    """
+    Resolve the final URL, headers and payload of an API call.
+    Returns (final_url, headers, request_kwargs) where request_kwargs holds `json` or `data`.
+    """
+    params = get_operation_override_parameters(
+        schema_urls=schemas, app_name=name, operation_id=api.operation_id
+    )
+    additional_query_params = {}
+    additional_body_params = {}
+    tokens = headers.get("_tokens", None)
+    if params and tokens is not None:
+        if isinstance(tokens, str):
+            tokens = json.loads(tokens)
+        file_system_token = tokens.get("file_system", None)
+        if "file_system_access_token" in params.keys() and file_system_token:
+            if params["file_system_access_token"]["in"] == "query":
+                additional_query_params["file_system_access_token"] = file_system_token
+            if params["file_system_access_token"]["in"] == "body":
+                additional_body_params["file_system_access_token"] = file_system_token
+    if "_tokens" in list(headers.keys()):
+        del headers['_tokens']
+    path_params, query_params = extract_url_params(api, all_params)
+    query_params.update(additional_query_params)
+    final_url = construct_final_url(base_url, api, path_params, query_params)
+    body_params = extract_body_params(api, all_params)
+    body_params.update(additional_body_params)
+    use_json = determine_content_type(api)
+    if use_json:
+        return final_url, headers, {"json": body_params}
+    return final_url, headers, {"data": {k: v for k, v in body_params.items() if v is not None}}
+
+
+def build_error_response(e: Exception, api, final_url: Optional[str]) -> dict:
+    """Structured error returned by tool handlers instead of raising."""
+    logger.debug(f"Error in adapter {e}")
+    error_response = {
+        "status": "exception",
+        "error_type": type(e).__name__,
+        "message": str(e),
+    }
+
+    # Add HTTP-specific details if it's an HTTP error
+    if getattr(e, 'response', None) is not None:
+        error_response["status_code"] = e.response.status_code
+        error_response["url"] = final_url
+        error_response["method"] = api.method
+
+        # Try to get response body for more details
+        try:
+            if e.response.headers.get('content-type', '').startswith('application/json'):
+                error_response["message"] += f" {json.dumps(e.response.json())}"
+            else:
+                error_response["message"] += f" {e.response.text}"
+        except Exception:
+            pass
+
+    return error_response
+
+
 def create_handler(api, model, base_url: str, name: str, schemas: Dict[str, ServiceConfig]):
     """
     Create a handler function for an API that processes parameters,
@@ -457,93 +627,94 @@ def create_handler(api, model, base_url: str, name: str, schemas: Dict[str, Serv
     def handler(params: model, headers: dict = None):
         all_params = params.model_dump()
         headers = headers if headers else {}
+        final_url = None
 
         try:
-            params = get_operation_override_parameters(
-                schema_urls=schemas, app_name=name, operation_id=api.operation_id
-            )
-            additional_query_params = {}
-            additional_body_params = {}
-            tokens = headers.get("_tokens", None)
-            if params and tokens is not None:
-                tokens = json.loads(tokens)
-                file_system_token = tokens.get("file_system", None)
-                if "file_system_access_token" in params.keys() and file_system_token:
-                    if params["file_system_access_token"]["in"] == "query":
-                        additional_query_params["file_system_access_token"] = file_system_token
-                    if params["file_system_access_token"]["in"] == "body":
-                        additional_body_params["file_system_access_token"] = file_system_token
-            if "_tokens" in list(headers.keys()):
-                del headers['_tokens']
-            path_params, query_params = extract_url_params(api, all_params)
-            query_params.update(additional_query_params)
-            final_url = construct_final_url(base_url, api, path_params, query_params)
-            body_params = extract_body_params(api, all_params)
-            body_params.update(additional_body_params)
-            use_json = determine_content_type(api)
-
-            if use_json:
-                response = requests.request(api.method, final_url, headers=headers, json=body_params)
-            else:
-                response = requests.request(api.method, final_url, headers=headers, data=body_params)
+            final_url, headers, payload = prepare_request(api, all_params, headers, base_url, name, schemas)
+            response = requests.request(api.method, final_url, headers=headers, **payload)
+            response.raise_for_status()
+            return response.text
+
+        except Exception as e:
+            return build_error_response(e, api, final_url)
+
+    return handler
+
 
+def create_async_handler(
+    api, model, base_url: str, name: str, schemas: Dict[str, ServiceConfig], http_pool: HttpClientPool
+):
+    """
+    Same as create_handler, but non-blocking: the request goes through the shared
+    per-base-URL connection pool so concurrent tool calls overlap.
+    """
+
+    async def handler(params: model, headers: dict = None):
+        all_params = params.model_dump()
+        headers = headers if headers else {}
+        final_url = None
+
+        try:
+            final_url, headers, payload = prepare_request(api, all_params, headers, base_url, name, schemas)
+            response = await http_pool.request(api.method, final_url, headers=headers, **payload)
             response.raise_for_status()
             return response.text
 
         except Exception as e:
-            logger.debug(f"Error in adapter {e}")
-            error_response = {
-                "status": "exception",
-                "error_type": type(e).__name__,
-                "message": str(e),
-            }
-
-            # Add HTTP-specific details if it's an HTTP error
-            if hasattr(e, 'response') and e.response is not None:
-                error_response["status_code"] = e.response.status_code
-                error_response["url"] = final_url if 'final_url' in locals() else None
-                error_response["method"] = api.method
-
-                # Try to get response body for more details
-                try:
-                    if e.response.headers.get('content-type', '').startswith('application/json'):
-                        error_response["message"] += f" {json.dumps(response.json())}"
-                    else:
-                        error_response["message"] += f" {e.response.text}"
-                except Exception:
-                    pass
-
-            return error_response
+            return build_error_response(e, api, final_url)
 
     return handler
 
 
 def new_mcp_from_custom_parser(
-    base_url: str, parser: SimpleOpenAPIParser, name: str, schema_urls: Dict[str, ServiceConfig]
+    base_url: str,
+    parser: SimpleOpenAPIParser,
+    name: str,
+    schema_urls: Dict[str, ServiceConfig],
+    http_pool: Optional[HttpClientPool] = None,
 ) -> FastMCP:
     """
     Assemble a FastMCP instance from a custom parser by dynamically creating
     tools (handlers) based on API definitions.
+    When `http_pool` is given, handlers are async and share its connections.
+    Handlers and their input models are created lazily, see `LazyTool`.
     """
     prefix = sanitize_tool_name(name)
-    mcp = FastMCP(prefix)
     server_url = parser.get_server()
     base_url += server_url if "http" not in server_url else ""
+    tools: Dict[str, LazyTool] = {}
     for api in parser.apis():
         if 'No-API-Docs' in api.description or 'Private-API' in api.description:
             continue
         if 'constant' in api.path:
             continue
         tool_name = sanitize_tool_name(f"{prefix}_{api.operation_id}")
+        if tool_name in tools:
+            logger.warning(f"Tool already exists: {tool_name}")
+            continue
         description = f"{api.operation_id} {api.summary} {api.description}"
 
-        # Dynamically collect field definitions and build the InputModel
+        # Field definitions are plain data; the InputModel is only built on the tool's first call
         field_defs = extract_field_definitions(api)
-        InputModel = build_model(f"{tool_name}Input", field_defs)
-
-        # Create and register the handler for this API endpoint
-        handler = create_handler(api, InputModel, base_url, name, schema_urls)
-        handler.__name__ = f"{tool_name}_handler"
-        mcp.tool(name=tool_name, description=description)(handler)
-
-    return mcp
+        model_name = f"{tool_name}Input"
+        handler_name = f"{tool_name}_handler"
+
+        def build_handler(api=api, field_defs=field_defs, model_name=model_name, handler_name=handler_name):
+            InputModel = build_model(model_name, field_defs)
+            # Create the handler for this API endpoint
+            if http_pool is not None:
+                handler = create_async_handler(api, InputModel, base_url, name, schema_urls, http_pool)
+            else:
+                handler = create_handler(api, InputModel, base_url, name, schema_urls)
+            handler.__name__ = handler_name
+            return handler
+
+        tools[tool_name] = LazyTool(
+            name=tool_name,
+            description=description,
+            parameters=handler_parameters_schema(handler_name, model_name, field_defs),
+            is_async=http_pool is not None,
+            build_handler=build_handler,
+        )
+
+    return FastMCP(prefix, tools=list(tools.values()))
@@ -0,0 +1,76 @@
+import asyncio
+import importlib.util
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from loguru import logger
+
+from cuga.config import settings
+
+
+class HttpClientPool:
+    """
+    Shared httpx.AsyncClient instances, one per base URL, so OpenAPI tool handlers
+    reuse keep-alive connections instead of opening a new TCP/TLS connection per call.
+
+    Clients are bound to the event loop that created them, because the registry can run
+    tools both in its own loop and in per-app SSE server threads.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        connect_timeout: float = 10.0,
+        http2: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        # HTTP/2 needs the optional `h2` package
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._clients: Dict[Tuple[asyncio.AbstractEventLoop, str], httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_settings(cls) -> "HttpClientPool":
+        return cls(
+            max_connections=settings.registry.http_max_connections,
+            max_keepalive_connections=settings.registry.http_max_keepalive_connections,
+            keepalive_expiry=settings.registry.http_keepalive_expiry,
+            timeout=settings.registry.http_timeout,
+            connect_timeout=settings.registry.http_connect_timeout,
+            http2=settings.registry.http2,
+        )
+
+    @staticmethod
+    def _base_url(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """Return the pooled client for the base URL of `url` on the running event loop."""
+        key = (asyncio.get_running_loop(), self._base_url(url))
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            # Redirects are followed, as they were with requests (e.g. a trailing-slash 307)
+            client = httpx.AsyncClient(
+                limits=self.limits, timeout=self.timeout, http2=self.http2, follow_redirects=True
+            )
+            self._clients[key] = client
+            logger.debug(f"Created pooled HTTP client for {key[1]} (http2={self.http2})")
+        return client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.get_client(url).request(method, url, **kwargs)
+
+    async def aclose(self):
+        """Close the clients that belong to the running event loop."""
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self._clients if key[0] is loop]:
+            await self._clients.pop(key).aclose()
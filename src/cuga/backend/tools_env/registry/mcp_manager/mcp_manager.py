@@ -1,10 +1,10 @@
 import requests
 from typing import Dict, Any, List
 import json
-import aiohttp
-from cuga.config import PACKAGE_ROOT
+from cuga.config import PACKAGE_ROOT, settings
 import os
 import asyncio
+import traceback
 
 from mcp.types import TextContent
 
@@ -21,16 +21,24 @@ from cuga.backend.tools_env.registry.config.config_loader import Auth
 from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig, Service
 from cuga.backend.tools_env.registry.mcp_manager.openapi_parser import SimpleOpenAPIParser
 from cuga.backend.tools_env.registry.mcp_manager.adapter import new_mcp_from_custom_parser
+from cuga.backend.tools_env.registry.mcp_manager.http_pool import HttpClientPool
+from cuga.backend.tools_env.registry.mcp_manager.mcp_sessions import MCPSessionManager
+from cuga.backend.tools_env.registry.mcp_manager.spec_cache import CompiledSpec, SpecCache
+from cuga.backend.tools_env.registry.mcp_manager.startup_report import StartupReport
 import threading
 from collections import defaultdict
 from urllib.parse import urlparse
 from loguru import logger
 from cuga.backend.tools_env.registry.mcp_manager.openapi_parser_v0 import OpenAPITransformer
-from cuga.backend.tools_env.registry.mcp_manager.response_schema import extract_response_schema
+from cuga.backend.tools_env.registry.mcp_manager.response_schema import SpecIndex
 import yaml
 from cuga.backend.utils.consts import ServiceType, LOCAL_ORCHESTRATE_URL, LOCAL_TRM_URL
 
 
+class BootstrapTimeout(TimeoutError):
+    """The bootstrap of a service took longer than `registry.bootstrap_service_timeout`."""
+
+
 class MCPManager:
     def __init__(self, config: Dict[str, ServiceConfig]):
         self.schema_urls: Dict[str, ServiceConfig] = config
@@ -42,19 +50,40 @@ class MCPManager:
         self.auth_config = {}
         self.schemas = {}
         self.trm_tools = {}
+        # Prefixed TRM tool name -> (app name, tool), used to route calls to the right TRM tool
+        self.trm_tool_index: Dict[str, tuple] = {}
         self.mcp_clients = {}  # Store MCP client connections
         self.fastmcp_client = None  # FastMCP client for standard MCP servers
+        # Transformed API catalog per (app_name, include_response_schema), keyed by api_name
+        self._api_catalog: Dict[tuple, Dict[str, Any]] = {}
+        self.catalog_stats = {"hits": 0, "misses": 0}
+        # Keep-alive connections shared by all OpenAPI tool handlers
+        self.http_pool = HttpClientPool.from_settings()
+        # Long-lived client sessions of external MCP servers
+        self.mcp_sessions = MCPSessionManager.from_settings()
+        # Services are bootstrapped concurrently, each bounded by its own timeout
+        self.bootstrap_concurrency = settings.registry.bootstrap_max_concurrency
+        self.bootstrap_timeout = settings.registry.bootstrap_service_timeout
+        self.startup_report = StartupReport()
+        # Compiled OpenAPI specs persisted across restarts, with their cache key per app
+        self.spec_cache = SpecCache.from_settings()
+        self._compiled_specs: Dict[str, tuple] = {}
+        # Operation and `$ref` index per OpenAPI app, built once per loaded spec
+        self._spec_indexes: Dict[str, SpecIndex] = {}
+        # Configuration fingerprint of every successfully loaded service, compared on reload
+        self._service_fingerprints: Dict[str, str] = {}
+        self._reload_lock = asyncio.Lock()
+        # Close tasks of MCP sessions replaced by a reload
+        self._retiring_sessions = set()
 
     @staticmethod
-    def _get_response_schema_from_tool(
-        tool_dict: dict, openapi_spec: Dict[str, Any], prefix: str
-    ) -> Dict[str, Any]:
+    def _get_response_schema_from_tool(tool_dict: dict, spec_index: SpecIndex, prefix: str) -> Dict[str, Any]:
         """
-        Given a tool_dict and OpenAPI spec, extract and resolve the response schema.
+        Retrieves the response schema for a given tool definition using the OpenAPI spec.
 
         Args:
             tool_dict: Tool definition as provided to a language model
-            openapi_spec: OpenAPI specification as a dictionary
+            spec_index: Index of the OpenAPI specification the tool was generated from
 
         Returns:
                 Fully resolved response schema
@@ -70,7 +99,15 @@ class MCPManager:
             return tool_name
 
         operation_id = _extract_operation_id_from_tool(tool_dict['name'], prefix)
-        return extract_response_schema(openapi_spec, operation_id)
+        return spec_index.response_schema(operation_id)
+
+    def get_spec_index(self, app_name: str) -> SpecIndex:
+        """Return the operation and `$ref` index of an app's OpenAPI spec, building it on first use."""
+        spec_index = self._spec_indexes.get(app_name)
+        if spec_index is None or spec_index.spec is not self.schemas.get(app_name):
+            spec_index = SpecIndex(self.schemas.get(app_name) or {})
+            self._spec_indexes[app_name] = spec_index
+        return spec_index
 
     @staticmethod
     def _extract_base_url(full_url: str):
@@ -98,11 +135,17 @@ class MCPManager:
 
     @staticmethod
     def _fetch_and_parse_schema(url_or_path):
+        raw, ct, is_url = MCPManager._fetch_schema(url_or_path)
+        schema_data, parser = MCPManager._parse_schema(raw, ct)
+        return schema_data, parser, is_url
+
+    @staticmethod
+    def _fetch_schema(url_or_path, timeout=None):
         parsed = urlparse(url_or_path)
         is_url = parsed.scheme in ('http', 'https')
         if is_url:
             # Handle HTTP/HTTPS URLs
-            r = requests.get(url_or_path.split('&')[0])
+            r = requests.get(url_or_path.split('&')[0], timeout=timeout)
             r.raise_for_status()
             ct = r.headers.get("Content-Type", "").lower()
             raw = r.text
@@ -117,7 +160,10 @@ class MCPManager:
                 raw = f.read()
             # Determine content type from file extension
             ct = 'json' if file_path.lower().endswith('.json') else 'yaml'
+        return raw, ct, is_url
 
+    @staticmethod
+    def _parse_schema(raw, ct):
         # Parse based on content type
         if 'json' in ct:
             parser = SimpleOpenAPIParser.from_json(raw)
@@ -126,10 +172,10 @@ class MCPManager:
             parser = SimpleOpenAPIParser.from_yaml(raw)
             schema_data = yaml.safe_load(raw)
 
-        return schema_data, parser, is_url
+        return schema_data, parser
 
     def _create_mcp_server(self, base_url, parser, name):
-        return new_mcp_from_custom_parser(base_url, parser, name, self.schema_urls)
+        return new_mcp_from_custom_parser(base_url, parser, name, self.schema_urls, http_pool=self.http_pool)
 
     def _remove_parameter_from_body_schema(
         self, body_schema: Dict[str, Any], parameter_name: str
@@ -415,10 +461,18 @@ class MCPManager:
         return {"success": trm_output_schema, "failure": {"error": "string"}}
 
     async def _get_trm_tools(self, app_name: str, url: str, app_tools: List[str], auth: Auth):
-        tools = (requests.get(url + '/api/v1/tools/', headers={auth.type: auth.value})).json()
+        response = await self.http_pool.request(
+            "GET",
+            url + '/api/v1/tools/',
+            headers={auth.type: auth.value},
+            timeout=self.bootstrap_timeout,
+        )
+        response.raise_for_status()
+        tools = response.json()
         for tool in tools:
             if tool['name'] in app_tools:
-                self.trm_tools[app_name + '_' + tool['name']] = {
+                prefixed_name = app_name + '_' + tool['name']
+                self.trm_tools[prefixed_name] = {
                     "name": tool["name"],
                     "description": tool["description"],
                     "input_schema": tool["input_schema"],
@@ -426,27 +480,30 @@ class MCPManager:
                     "id": tool["id"],
                     "binding": tool['binding'],
                 }
+                self.trm_tool_index[prefixed_name] = (app_name, self.trm_tools[prefixed_name])
+
+    async def _call_trm_tool(self, app_name: str, tool: dict, args: dict):
+        auth = self.auth_config[app_name]
+        tool_type = next(iter(tool['binding']))
+        response = await self.http_pool.request(
+            "POST",
+            LOCAL_TRM_URL + f"/api/v1/runtime/tools/{tool['id']}/run?tool_type={tool_type}",
+            json={
+                "args": args,
+                "type": tool_type,
+                "function": f"{tool['binding'][tool_type]['function']}",
+            },
+            headers={auth.type: auth.value},
+        )
+        return [TextContent(text=response.json()['data']['tool_output'], type='text')]
 
     async def call_tool(self, tool_name: str, args: dict, headers: dict = None):
         if not headers:
             headers = {}
-        trm_tool = next((item for item in list(self.trm_tools.keys())), None)
+        trm_tool = self.trm_tool_index.get(tool_name)
         if trm_tool:
-            auth = self.auth_config[trm_tool.split("_")[0]]
-            tool = self.trm_tools[trm_tool]
-            tool_type = next(iter(tool['binding']))
-            response = (
-                requests.post(
-                    LOCAL_TRM_URL + f"/api/v1/runtime/tools/{tool['id']}/run?tool_type={tool_type}",
-                    json={
-                        "args": args,
-                        "type": tool_type,
-                        "function": f"{tool['binding'][tool_type]['function']}",
-                    },
-                    headers={auth.type: auth.value},
-                )
-            ).json()
-            return [TextContent(text=response['data']['tool_output'], type='text')]
+            app_name, tool = trm_tool
+            return await self._call_trm_tool(app_name, tool, args)
 
         server = self.server_by_tool.get(tool_name)
         if not args:
@@ -472,10 +529,62 @@ class MCPManager:
         tools = {app: self.get_apis_for_application(app, include_response_schema) for app in app_names}
         return tools
 
+    def invalidate_api_catalog(self, app_name: str = None):
+        """
+        Drop cached API catalogs so they are rebuilt from the current schemas.
+
+        Args:
+            app_name: Application whose catalog should be dropped, or None to drop all of them
+        """
+        if app_name is None:
+            self._api_catalog.clear()
+            self._spec_indexes.clear()
+            return
+        for key in [key for key in self._api_catalog if key[0] == app_name]:
+            del self._api_catalog[key]
+        # The app's schema was replaced, so its persisted catalogs no longer apply
+        self._compiled_specs.pop(app_name, None)
+        self._spec_indexes.pop(app_name, None)
+
+    def get_api_info(self, app_name: str, api_name: str) -> Dict[str, Any] | None:
+        """Return the catalog entry of a single API, or None if the app doesn't expose it."""
+        apis = self.get_apis_for_application(app_name)
+        if not isinstance(apis, dict):
+            return None
+        return apis.get(api_name)
+
     def get_apis_for_application(self, app_name, include_response_schema=False):
+        key = (app_name, bool(include_response_schema))
+        apis = self._api_catalog.get(key)
+        if apis is not None:
+            self.catalog_stats["hits"] += 1
+        else:
+            self.catalog_stats["misses"] += 1
+            apis = self._load_compiled_catalog(app_name, key[1])
+            if apis is None:
+                apis = self._build_apis_for_application(app_name, include_response_schema)
+                self._store_compiled_catalog(app_name, key[1], apis)
+            self._api_catalog[key] = apis
+        return apis
+
+    def _load_compiled_catalog(self, app_name: str, include_response_schema: bool):
+        if app_name not in self._compiled_specs:
+            return None
+        _, compiled = self._compiled_specs[app_name]
+        return compiled.catalogs.get(include_response_schema)
+
+    def _store_compiled_catalog(self, app_name: str, include_response_schema: bool, apis):
+        if app_name not in self._compiled_specs:
+            return
+        cache_key, compiled = self._compiled_specs[app_name]
+        compiled.catalogs[include_response_schema] = apis
+        # Runs in the request path, so the pickling is left to a worker thread
+        self.spec_cache.store_in_background(cache_key, compiled)
+
+    def _build_apis_for_application(self, app_name, include_response_schema=False):
         if "default" in app_name:
             return self.schemas[app_name]
-        is_trm_app = any(app_name in item for item in list(self.trm_tools.keys()))
+        is_trm_app = any(trm_app == app_name for trm_app, _ in self.trm_tool_index.values())
         if is_trm_app:
             result = {}
             for s in self.schemas[app_name]:
@@ -550,78 +659,89 @@ class MCPManager:
                 await self._fallback_mcp_connection(mcp_servers)
             return
 
-        try:
-            for name, config in mcp_servers:
-                try:
-                    transport = self._create_transport(name, config)
-                    if not transport:
-                        continue
+        for name, _ in mcp_servers:
+            self.startup_report.add(name, ServiceType.MCP_SERVER.value)
+        results = await asyncio.gather(
+            *(self._bootstrap(self._connect_mcp_server(name, config)) for name, config in mcp_servers),
+            return_exceptions=True,
+        )
+
+        # Register in configuration order so tool listings stay deterministic
+        failed = []
+        for (name, config), result in zip(mcp_servers, results):
+            if isinstance(result, BaseException):
+                print(f"Error connecting to MCP server {name}: {result}")
+                print(f"Traceback: {''.join(traceback.format_exception(result))}")
+                self.startup_report.fail(name, result)
+                failed.append((name, config))
+                continue
+            if result is None:
+                self.startup_report.fail(name, "no transport available")
+                continue
 
-                    client = FastMCPClient(transport)
+            transport, tools = result
+            with self.startup_report.phase(name, "register"):
+                self.schemas[name] = {
+                    "tools": [
+                        {
+                            "name": tool.name,
+                            "description": tool.description,
+                            "inputSchema": tool.inputSchema if hasattr(tool, 'inputSchema') else {},
+                            "outputSchema": tool.outputSchema if hasattr(tool, 'outputSchema') else {},
+                        }
+                        for tool in tools
+                    ]
+                }
 
-                    logger.info(f"Fetching tools from {name}...")
+                for tool in tools:
+                    prefixed_name = f"{name}_{tool.name}"
 
-                    # Add timeout for tool fetching
-                    async def fetch_tools():
-                        async with client:
-                            return await client.list_tools()
+                    input_schema = tool.inputSchema if hasattr(tool, 'inputSchema') else {}
+                    flattened_params = self._flatten_tool_parameters(input_schema)
 
-                    try:
-                        tools = await asyncio.wait_for(fetch_tools(), timeout=15.0)
-                        logger.info(
-                            f"Retrieved {len(tools)} tools from {name}: {[tool.name for tool in tools]}"
-                        )
-                    except asyncio.TimeoutError:
-                        print(f"Timeout fetching tools from {name} after 15 seconds")
-                        raise
-
-                    self.schemas[name] = {
-                        "tools": [
-                            {
-                                "name": tool.name,
-                                "description": tool.description,
-                                "inputSchema": tool.inputSchema if hasattr(tool, 'inputSchema') else {},
-                                "outputSchema": tool.outputSchema if hasattr(tool, 'outputSchema') else {},
-                            }
-                            for tool in tools
-                        ]
+                    tool_dict = {
+                        "type": "function",
+                        "function": {
+                            "name": prefixed_name,
+                            "description": tool.description,
+                            "parameters": flattened_params,
+                        },
                     }
+                    self.tools_by_server[name].append(tool_dict)
+                    self.server_by_tool[prefixed_name] = name
 
-                    for tool in tools:
-                        prefixed_name = f"{name}_{tool.name}"
-
-                        input_schema = tool.inputSchema if hasattr(tool, 'inputSchema') else {}
-                        flattened_params = self._flatten_tool_parameters(input_schema)
+            print(f"✓ Connected to MCP server '{name}' with {len(tools)} tools")
+            self.startup_report.succeed(name, len(tools))
+            self.mcp_clients[name] = config.url or config.command
 
-                        tool_dict = {
-                            "type": "function",
-                            "function": {
-                                "name": prefixed_name,
-                                "description": tool.description,
-                                "parameters": flattened_params,
-                            },
-                        }
-                        self.tools_by_server[name].append(tool_dict)
-                        self.server_by_tool[prefixed_name] = name
+            if not hasattr(self, 'mcp_transports'):
+                self.mcp_transports = {}
+            self.mcp_transports[name] = transport
 
-                    print(f"✓ Connected to MCP server '{name}' with {len(tools)} tools")
-                    self.mcp_clients[name] = config.url or config.command
+        if failed:
+            print("Falling back to mock implementation")
+            await self._fallback_mcp_connection(failed)
 
-                    if not hasattr(self, 'mcp_transports'):
-                        self.mcp_transports = {}
-                    self.mcp_transports[name] = transport
+        self.mcp_sessions.start_health_checks()
 
-                except Exception as e:
-                    print(f"Error connecting to MCP server {name}: {e}")
-                    import traceback
+    async def _connect_mcp_server(self, name: str, config: ServiceConfig):
+        """Open the long-lived session of one MCP server and list its tools."""
+        transport = self._create_transport(name, config)
+        if not transport:
+            return None
 
-                    print(f"Traceback: {traceback.format_exc()}")
-                    raise
+        # The session stays connected after listing and is reused by every call
+        session = self.mcp_sessions.add(name, transport)
 
-        except Exception as e:
-            print(f"Error initializing MCP servers: {e}")
-            print("Falling back to mock implementation")
-            await self._fallback_mcp_connection(mcp_servers)
+        logger.info(f"Fetching tools from {name}...")
+        try:
+            with self.startup_report.phase(name, "connect"):
+                tools = await session.list_tools()
+        except (Exception, asyncio.CancelledError):
+            await self.mcp_sessions.remove(name)
+            raise
+        logger.info(f"Retrieved {len(tools)} tools from {name}: {[tool.name for tool in tools]}")
+        return transport, tools
 
     def _create_transport(self, name: str, config: ServiceConfig):
         """Create appropriate transport based on configuration"""
@@ -830,31 +950,27 @@ class MCPManager:
     async def _call_mcp_server_tool(self, server_name: str, tool_name: str, args: dict):
         """Call a tool on an external MCP server using FastMCP client with SSE transport"""
         try:
-            if hasattr(self, 'mcp_transports') and server_name in self.mcp_transports:
+            session = self.mcp_sessions.get(server_name)
+            if session:
                 original_tool_name = tool_name.replace(f"{server_name}_", "")
 
-                transport = self.mcp_transports[server_name]
-                client = FastMCPClient(transport)
-
-                async with client:
-                    result = await client.call_tool(original_tool_name, args)
-                    result_text = result.content[0].text if result.content else str(result)
-                    return [TextContent(text=result_text, type='text')]
+                result = await session.call_tool(original_tool_name, args)
+                result_text = result.content[0].text if result.content else str(result)
+                return [TextContent(text=result_text, type='text')]
             else:
                 url = self.mcp_clients[server_name]
                 base_url = url.replace('/sse', '')
                 original_tool_name = tool_name.replace(f"{server_name}_", "")
 
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"{base_url}/call_tool", json={"name": original_tool_name, "arguments": args}
-                    ) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            return [TextContent(text=str(result), type='text')]
-                        else:
-                            error_msg = f"MCP server call failed with status {response.status}"
-                            return [TextContent(text=error_msg, type='text')]
+                async with self.mcp_sessions.get_http_session().post(
+                    f"{base_url}/call_tool", json={"name": original_tool_name, "arguments": args}
+                ) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        return [TextContent(text=str(result), type='text')]
+                    else:
+                        error_msg = f"MCP server call failed with status {response.status}"
+                        return [TextContent(text=error_msg, type='text')]
 
         except Exception as e:
             error_msg = f"Error calling MCP server tool: {e}"
@@ -878,18 +994,205 @@ class MCPManager:
                 }
             elif config.type == ServiceType.MCP_SERVER:
                 mcp_servers.append((name, config))
-        if openapi and len(openapi) > 0:
+
+        # Taken before bootstrapping, which rewrites the url of OpenAPI services
+        fingerprints = {name: self._service_fingerprint(config) for name, config in self.schema_urls.items()}
+        self.startup_report = StartupReport()
+        self._bootstrap_semaphore = asyncio.Semaphore(self.bootstrap_concurrency)
+
+        async def start_openapi_servers():
             await self.initialize_servers(openapi)
             await self.run_all_servers()
 
+        # All service kinds bootstrap side by side, bounded by one concurrency limit
+        steps = [self._initialize_trm_services(trm, trm_urls)]
+        if openapi and len(openapi) > 0:
+            steps.append(start_openapi_servers())
+
         # Initialize FastMCP client for all MCP servers
         if mcp_servers:
-            await self._initialize_fastmcp_client(mcp_servers)
+            steps.append(self._initialize_fastmcp_client(mcp_servers))
 
-        if len(trm_urls) > 0:
-            for name, data in trm_urls.items():
-                await self._get_trm_tools(name, data["url"], data["tools"], data["auth"])
-        self.add_trm_tools(trm)
+        await asyncio.gather(*steps)
+        self.invalidate_api_catalog()
+        # Failed services are left out, so the next reload retries them
+        self._service_fingerprints = {
+            name: fingerprint
+            for name, fingerprint in fingerprints.items()
+            if self.startup_report.services.get(name, {}).get("status") == "ok"
+        }
+
+        self.startup_report.finish()
+        self.startup_report.log()
+
+    @staticmethod
+    def _service_fingerprint(config: ServiceConfig) -> str:
+        return json.dumps(config.model_dump(mode="json"), sort_keys=True, default=str)
+
+    def diff_services(self, config: Dict[str, ServiceConfig]) -> Dict[str, List[str]]:
+        """
+        Compare a service configuration with the running one.
+
+        Returns:
+            Service names that are added (including ones that failed to load before),
+            changed, removed and unchanged
+        """
+        diff = {"added": [], "changed": [], "removed": [], "unchanged": []}
+        for name, service in config.items():
+            fingerprint = self._service_fingerprints.get(name)
+            if fingerprint is None:
+                diff["added"].append(name)
+            elif fingerprint != self._service_fingerprint(service):
+                diff["changed"].append(name)
+            else:
+                diff["unchanged"].append(name)
+        diff["removed"] = [name for name in self.schema_urls if name not in config]
+        return diff
+
+    async def reload(self, config: Dict[str, ServiceConfig]) -> Dict[str, Any]:
+        """
+        Apply a new service configuration without a cold start.
+
+        Added and changed services are bootstrapped on a staging manager while the current
+        tools keep serving. Their tool tables are then swapped in, and removed services
+        dropped, in one step without awaiting, so a call sees either the old or the new
+        tables. A changed service that fails to build keeps its previous version. Replaced
+        MCP sessions are closed once their in-flight calls finish; SSE servers already
+        started for replaced or removed apps keep running until the registry restarts.
+
+        Args:
+            config: The new services, as returned by `load_service_configs`
+
+        Returns:
+            The service diff, the services that failed to build and the staging startup report
+        """
+        async with self._reload_lock:
+            diff = self.diff_services(config)
+            staging = MCPManager(config={name: config[name] for name in diff["added"] + diff["changed"]})
+            # Handlers built on the staging manager must use the pool that outlives it
+            staging.http_pool = self.http_pool
+            staging.spec_cache = self.spec_cache
+            if staging.schema_urls:
+                await staging.load_tools()
+            built = [name for name in staging.schema_urls if name in staging._service_fingerprints]
+
+            retired = [self._detach_service(name) for name in diff["removed"] + built]
+            for name in built:
+                self._adopt_service(staging, name)
+
+            for session in retired:
+                if session is not None:
+                    task = asyncio.create_task(session.close_when_idle(self.mcp_sessions.call_timeout))
+                    self._retiring_sessions.add(task)
+                    task.add_done_callback(self._retiring_sessions.discard)
+            await staging.mcp_sessions.close()
+            self.mcp_sessions.start_health_checks()
+
+        failed = [name for name in staging.schema_urls if name not in built]
+        logger.info(
+            f"Registry reload: added={diff['added']} changed={diff['changed']} "
+            f"removed={diff['removed']} failed={failed}"
+        )
+        return {**diff, "failed": failed, "report": staging.startup_report.as_dict()}
+
+    def _detach_service(self, name: str):
+        """Drop every table entry of a service. Returns its MCP session, which is left open."""
+        self.schema_urls.pop(name, None)
+        server = self.servers.pop(name, None)
+        server_name = server.name if server is not None else name
+        self.tools_by_server.pop(server_name, None)
+        self.tools_by_server.pop(name, None)
+        for tool_name in [t for t, owner in self.server_by_tool.items() if owner is server or owner == name]:
+            del self.server_by_tool[tool_name]
+        for tool_name in [t for t, (app_name, _) in self.trm_tool_index.items() if app_name == name]:
+            del self.trm_tool_index[tool_name]
+            self.trm_tools.pop(tool_name, None)
+        for table in (self.schemas, self.auth_config, self.mcp_clients, getattr(self, 'mcp_transports', {})):
+            table.pop(name, None)
+        self.server_ports.pop(name, None)
+        self.threads.pop(name, None)
+        self._service_fingerprints.pop(name, None)
+        self.invalidate_api_catalog(name)
+        return self.mcp_sessions.detach(name)
+
+    def _adopt_service(self, staging: "MCPManager", name: str):
+        """Move the tables of a service built on a staging manager into this one."""
+        self.schema_urls[name] = staging.schema_urls[name]
+        server = staging.servers.get(name)
+        server_name = server.name if server is not None else name
+        if server is not None:
+            self.servers[name] = server
+        if server_name in staging.tools_by_server:
+            self.tools_by_server[server_name] = staging.tools_by_server[server_name]
+        for tool_name, owner in staging.server_by_tool.items():
+            if owner is server or owner == name:
+                self.server_by_tool[tool_name] = owner
+        for tool_name, (app_name, tool) in staging.trm_tool_index.items():
+            if app_name == name:
+                self.trm_tool_index[tool_name] = (app_name, tool)
+                self.trm_tools[tool_name] = tool
+        for table in (
+            "schemas",
+            "auth_config",
+            "mcp_clients",
+            "mcp_transports",
+            "_compiled_specs",
+            "threads",
+            "server_ports",
+        ):
+            if name in getattr(staging, table, {}):
+                if not hasattr(self, table):
+                    setattr(self, table, {})
+                getattr(self, table)[name] = getattr(staging, table)[name]
+        self._service_fingerprints[name] = staging._service_fingerprints[name]
+        session = staging.mcp_sessions.detach(name)
+        if session is not None:
+            self.mcp_sessions.adopt(session)
+
+    def _get_bootstrap_semaphore(self) -> asyncio.Semaphore:
+        if getattr(self, '_bootstrap_semaphore', None) is None:
+            self._bootstrap_semaphore = asyncio.Semaphore(self.bootstrap_concurrency)
+        return self._bootstrap_semaphore
+
+    async def _bootstrap(self, step):
+        """Run the bootstrap step of one service under the concurrency limit and per-service timeout."""
+        async with self._get_bootstrap_semaphore():
+            try:
+                return await asyncio.wait_for(step, timeout=self.bootstrap_timeout)
+            except asyncio.TimeoutError:
+                raise BootstrapTimeout(f"timed out after {self.bootstrap_timeout}s") from None
+
+    async def _bootstrap_in_thread(self, func, *args):
+        """
+        Like `_bootstrap`, for a blocking step run in a worker thread as `func(*args, cancelled)`.
+
+        A thread can't be interrupted, so on timeout `cancelled` is set for func to stop at its
+        next check, and the thread keeps its concurrency slot until it has actually returned.
+        """
+        semaphore = self._get_bootstrap_semaphore()
+        await semaphore.acquire()
+        cancelled = threading.Event()
+        future = asyncio.ensure_future(asyncio.to_thread(func, *args, cancelled))
+
+        def finished(done: asyncio.Future):
+            semaphore.release()
+            if not done.cancelled():
+                # Retrieved here, as nobody awaits the result of a thread that timed out
+                done.exception()
+
+        future.add_done_callback(finished)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.bootstrap_timeout)
+        except asyncio.TimeoutError:
+            raise BootstrapTimeout(f"timed out after {self.bootstrap_timeout}s") from None
+        finally:
+            if not future.done():
+                cancelled.set()
+
+    async def aclose(self):
+        """Release pooled connections and MCP server sessions."""
+        await self.mcp_sessions.close()
+        await self.http_pool.aclose()
 
     def add_trm_tools(self, services: List[Service]):
         for name, config in services:
@@ -900,43 +1203,128 @@ class MCPManager:
                 schemas.append(schema_data)
             self.schemas[name] = schemas
 
-    async def initialize_servers(self, services: List[Service]):
-        for name, config in services:
-            try:
-                schema_data, parser, is_url = self._fetch_and_parse_schema(config.url)
-                if not is_url:
-                    # this is a path
-                    config.url = schema_data['servers'][0]['url']
+    async def _initialize_trm_services(self, services: List[Service], trm_urls: Dict[str, dict]):
+        async def fetch_tools(name):
+            data = trm_urls[name]
+            with self.startup_report.phase(name, "fetch"):
+                await self._get_trm_tools(name, data["url"], data["tools"], data["auth"])
 
-                # Apply filtering and overrides
-                modified_schema = self._filter_and_override_schema(schema_data, config)
+        for name, _ in services:
+            self.startup_report.add(name, ServiceType.TRM.value)
+        results = await asyncio.gather(
+            *(self._bootstrap(fetch_tools(name)) for name, _ in services), return_exceptions=True
+        )
+
+        loaded = []
+        for (name, config), result in zip(services, results):
+            if isinstance(result, BaseException):
+                print(f"Failed to load tools of TRM service {name}: {result}")
+                self.startup_report.fail(name, result)
+            else:
+                loaded.append((name, config))
+                self.startup_report.succeed(name, len(config.tools))
+        self.add_trm_tools(loaded)
 
+    async def initialize_servers(self, services: List[Service]):
+        # Each worker thread records its phases apart, so one that timed out leaves no trace
+        reports = {}
+        for name, _ in services:
+            self.startup_report.add(name, ServiceType.OPENAPI.value)
+            reports[name] = StartupReport()
+        results = await asyncio.gather(
+            *(
+                self._bootstrap_in_thread(self._prepare_server, name, config, reports[name])
+                for name, config in services
+            ),
+            return_exceptions=True,
+        )
+
+        # Register in configuration order so tool listings stay deterministic
+        for (name, config), result in zip(services, results):
+            if not isinstance(result, BootstrapTimeout):
+                self.startup_report.merge(reports[name])
+            try:
+                if isinstance(result, BaseException):
+                    raise result
+                url, modified_schema, mcp_server, compiled = result
+                config.url = url
+                if compiled:
+                    self._compiled_specs[name] = compiled
                 self.schemas[name] = modified_schema
                 self.auth_config[name] = config.auth
-                base_url = self._extract_base_url(config.url)
-
-                # Create parser from modified schema
-                has_body_overrides = any(
-                    override.drop_request_body_parameters for override in (config.api_overrides or [])
-                )
-                has_query_overrides = any(
-                    override.drop_query_parameters for override in (config.api_overrides or [])
-                )
-
-                if config.include or config.api_overrides or has_body_overrides or has_query_overrides:
-                    # Re-create parser with modified schema
-                    schema_json = (
-                        yaml.dump(modified_schema)
-                        if isinstance(modified_schema, dict)
-                        else str(modified_schema)
-                    )
-                    parser = SimpleOpenAPIParser.from_yaml(schema_json)
-                mcp_server = self._create_mcp_server(base_url, parser, name)
                 self.servers[name] = mcp_server
-                await self._register_tools(mcp_server)
+                with self.startup_report.phase(name, "register"):
+                    await self._register_tools(mcp_server)
+                self.startup_report.succeed(name, len(self.tools_by_server[mcp_server.name]))
             except Exception as e:
+                self.startup_report.fail(name, e)
                 print(f"Failed to initialize server for {config.url}: {e}")
 
+    def _prepare_server(
+        self, name: str, config: ServiceConfig, report: StartupReport, cancelled: threading.Event
+    ):
+        """
+        Fetch, parse and build the MCP server of one OpenAPI service. Runs in a worker
+        thread and only writes to its own report, and it stops before caching or building
+        anything once its bootstrap timed out (`cancelled`), so a timed out service has no effect.
+        """
+        with report.phase(name, "fetch"):
+            raw, ct, is_url = self._fetch_schema(config.url, timeout=self.bootstrap_timeout)
+        self._stop_if_cancelled(cancelled)
+
+        cache_key = self.spec_cache.key(name, raw, config) if self.spec_cache else None
+        compiled = self.spec_cache.load(cache_key) if cache_key else None
+        if compiled:
+            report.note(name, spec_cache="hit")
+            parser = compiled.parser()
+            modified_schema = compiled.schema_data
+        else:
+            modified_schema, parser = self._compile_schema(name, raw, ct, config, report)
+            self._stop_if_cancelled(cancelled)
+            if cache_key:
+                report.note(name, spec_cache="miss")
+                compiled = CompiledSpec(
+                    schema_data=modified_schema, document=parser.document, apis=parser.apis()
+                )
+                self.spec_cache.store(cache_key, compiled)
+        # A local spec file points at its backend through `servers`
+        url = config.url if is_url else modified_schema['servers'][0]['url']
+
+        self._stop_if_cancelled(cancelled)
+        with report.phase(name, "build"):
+            mcp_server = self._create_mcp_server(self._extract_base_url(url), parser, name)
+        return url, modified_schema, mcp_server, (cache_key, compiled) if compiled else None
+
+    @staticmethod
+    def _stop_if_cancelled(cancelled: threading.Event):
+        if cancelled.is_set():
+            raise BootstrapTimeout("stopped after the bootstrap timed out")
+
+    def _compile_schema(self, name: str, raw: str, ct: str, config: ServiceConfig, report: StartupReport):
+        """Parse a raw spec, apply the configured filtering and overrides and parse its endpoints."""
+        with report.phase(name, "parse"):
+            schema_data, parser = self._parse_schema(raw, ct)
+
+            # Apply filtering and overrides
+            modified_schema = self._filter_and_override_schema(schema_data, config)
+
+            # Create parser from modified schema
+            has_body_overrides = any(
+                override.drop_request_body_parameters for override in (config.api_overrides or [])
+            )
+            has_query_overrides = any(
+                override.drop_query_parameters for override in (config.api_overrides or [])
+            )
+
+            if config.include or config.api_overrides or has_body_overrides or has_query_overrides:
+                # Re-create parser with modified schema
+                schema_json = (
+                    yaml.dump(modified_schema) if isinstance(modified_schema, dict) else str(modified_schema)
+                )
+                parser = SimpleOpenAPIParser.from_yaml(schema_json)
+            parser.apis()
+        return modified_schema, parser
+
     async def _register_tools(self, mcp_server):
         response = await mcp_server.list_tools()
         for tool in response:
@@ -952,11 +1340,27 @@ class MCPManager:
             self.server_by_tool[tool.name] = mcp_server
 
     async def run_all_servers(self):
-        for name, server in self.servers.items():
-            port = self._get_free_port()
-            self.server_ports[server.name] = port
-            server.settings.port = port
-            thread = threading.Thread(target=server.run, kwargs={"transport": "sse"}, daemon=True)
-            thread.start()
-            self.threads[name] = thread
-            print(f"Started MCP SSE server for {name} on port {port}")
+        """
+        Tools of OpenAPI apps are dispatched in-process through `call_tool`, so no server
+        is started by default. Apps listed in `registry.sse_apps` ("*" for all) are also
+        exposed over SSE, each on its own thread and free port.
+        """
+        sse_apps = settings.registry.sse_apps or []
+        for name in self.servers:
+            if "*" in sse_apps or name in sse_apps:
+                self.start_sse_server(name)
+
+    def start_sse_server(self, name: str) -> int:
+        """Expose the in-process MCP server of an app over SSE and return its port."""
+        # Keyed by app name, like threads (the server's own name is sanitized)
+        if name in self.server_ports:
+            return self.server_ports[name]
+        server = self.servers[name]
+        port = self._get_free_port()
+        self.server_ports[name] = port
+        server.settings.port = port
+        thread = threading.Thread(target=server.run, kwargs={"transport": "sse"}, daemon=True)
+        thread.start()
+        self.threads[name] = thread
+        print(f"Started MCP SSE server for {name} on port {port}")
+        return port
@@ -0,0 +1,196 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+import aiohttp
+import anyio
+from loguru import logger
+
+from cuga.config import settings
+
+try:
+    from fastmcp import Client as FastMCPClient
+except ImportError:
+    FastMCPClient = None
+
+# Raised when a request is written to a connection whose streams are already closed
+UNSENT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+
+class MCPClientSession:
+    """
+    A long-lived FastMCP client connection to one configured MCP server.
+
+    The connection is opened once and reused by every call, instead of re-running the
+    stdio spawn / SSE / streamable-HTTP handshake per call. Concurrent in-flight calls
+    are capped, and a dead connection is re-established transparently.
+    """
+
+    def __init__(self, name: str, transport, max_concurrent_calls: int = 16, call_timeout: float = 60.0):
+        self.name = name
+        self.client = FastMCPClient(transport)
+        self.max_concurrent_calls = max_concurrent_calls
+        self.call_timeout = call_timeout
+        self.reconnects = 0
+        self._connect_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrent_calls)
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client.is_connected()
+
+    async def connect(self):
+        async with self._connect_lock:
+            if not self.client.is_connected():
+                await self.client.__aenter__()
+                logger.debug(f"MCP session '{self.name}' connected")
+
+    async def _close_client(self):
+        try:
+            await self.client.close()
+        except Exception as e:
+            logger.warning(f"Error closing MCP session '{self.name}': {e}")
+
+    async def disconnect(self):
+        async with self._connect_lock:
+            await self._close_client()
+
+    async def close_when_idle(self, timeout: float):
+        """
+        Disconnect once the calls in flight have finished, waiting at most `timeout` seconds.
+        Used for sessions that were replaced, so their last calls still get an answer.
+        """
+
+        async def drain():
+            # Holding every slot means no call is running; queued calls are served first
+            for _ in range(self.max_concurrent_calls):
+                await self._semaphore.acquire()
+
+        try:
+            await asyncio.wait_for(drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"MCP session '{self.name}' still busy after {timeout}s, closing it anyway")
+        await self.disconnect()
+
+    async def reconnect(self, seen_reconnects: Optional[int] = None):
+        """
+        Drop and re-open the connection. When `seen_reconnects` is given and another caller
+        already reconnected since then, the fresh connection is reused instead.
+        """
+        async with self._connect_lock:
+            if seen_reconnects is not None and seen_reconnects != self.reconnects:
+                return
+            await self._close_client()
+            await self.client.__aenter__()
+            self.reconnects += 1
+        logger.info(f"MCP session '{self.name}' reconnected (total reconnects: {self.reconnects})")
+
+    async def is_healthy(self, timeout: float = 5.0) -> bool:
+        if not self.client.is_connected():
+            return False
+        try:
+            return await asyncio.wait_for(self.client.ping(), timeout=timeout)
+        except Exception:
+            return False
+
+    async def check_health(self):
+        """Ping the server and reconnect if the connection is gone."""
+        if not await self.is_healthy():
+            logger.warning(f"MCP session '{self.name}' is unhealthy, reconnecting")
+            await self.reconnect()
+
+    async def list_tools(self):
+        await self.connect()
+        return await self.client.list_tools()
+
+    async def call_tool(self, tool_name: str, args: dict):
+        async with self._semaphore:
+            await self.connect()
+            seen_reconnects = self.reconnects
+            try:
+                return await asyncio.wait_for(self.client.call_tool(tool_name, args), self.call_timeout)
+            except UNSENT_ERRORS as e:
+                # The request could not be written, so the tool did not run: safe to send it again.
+                # Anything else (a timeout, a connection lost while waiting for the answer) may
+                # come after the tool ran, and is surfaced rather than risk running it twice.
+                logger.warning(f"MCP session '{self.name}' lost before '{tool_name}' was sent: {e!r}")
+            await self.reconnect(seen_reconnects)
+            return await asyncio.wait_for(self.client.call_tool(tool_name, args), self.call_timeout)
+
+
+class MCPSessionManager:
+    """Owns the long-lived sessions of all configured MCP servers."""
+
+    def __init__(
+        self,
+        max_concurrent_calls: int = 16,
+        call_timeout: float = 60.0,
+        health_check_interval: float = 30.0,
+    ):
+        self.max_concurrent_calls = max_concurrent_calls
+        self.call_timeout = call_timeout
+        self.health_check_interval = health_check_interval
+        self.sessions: Dict[str, MCPClientSession] = {}
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(cls) -> "MCPSessionManager":
+        return cls(
+            max_concurrent_calls=settings.registry.mcp_max_concurrent_calls,
+            call_timeout=settings.registry.mcp_call_timeout,
+            health_check_interval=settings.registry.mcp_health_check_interval,
+        )
+
+    def add(self, name: str, transport) -> MCPClientSession:
+        session = MCPClientSession(
+            name, transport, max_concurrent_calls=self.max_concurrent_calls, call_timeout=self.call_timeout
+        )
+        self.sessions[name] = session
+        return session
+
+    def get(self, name: str) -> Optional[MCPClientSession]:
+        return self.sessions.get(name)
+
+    def adopt(self, session: MCPClientSession):
+        """Take over a session opened by another manager."""
+        self.sessions[session.name] = session
+
+    def detach(self, name: str) -> Optional[MCPClientSession]:
+        """Stop managing a session without closing it."""
+        return self.sessions.pop(name, None)
+
+    async def remove(self, name: str):
+        session = self.sessions.pop(name, None)
+        if session:
+            await session.disconnect()
+
+    async def call_tool(self, server_name: str, tool_name: str, args: dict) -> Any:
+        return await self.sessions[server_name].call_tool(tool_name, args)
+
+    def get_http_session(self) -> aiohttp.ClientSession:
+        """Shared aiohttp session for MCP servers reached through the plain HTTP fallback."""
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession()
+        return self._http_session
+
+    def start_health_checks(self):
+        if self._health_task is None and self.sessions and self.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_check_loop())
+
+    async def _health_check_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for session in list(self.sessions.values()):
+                try:
+                    await session.check_health()
+                except Exception as e:
+                    logger.error(f"Health check failed for MCP session '{session.name}': {e}")
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        for name in list(self.sessions):
+            await self.remove(name)
+        if self._http_session and not self._http_session.closed:
+            await self._http_session.close()
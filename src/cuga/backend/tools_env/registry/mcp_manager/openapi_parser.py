@@ -72,8 +72,10 @@ def is_http_method(method):
 
 
 class SimpleOpenAPIParser:
-    def __init__(self, document):
+    def __init__(self, document, apis: Optional[List[APIEndpoint]] = None):
         self.document = document
+        # Parsed endpoints, computed on first use or handed over from the spec cache
+        self._apis = apis
 
     @staticmethod
     def from_json(data):
@@ -109,6 +111,11 @@ class SimpleOpenAPIParser:
         )
 
     def apis(self):
+        if self._apis is None:
+            self._apis = self._parse_apis()
+        return self._apis
+
+    def _parse_apis(self):
         result = []
         paths = self.document.get("paths", {})
         for path, methods in paths.items():
@@ -27,6 +27,10 @@ class OpenAPITransformer:
         self.filter_patterns = (
             filter_patterns if filter_patterns is not None else ["No-API-Docs", "Private-API"]
         )
+        # Resolved `$ref` targets, and simplified response shapes keyed by schema object identity.
+        # Shared components are simplified once per spec instead of once per operation.
+        self._resolved_refs = {}
+        self._simplified_schemas = {}
 
     def _summarize_param_schema(self, schema_obj):
         """
@@ -113,6 +117,14 @@ class OpenAPITransformer:
         return None
 
     def _resolve_ref(self, ref_obj):
+        if isinstance(ref_obj, dict) and '$ref' in ref_obj:
+            ref_path_str = ref_obj['$ref']
+            if ref_path_str not in self._resolved_refs:
+                self._resolved_refs[ref_path_str] = self._follow_ref(ref_obj)
+            return self._resolved_refs[ref_path_str]
+        return ref_obj
+
+    def _follow_ref(self, ref_obj):
         current_obj = ref_obj
         visited_refs = set()
 
@@ -313,6 +325,25 @@ class OpenAPITransformer:
         if not isinstance(resolved_schema, dict):
             return "error_resolving_schema"
 
+        key = id(resolved_schema)
+        cached = self._simplified_schemas.get(key)
+        if cached is not None:
+            # The schema object is kept alongside its result so its id can't be reused
+            _, simplified = cached
+            if simplified is None:
+                return {"type": "circular_ref", "error": "Circular reference detected"}
+            return simplified
+
+        self._simplified_schemas[key] = (resolved_schema, None)
+        try:
+            simplified = self._simplify_resolved_schema(resolved_schema)
+        except BaseException:
+            del self._simplified_schemas[key]
+            raise
+        self._simplified_schemas[key] = (resolved_schema, simplified)
+        return simplified
+
+    def _simplify_resolved_schema(self, resolved_schema):
         # Unwrap unions
         variant = self._select_variant(resolved_schema)
         if isinstance(variant, dict):
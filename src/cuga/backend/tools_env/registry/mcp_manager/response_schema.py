@@ -1,6 +1,6 @@
 import json
 import yaml
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
 import requests
 
 
@@ -86,6 +86,167 @@ def fetch_openapi_spec(url: str) -> Dict[str, Any]:
         return {}
 
 
+HTTP_METHODS = ('get', 'post', 'put', 'delete', 'patch', 'options', 'head')
+
+
+class SpecIndex:
+    """
+    Lookup structures of one OpenAPI specification, built once and reused for every operation.
+
+    Operations are indexed by operationId and each `$ref` is resolved at most once. A schema
+    that refers back to itself keeps the recursive `$ref` in place of its expansion.
+    Resolved schemas are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, openapi_spec: Dict[str, Any]):
+        self.spec = openapi_spec or {}
+        version = str(self.spec.get('openapi') or self.spec.get('swagger') or '')
+        self.is_openapi3 = 'openapi' in self.spec and version.startswith('3')
+        self.is_swagger2 = not self.is_openapi3 and 'swagger' in self.spec and version.startswith('2')
+        # operationId -> (path, method, operation); OpenAPI 3 ids are matched case-insensitively
+        self.operations: Dict[str, Tuple[str, str, Dict[str, Any]]] = {}
+        self._refs: Dict[str, Dict[str, Any]] = {}
+        self._resolving: Set[str] = set()
+        self._response_schemas: Dict[str, Dict[str, Any]] = {}
+        self._build_operations()
+
+    def _build_operations(self):
+        if not (self.is_openapi3 or self.is_swagger2):
+            return
+        for path, path_item in (self.spec.get('paths') or {}).items():
+            if not isinstance(path_item, dict):
+                continue
+            for method, operation in path_item.items():
+                if method not in HTTP_METHODS or not isinstance(operation, dict):
+                    continue
+                operation_id = operation.get('operationId')
+                if not operation_id:
+                    continue
+                key = self._operation_key(operation_id)
+                # Keep the first match, like a scan over the paths would
+                self.operations.setdefault(key, (path, method, operation))
+
+    def _operation_key(self, operation_id: str) -> str:
+        return operation_id.lower() if self.is_openapi3 else operation_id
+
+    def get_operation(self, operation_id: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        return self.operations.get(self._operation_key(operation_id))
+
+    def _lookup_ref(self, ref: str) -> Dict[str, Any]:
+        if not ref.startswith('#/'):
+            print(f"External references not supported: {ref}")
+            return {}
+
+        current = self.spec
+        for part in ref[2:].split('/'):
+            if not isinstance(current, dict) or part not in current:
+                print(f"Reference part '{part}' not found in schema")
+                return {}
+            current = current[part]
+        return current
+
+    def resolve_ref(self, ref: str) -> Dict[str, Any]:
+        """Return the fully resolved schema a `$ref` points to."""
+        if ref in self._refs:
+            return self._refs[ref]
+        if ref in self._resolving:
+            # Recursive schema: stop expanding here and keep the reference
+            return {'$ref': ref}
+
+        self._resolving.add(ref)
+        try:
+            resolved = self.resolve_schema(self._lookup_ref(ref))
+        finally:
+            self._resolving.discard(ref)
+        self._refs[ref] = resolved
+        return resolved
+
+    def resolve_schema(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of `schema` with all references resolved."""
+        if not schema or not isinstance(schema, dict):
+            return {}
+
+        if '$ref' in schema:
+            ref_schema = self.resolve_ref(schema['$ref'])
+            siblings = {key: value for key, value in schema.items() if key != '$ref'}
+            if not siblings:
+                return ref_schema
+            resolved_schema = self._resolve_nested(siblings)
+            # The referenced schema wins over keys set next to the reference
+            resolved_schema.update(ref_schema)
+            return resolved_schema
+
+        return self._resolve_nested(schema.copy())
+
+    def _resolve_nested(self, resolved_schema: Dict[str, Any]) -> Dict[str, Any]:
+        # Recursively resolve references in nested properties
+        if isinstance(resolved_schema.get('properties'), dict):
+            resolved_schema['properties'] = {
+                prop_name: self.resolve_schema(prop_schema)
+                for prop_name, prop_schema in resolved_schema['properties'].items()
+            }
+
+        # Resolve references in arrays
+        if 'items' in resolved_schema and isinstance(resolved_schema['items'], dict):
+            resolved_schema['items'] = self.resolve_schema(resolved_schema['items'])
+
+        # Resolve references in allOf, anyOf, oneOf
+        for key in ['allOf', 'anyOf', 'oneOf']:
+            if key in resolved_schema and isinstance(resolved_schema[key], list):
+                resolved_schema[key] = [self.resolve_schema(item) for item in resolved_schema[key]]
+
+        # Resolve references in additionalProperties
+        if 'additionalProperties' in resolved_schema and isinstance(
+            resolved_schema['additionalProperties'], dict
+        ):
+            resolved_schema['additionalProperties'] = self.resolve_schema(
+                resolved_schema['additionalProperties']
+            )
+
+        return resolved_schema
+
+    def response_schema(self, operation_id: str) -> Dict[str, Any]:
+        """Return the resolved response schema of an operation, or {} if it has none."""
+        key = self._operation_key(operation_id)
+        if key not in self._response_schemas:
+            self._response_schemas[key] = self._extract_response_schema(operation_id)
+        return self._response_schemas[key]
+
+    def _extract_response_schema(self, operation_id: str) -> Dict[str, Any]:
+        found = self.get_operation(operation_id)
+        if found is None:
+            return {}
+        responses = found[2].get('responses', {})
+
+        if self.is_openapi3:
+            # Try to get 200 or 201 response first
+            for status_code in ['200', '201']:
+                if status_code in responses:
+                    content = responses[status_code].get('content', {})
+
+                    # Check for application/json or */*
+                    for content_type in ['application/json', '*/*']:
+                        if content_type in content:
+                            return self.resolve_schema(content[content_type].get('schema', {}))
+
+            # If no 200/201 response, return the first response schema found
+            for response in responses.values():
+                for content_schema in response.get('content', {}).values():
+                    return self.resolve_schema(content_schema.get('schema', {}))
+        else:
+            # Try to get 200 or 201 response first
+            for status_code in ['200', '201']:
+                if status_code in responses and 'schema' in responses[status_code]:
+                    return self.resolve_schema(responses[status_code]['schema'])
+
+            # If no 200/201 response, return the first response schema found
+            for response in responses.values():
+                if 'schema' in response:
+                    return self.resolve_schema(response['schema'])
+
+        return {}
+
+
 def resolve_ref(ref: str, openapi_spec: Dict[str, Any]) -> Dict[str, Any]:
     """
     Resolve a JSON reference ($ref) in an OpenAPI specification.
@@ -97,26 +258,7 @@ def resolve_ref(ref: str, openapi_spec: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         The resolved schema
     """
-    if not ref.startswith('#/'):
-        print(f"External references not supported: {ref}")
-        return {}
-
-    # Remove the '#/' prefix and split the path
-    path_parts = ref[2:].split('/')
-
-    # Navigate through the OpenAPI spec to get the referenced object
-    current = openapi_spec
-    for part in path_parts:
-        if part not in current:
-            print(f"Reference part '{part}' not found in schema")
-            return {}
-        current = current[part]
-
-    # If the resolved schema also has a $ref, resolve it recursively
-    if isinstance(current, dict) and '$ref' in current:
-        return resolve_ref(current['$ref'], openapi_spec)
-
-    return current
+    return SpecIndex(openapi_spec).resolve_ref(ref)
 
 
 def resolve_schema_references(schema: Dict[str, Any], openapi_spec: Dict[str, Any]) -> Dict[str, Any]:
@@ -130,47 +272,7 @@ def resolve_schema_references(schema: Dict[str, Any], openapi_spec: Dict[str, An
     Returns:
         Schema with all references resolved
     """
-    if not schema:
-        return {}
-
-    # Create a copy of the schema to avoid modifying the original
-    resolved_schema = schema.copy()
-
-    # If the schema has a $ref, resolve it
-    if '$ref' in resolved_schema:
-        ref_schema = resolve_ref(resolved_schema['$ref'], openapi_spec)
-        # Remove the $ref key
-        resolved_schema.pop('$ref')
-        # Update with the referenced schema
-        resolved_schema.update(ref_schema)
-
-    # Recursively resolve references in nested properties
-    if 'properties' in resolved_schema:
-        resolved_properties = {}
-        for prop_name, prop_schema in resolved_schema['properties'].items():
-            resolved_properties[prop_name] = resolve_schema_references(prop_schema, openapi_spec)
-        resolved_schema['properties'] = resolved_properties
-
-    # Resolve references in arrays
-    if 'items' in resolved_schema and isinstance(resolved_schema['items'], dict):
-        resolved_schema['items'] = resolve_schema_references(resolved_schema['items'], openapi_spec)
-
-    # Resolve references in allOf, anyOf, oneOf
-    for key in ['allOf', 'anyOf', 'oneOf']:
-        if key in resolved_schema and isinstance(resolved_schema[key], list):
-            resolved_schema[key] = [
-                resolve_schema_references(item, openapi_spec) for item in resolved_schema[key]
-            ]
-
-    # Resolve references in additionalProperties
-    if 'additionalProperties' in resolved_schema and isinstance(
-        resolved_schema['additionalProperties'], dict
-    ):
-        resolved_schema['additionalProperties'] = resolve_schema_references(
-            resolved_schema['additionalProperties'], openapi_spec
-        )
-
-    return resolved_schema
+    return SpecIndex(openapi_spec).resolve_schema(schema)
 
 
 def extract_response_schema(openapi_spec: Dict[str, Any], operation_id: str) -> Dict[str, Any]:
@@ -178,6 +280,8 @@ def extract_response_schema(openapi_spec: Dict[str, Any], operation_id: str) ->
     Extract the response schema for a specific operation ID from an OpenAPI specification.
     Resolves all references in the schema.
 
+    Builds a throwaway SpecIndex; use SpecIndex directly to look up several operations.
+
     Args:
         openapi_spec: OpenAPI specification as a dictionary
         operation_id: Operation ID to extract the response schema for
@@ -185,67 +289,7 @@ def extract_response_schema(openapi_spec: Dict[str, Any], operation_id: str) ->
     Returns:
         Response schema as a dictionary with all references resolved
     """
-    schema = {}
-
-    # Check if it's OpenAPI 3.x
-    if 'openapi' in openapi_spec and openapi_spec['openapi'].startswith('3'):
-        paths = openapi_spec.get('paths', {})
-
-        # Iterate through paths and operations to find the matching operation ID
-        for path, path_item in paths.items():
-            for method, operation in path_item.items():
-                if (
-                    method in ['get', 'post', 'put', 'delete', 'patch', 'options', 'head']
-                    and operation.get('operationId').lower() == operation_id.lower()
-                ):
-                    responses = operation.get('responses', {})
-
-                    # Try to get 200 or 201 response first
-                    for status_code in ['200', '201']:
-                        if status_code in responses:
-                            response = responses[status_code]
-                            content = response.get('content', {})
-
-                            # Check for application/json or */*
-                            for content_type in ['application/json', '*/*']:
-                                if content_type in content:
-                                    schema = content[content_type].get('schema', {})
-                                    return resolve_schema_references(schema, openapi_spec)
-
-                    # If no 200/201 response, return the first response schema found
-                    for status_code, response in responses.items():
-                        content = response.get('content', {})
-                        for content_type, content_schema in content.items():
-                            schema = content_schema.get('schema', {})
-                            return resolve_schema_references(schema, openapi_spec)
-
-    # For OpenAPI 2.x (Swagger)
-    elif 'swagger' in openapi_spec and openapi_spec['swagger'].startswith('2'):
-        paths = openapi_spec.get('paths', {})
-
-        for path, path_item in paths.items():
-            for method, operation in path_item.items():
-                if (
-                    method in ['get', 'post', 'put', 'delete', 'patch', 'options', 'head']
-                    and operation.get('operationId') == operation_id
-                ):
-                    responses = operation.get('responses', {})
-
-                    # Try to get 200 or 201 response first
-                    for status_code in ['200', '201']:
-                        if status_code in responses:
-                            response = responses[status_code]
-                            if 'schema' in response:
-                                schema = response['schema']
-                                return resolve_schema_references(schema, openapi_spec)
-
-                    # If no 200/201 response, return the first response schema found
-                    for status_code, response in responses.items():
-                        if 'schema' in response:
-                            schema = response['schema']
-                            return resolve_schema_references(schema, openapi_spec)
-
-    return resolve_schema_references(schema, openapi_spec)
+    return SpecIndex(openapi_spec).response_schema(operation_id)
 
 
 def main(api_definitions, app_name):
@@ -269,8 +313,9 @@ def main(api_definitions, app_name):
 
     # Extract response schemas for each operation ID
     print("\nResponse Schemas:")
+    spec_index = SpecIndex(openapi_spec)
     for operation_id in operation_ids:
-        response_schema = extract_response_schema(openapi_spec, operation_id)
+        response_schema = spec_index.response_schema(operation_id)
         print(f"\nOperation ID: {operation_id}")
         map[operation_id] = response_schema
         list_output.append(response_schema)
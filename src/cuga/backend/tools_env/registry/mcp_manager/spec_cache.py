@@ -0,0 +1,102 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.mcp_manager.openapi_parser import APIEndpoint, SimpleOpenAPIParser
+from cuga.config import SPEC_CACHE_DIR, settings
+
+# Bump when the parser output or the cached layout changes, so stale entries are ignored
+CACHE_VERSION = "2"
+
+
+class CompiledSpec(BaseModel):
+    """The filtered OpenAPI schema of one app, its parsed endpoints and its transformed catalogs."""
+
+    # Filtered schema as exposed through MCPManager.schemas
+    schema_data: Dict[str, Any]
+    # JSON-normalized document the parser works on
+    document: Dict[str, Any]
+    apis: List[APIEndpoint]
+    # Transformed API catalog per `include_response_schema` flag, filled in once built
+    catalogs: Dict[bool, Dict[str, Any]] = Field(default_factory=dict)
+
+    def parser(self) -> SimpleOpenAPIParser:
+        return SimpleOpenAPIParser(self.document, apis=self.apis)
+
+
+class SpecCache:
+    """
+    On-disk cache of compiled OpenAPI specs, so a restart with unchanged specs skips the
+    YAML/JSON parsing, filtering and `$ref` resolution of every app.
+
+    Entries are keyed by a hash of the app name (its catalogs are prefixed with it), the
+    raw spec and the app's include/override configuration, and stored as pickles (the cache
+    directory is local and trusted).
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_settings(cls) -> Optional["SpecCache"]:
+        if not settings.registry.spec_cache_enabled:
+            return None
+        return cls(settings.registry.spec_cache_dir or SPEC_CACHE_DIR)
+
+    @staticmethod
+    def key(app_name: str, raw: str, config: ServiceConfig) -> str:
+        digest = hashlib.sha256()
+        digest.update(CACHE_VERSION.encode())
+        digest.update(app_name.encode("utf-8") + b"\0")
+        digest.update(raw.encode("utf-8"))
+        digest.update(config.model_dump_json(include={"include", "api_overrides"}).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def load(self, key: str) -> Optional[CompiledSpec]:
+        try:
+            with open(self._path(key), "rb") as f:
+                compiled = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable spec cache entry {key}: {e}")
+            return None
+        return compiled if isinstance(compiled, CompiledSpec) else None
+
+    def store(self, key: str, compiled: CompiledSpec):
+        """Write the entry atomically, so concurrent registries never read a partial file."""
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logger.warning(f"Could not write spec cache entry {key}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def store_in_background(self, key: str, compiled: CompiledSpec):
+        """Write the entry from a worker thread, for callers on the event loop. Writes keep their order."""
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spec-cache")
+        # Later changes to the catalogs must not race with pickling them
+        snapshot = compiled.model_copy(update={"catalogs": dict(compiled.catalogs)})
+        self._writer.submit(self.store, key, snapshot)
+
+    def flush(self):
+        """Wait for the writes started with store_in_background."""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
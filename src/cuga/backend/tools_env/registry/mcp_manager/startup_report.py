@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+PHASES = ("fetch", "parse", "build", "connect", "register")
+
+
+class StartupReport:
+    """
+    Per-service timings of a registry bootstrap.
+
+    Each service records the seconds spent in every bootstrap phase (fetch, parse,
+    model build, connect, register) together with its status, so a slow or failing
+    spec can be spotted straight from the startup log.
+    """
+
+    def __init__(self):
+        self.services: Dict[str, Dict[str, Any]] = {}
+        self.started = time.perf_counter()
+        self.total: Optional[float] = None
+
+    def add(self, service: str, service_type: str):
+        self.services[service] = {"type": service_type, "status": "pending"}
+
+    @contextmanager
+    def phase(self, service: str, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.services.setdefault(service, {"status": "pending"})
+            entry[phase] = round(time.perf_counter() - start, 3)
+
+    def note(self, service: str, **fields):
+        self.services.setdefault(service, {"status": "pending"}).update(fields)
+
+    def merge(self, other: "StartupReport"):
+        """Take the timings and notes another report recorded, keeping the statuses of this one."""
+        for service, entry in other.services.items():
+            fields = {key: value for key, value in entry.items() if key != "status"}
+            self.services.setdefault(service, {"status": "pending"}).update(fields)
+
+    def succeed(self, service: str, tools: int):
+        self.services[service].update(status="ok", tools=tools)
+
+    def fail(self, service: str, error: Any):
+        self.services[service].update(status="failed", error=str(error) or type(error).__name__)
+
+    def finish(self) -> float:
+        self.total = round(time.perf_counter() - self.started, 3)
+        return self.total
+
+    @staticmethod
+    def service_time(entry: Dict[str, Any]) -> float:
+        return round(sum(entry.get(phase, 0.0) for phase in PHASES), 3)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "services": {
+                name: {**entry, "total": self.service_time(entry)} for name, entry in self.services.items()
+            },
+        }
+
+    def log(self):
+        failed = [name for name, entry in self.services.items() if entry["status"] != "ok"]
+        logger.info(
+            f"Registry startup finished in {self.total}s "
+            f"({len(self.services)} services, {len(failed)} failed)"
+        )
+        # Slowest services first
+        for name, entry in sorted(self.services.items(), key=lambda item: -self.service_time(item[1])):
+            timings = " ".join(f"{phase}={entry[phase]}s" for phase in PHASES if phase in entry)
+            line = f"  {name} [{entry.get('type')}] {entry['status']} total={self.service_time(entry)}s {timings}"
+            if "tools" in entry:
+                line += f" tools={entry['tools']}"
+            if "spec_cache" in entry:
+                line += f" spec_cache={entry['spec_cache']}"
+            if "error" in entry:
+                line += f" error={entry['error']}"
+            logger.info(line)
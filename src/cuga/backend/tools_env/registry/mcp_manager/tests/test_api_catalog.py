@@ -0,0 +1,81 @@
+"""
+Test the cached API catalog of MCPManager.
+
+The catalog is built once per application and served from memory until it is
+invalidated by an onboard or a service reload.
+"""
+
+import unittest
+from unittest.mock import patch
+
+from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
+
+
+def _schema(description: str = "List pets") -> dict:
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Pets API", "version": "1.0.0"},
+        "paths": {
+            "/pets": {
+                "get": {
+                    "operationId": "listPets",
+                    "description": description,
+                    "responses": {"200": {"description": "ok"}},
+                },
+                "post": {
+                    "operationId": "createPet",
+                    "description": "Create a pet",
+                    "security": [{"oauth": []}],
+                    "responses": {"201": {"description": "created"}},
+                },
+            }
+        },
+    }
+
+
+class TestApiCatalog(unittest.TestCase):
+    def setUp(self):
+        self.manager = MCPManager(config={})
+        self.manager.schemas["pets"] = _schema()
+
+    def test_catalog_is_built_once(self):
+        with patch.object(
+            MCPManager, "_build_apis_for_application", wraps=self.manager._build_apis_for_application
+        ) as build:
+            first = self.manager.get_apis_for_application("pets")
+            second = self.manager.get_apis_for_application("pets")
+        self.assertIs(first, second)
+        self.assertEqual(build.call_count, 1)
+
+    def test_catalog_keyed_by_response_schema_flag(self):
+        with patch.object(
+            MCPManager, "_build_apis_for_application", wraps=self.manager._build_apis_for_application
+        ) as build:
+            self.manager.get_apis_for_application("pets")
+            self.manager.get_apis_for_application("pets", include_response_schema=True)
+        self.assertEqual(build.call_count, 2)
+
+    def test_get_api_info(self):
+        self.assertFalse(self.manager.get_api_info("pets", "pets_listpets")["secure"])
+        self.assertTrue(self.manager.get_api_info("pets", "pets_createpet")["secure"])
+        self.assertIsNone(self.manager.get_api_info("pets", "pets_missing"))
+
+    def test_invalidate_single_app(self):
+        self.manager.schemas["other"] = _schema()
+        self.manager.get_apis_for_application("pets")
+        other = self.manager.get_apis_for_application("other")
+
+        self.manager.schemas["pets"] = _schema(description="Updated")
+        self.manager.invalidate_api_catalog("pets")
+
+        self.assertEqual(self.manager.get_api_info("pets", "pets_listpets")["description"], "Updated")
+        self.assertIs(self.manager.get_apis_for_application("other"), other)
+
+    def test_invalidate_all(self):
+        before = self.manager.get_apis_for_application("pets")
+        self.manager.invalidate_api_catalog()
+        self.assertIsNot(self.manager.get_apis_for_application("pets"), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Test the concurrent bootstrap of OpenAPI services and its startup report.
+"""
+
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
+
+
+def _spec(title: str) -> str:
+    return json.dumps(
+        {
+            "openapi": "3.0.0",
+            "info": {"title": title, "version": "1.0.0"},
+            "servers": [{"url": f"http://{title}.local"}],
+            "paths": {
+                "/items": {
+                    "get": {
+                        "operationId": "listItems",
+                        "responses": {"200": {"description": "ok"}},
+                    }
+                }
+            },
+        }
+    )
+
+
+def _slow_fetch(delays: dict):
+    def fetch(url_or_path, timeout=None):
+        time.sleep(delays.get(url_or_path, 0))
+        return _spec(url_or_path.split("//")[1]), "application/json", True
+
+    return staticmethod(fetch)
+
+
+def _manager(*names, timeout: float = 5.0) -> tuple:
+    config = {name: ServiceConfig(name=name, url=f"http://{name}") for name in names}
+    manager = MCPManager(config=config)
+    manager.bootstrap_timeout = timeout
+    manager.spec_cache = None
+    return manager, list(config.items())
+
+
+@pytest.mark.asyncio
+async def test_services_are_fetched_concurrently():
+    manager, services = _manager("alpha", "beta", "gamma")
+    delays = {"http://alpha": 0.3, "http://beta": 0.3, "http://gamma": 0.3}
+
+    start = time.perf_counter()
+    with patch.object(MCPManager, "_fetch_schema", _slow_fetch(delays)):
+        await manager.initialize_servers(services)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.8
+    # Registration keeps the configured order
+    assert list(manager.servers) == ["alpha", "beta", "gamma"]
+    assert manager.server_by_tool.keys() == {"alpha_listitems", "beta_listitems", "gamma_listitems"}
+
+
+@pytest.mark.asyncio
+async def test_slow_service_does_not_block_the_rest():
+    manager, services = _manager("fast", "stuck", timeout=0.2)
+
+    with patch.object(MCPManager, "_fetch_schema", _slow_fetch({"http://stuck": 1.0})):
+        await manager.initialize_servers(services)
+
+    assert list(manager.servers) == ["fast"]
+    report = manager.startup_report.as_dict()["services"]
+    assert report["fast"]["status"] == "ok"
+    assert report["fast"]["tools"] == 1
+    assert {"fetch", "parse", "build", "register"} <= report["fast"].keys()
+    assert report["stuck"]["status"] == "failed"
+    assert "timed out" in report["stuck"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_timed_out_thread_keeps_its_slot_and_builds_nothing():
+    manager, services = _manager("stuck", "next", timeout=0.2)
+    manager.bootstrap_concurrency = 1
+    fetched = {}
+    built = []
+    fetch = _slow_fetch({"http://stuck": 0.5}).__func__
+    create_mcp_server = manager._create_mcp_server
+
+    def timed_fetch(url_or_path, timeout=None):
+        start = time.perf_counter()
+        result = fetch(url_or_path, timeout)
+        fetched[url_or_path] = (start, time.perf_counter())
+        return result
+
+    def recording_create(base_url, parser, name):
+        built.append(name)
+        return create_mcp_server(base_url, parser, name)
+
+    manager._create_mcp_server = recording_create
+    with patch.object(MCPManager, "_fetch_schema", staticmethod(timed_fetch)):
+        await manager.initialize_servers(services)
+
+    # The next service only started once the stuck thread had returned
+    assert fetched["http://next"][0] >= fetched["http://stuck"][1]
+    assert built == ["next"]
+    report = manager.startup_report.as_dict()["services"]
+    assert report["stuck"]["status"] == "failed"
+    assert "fetch" not in report["stuck"]
@@ -0,0 +1,81 @@
+"""
+Test that OpenAPI apps are dispatched in-process without per-app SSE servers.
+"""
+
+import threading
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
+from cuga.backend.tools_env.registry.mcp_manager.openapi_parser import SimpleOpenAPIParser
+from cuga.config import settings
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Pets", "version": "1.0.0"},
+    "paths": {
+        "/pets": {
+            "get": {
+                "operationId": "listPets",
+                "responses": {"200": {"description": "ok"}},
+            }
+        }
+    },
+}
+
+
+async def _manager(*names) -> MCPManager:
+    manager = MCPManager(config={})
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[{"name": request.url.host}]))
+    manager.http_pool.get_client = lambda url: httpx.AsyncClient(transport=transport)
+    for name in names:
+        manager.schema_urls[name] = ServiceConfig(name=name, url=f"http://{name}.local")
+        server = manager._create_mcp_server(f"http://{name}.local", SimpleOpenAPIParser(SPEC), name)
+        manager.servers[name] = server
+        await manager._register_tools(server)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_apps_are_served_without_threads():
+    threads_before = threading.active_count()
+    manager = await _manager(*(f"app{i}" for i in range(20)))
+
+    await manager.run_all_servers()
+
+    assert manager.threads == {}
+    assert manager.server_ports == {}
+    assert threading.active_count() == threads_before
+    result = await manager.call_tool("app7_listpets", {})
+    assert "app7.local" in result[0].text
+
+
+@pytest.mark.asyncio
+async def test_sse_only_for_requested_apps():
+    manager = await _manager("pets", "shop")
+
+    with (
+        patch.object(settings.registry, "sse_apps", ["shop"]),
+        patch.object(MCPManager, "start_sse_server") as start,
+    ):
+        await manager.run_all_servers()
+
+    start.assert_called_once_with("shop")
+
+
+@pytest.mark.asyncio
+async def test_sse_server_is_started_once_per_app():
+    manager = await _manager("My-Pets")
+
+    with patch.object(type(manager.servers["My-Pets"]), "run") as run:
+        port = manager.start_sse_server("My-Pets")
+        assert manager.start_sse_server("My-Pets") == port
+        manager.threads["My-Pets"].join()
+
+    run.assert_called_once_with(transport="sse")
+    assert manager.server_ports == {"My-Pets": port}
+    manager._detach_service("My-Pets")
+    assert manager.server_ports == {} and manager.threads == {}
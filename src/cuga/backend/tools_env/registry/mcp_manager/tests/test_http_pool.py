@@ -0,0 +1,101 @@
+"""
+Test the pooled async HTTP execution of OpenAPI tool handlers.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.mcp_manager.adapter import (
+    build_model,
+    create_async_handler,
+    extract_field_definitions,
+)
+from cuga.backend.tools_env.registry.mcp_manager.http_pool import HttpClientPool
+from cuga.backend.tools_env.registry.mcp_manager.openapi_parser import SimpleOpenAPIParser
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Pets", "version": "1.0.0"},
+    "paths": {
+        "/pets/{pet_id}": {
+            "get": {
+                "operationId": "getPet",
+                "parameters": [
+                    {"name": "pet_id", "in": "path", "required": True, "schema": {"type": "integer"}}
+                ],
+                "responses": {"200": {"description": "ok"}},
+            }
+        }
+    },
+}
+
+
+def _mock_pool(handler) -> HttpClientPool:
+    pool = HttpClientPool(http2=False)
+    transport = httpx.MockTransport(handler)
+    clients = {}
+
+    def get_client(url):
+        base_url = pool._base_url(url)
+        if base_url not in clients:
+            clients[base_url] = httpx.AsyncClient(transport=transport)
+        return clients[base_url]
+
+    pool.get_client = get_client
+    return pool
+
+
+def _get_pet_handler(pool: HttpClientPool):
+    api = SimpleOpenAPIParser(SPEC).apis()[0]
+    model = build_model("GetPetInput", extract_field_definitions(api))
+    schemas = {"pets": ServiceConfig(name="pets")}
+    return create_async_handler(api, model, "http://pets.local", "pets", schemas, pool), model
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_client_per_base_url():
+    pool = HttpClientPool(http2=False)
+    first = pool.get_client("http://a.local/pets/1")
+    assert pool.get_client("http://a.local/other?x=1") is first
+    assert pool.get_client("http://b.local/pets/1") is not first
+    assert first.follow_redirects
+    await pool.aclose()
+    assert first.is_closed
+
+
+@pytest.mark.asyncio
+async def test_async_handler_success_and_http_error():
+    def respond(request: httpx.Request):
+        if request.url.path == "/pets/1":
+            return httpx.Response(200, json={"id": 1})
+        return httpx.Response(404, json={"detail": "not found"})
+
+    handler, model = _get_pet_handler(_mock_pool(respond))
+
+    assert await handler(model(pet_id=1)) == '{"id":1}'
+
+    error = await handler(model(pet_id=2))
+    assert error["status"] == "exception"
+    assert error["status_code"] == 404
+    assert error["url"] == "http://pets.local/pets/2"
+    assert "not found" in error["message"]
+
+
+@pytest.mark.asyncio
+async def test_async_handler_calls_overlap():
+    async def respond(request: httpx.Request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"ok": True})
+
+    handler, model = _get_pet_handler(_mock_pool(respond))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(handler(model(pet_id=i)) for i in range(5)))
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 5
+    assert elapsed < 0.6
@@ -0,0 +1,139 @@
+"""
+Test that OpenAPI tools are listed from precomputed schemas and build their models on first call.
+"""
+
+import os
+from typing import Any, Dict, Literal
+
+import httpx
+import pytest
+from mcp.server.fastmcp.tools import Tool
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.mcp_manager.adapter import (
+    LazyTool,
+    build_model,
+    extract_field_definitions,
+    handler_parameters_schema,
+    new_mcp_from_custom_parser,
+)
+from cuga.backend.tools_env.registry.mcp_manager.http_pool import HttpClientPool
+from cuga.backend.tools_env.registry.mcp_manager.openapi_parser import SimpleOpenAPIParser
+
+NESTED_SPEC = os.path.join(
+    os.path.dirname(__file__), "..", "..", "tests", "data", "schemas", "openapi_nested.yaml"
+)
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Pets", "version": "1.0.0"},
+    "paths": {
+        "/pets": {
+            "get": {
+                "operationId": "listPets",
+                "parameters": [
+                    {"name": "page_size", "in": "query", "schema": {"type": "integer"}},
+                    {"name": "kind", "in": "query", "required": True, "schema": {"type": "string"}},
+                ],
+                "responses": {"200": {"description": "ok"}},
+            },
+            "post": {
+                "operationId": "createPet",
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {
+                                "type": "object",
+                                "required": ["name", "status"],
+                                "properties": {
+                                    "name": {"type": "string"},
+                                    "status": {"type": "string", "enum": ["available", "sold"]},
+                                    "tags": {"type": "array", "items": {"type": "string"}},
+                                    "owner": {
+                                        "type": "object",
+                                        "required": ["id"],
+                                        "properties": {
+                                            "id": {"type": "integer"},
+                                            "verified": {"type": "boolean"},
+                                        },
+                                    },
+                                },
+                            }
+                        }
+                    }
+                },
+                "responses": {"201": {"description": "created"}},
+            },
+        }
+    },
+}
+
+
+def _eager_parameters(tool: LazyTool) -> dict:
+    """The schema FastMCP derives when the model is built up front."""
+    tool.ensure_built()
+    return Tool.from_function(tool.fn, name=tool.name).parameters
+
+
+@pytest.mark.parametrize(
+    "parser",
+    [SimpleOpenAPIParser(SPEC), SimpleOpenAPIParser.from_yaml(open(NESTED_SPEC).read())],
+    ids=["pets", "nested"],
+)
+def test_precomputed_schema_matches_pydantic(parser):
+    server = new_mcp_from_custom_parser("http://pets.local", parser, "pets", {})
+
+    tools = server._tool_manager.list_tools()
+    assert tools
+    for tool in tools:
+        assert isinstance(tool, LazyTool)
+        assert tool.parameters == _eager_parameters(tool)
+
+
+def test_field_types_match_pydantic():
+    field_defs = {
+        "name": (str, ...),
+        "single": (Literal["x"], None),
+        "mixed": (Literal[1, "x"], None),
+        "scores": (Dict[str, float], ...),
+        "anything": (Dict[str, Any], None),
+        "body": (Any, None),
+        "_private": (str, None),
+        "nested": {"items": (list, None), "extra": (dict, None)},
+    }
+    model = build_model("thingInput", field_defs)
+
+    async def thing_handler(params: model, headers: dict = None):
+        pass
+
+    expected = Tool.from_function(thing_handler).parameters
+    assert handler_parameters_schema("thing_handler", "thingInput", field_defs) == expected
+
+
+@pytest.mark.asyncio
+async def test_models_are_built_on_first_call():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=str(request.url)))
+    pool = HttpClientPool()
+    pool.get_client = lambda url: httpx.AsyncClient(transport=transport)
+    schema_urls = {"pets": ServiceConfig(name="pets")}
+    server = new_mcp_from_custom_parser(
+        "http://pets.local", SimpleOpenAPIParser(SPEC), "pets", schema_urls, pool
+    )
+
+    listed = await server.list_tools()
+    assert {tool.name for tool in listed} == {"pets_listpets", "pets_createpet"}
+    assert all(tool.fn_metadata is None for tool in server._tool_manager.list_tools())
+
+    result = await server.call_tool("pets_listpets", {"params": {"kind": "cat"}})
+
+    assert result[0].text == "http://pets.local/pets?kind=cat"
+    built = {tool.name for tool in server._tool_manager.list_tools() if tool.fn_metadata is not None}
+    assert built == {"pets_listpets"}
+
+
+def test_field_definitions_stay_plain_data():
+    api = next(api for api in SimpleOpenAPIParser(SPEC).apis() if api.operation_id == "createPet")
+
+    field_defs = extract_field_definitions(api)
+
+    assert field_defs["owner"] == {"id": (int, ...), "verified": (bool, None)}
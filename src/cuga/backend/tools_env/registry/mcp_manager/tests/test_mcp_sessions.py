@@ -0,0 +1,143 @@
+"""
+Test the long-lived MCP client sessions used for configured MCP servers.
+"""
+
+import asyncio
+
+import anyio
+import pytest
+from fastmcp import FastMCP
+from fastmcp.client.transports import FastMCPTransport
+from fastmcp.exceptions import ToolError
+
+from cuga.backend.tools_env.registry.mcp_manager.mcp_sessions import MCPSessionManager
+
+
+def _server(state: dict) -> FastMCP:
+    server = FastMCP("echo")
+
+    @server.tool
+    async def echo(text: str) -> str:
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.05)
+        state["active"] -= 1
+        return text
+
+    @server.tool
+    def fail() -> str:
+        raise ValueError("boom")
+
+    return server
+
+
+@pytest.fixture
+def state():
+    return {"active": 0, "peak": 0}
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused_across_calls(state):
+    manager = MCPSessionManager(health_check_interval=0)
+    session = manager.add("echo", FastMCPTransport(_server(state)))
+
+    tools = await session.list_tools()
+    assert {tool.name for tool in tools} == {"echo", "fail"}
+    client = session.client
+
+    for i in range(3):
+        result = await manager.call_tool("echo", "echo", {"text": str(i)})
+        assert result.content[0].text == str(i)
+
+    assert session.client is client
+    assert session.is_connected
+    assert session.reconnects == 0
+    await manager.close()
+    assert not session.is_connected
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_capped(state):
+    manager = MCPSessionManager(max_concurrent_calls=2, health_check_interval=0)
+    manager.add("echo", FastMCPTransport(_server(state)))
+
+    results = await asyncio.gather(*(manager.call_tool("echo", "echo", {"text": str(i)}) for i in range(6)))
+
+    assert [r.content[0].text for r in results] == [str(i) for i in range(6)]
+    assert state["peak"] <= 2
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_tool_error_does_not_reconnect(state):
+    manager = MCPSessionManager(health_check_interval=0)
+    session = manager.add("echo", FastMCPTransport(_server(state)))
+
+    with pytest.raises(ToolError):
+        await session.call_tool("fail", {})
+    assert session.reconnects == 0
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_disconnect(state):
+    manager = MCPSessionManager(health_check_interval=0)
+    session = manager.add("echo", FastMCPTransport(_server(state)))
+    await session.connect()
+
+    await session.disconnect()
+    assert not await session.is_healthy()
+    await session.check_health()
+
+    assert session.reconnects == 1
+    assert (await session.call_tool("echo", {"text": "back"})).content[0].text == "back"
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_timed_out_call_is_not_sent_again():
+    calls = []
+    server = FastMCP("slow")
+
+    @server.tool
+    async def slow() -> str:
+        calls.append(None)
+        await asyncio.sleep(0.3)
+        return "done"
+
+    manager = MCPSessionManager(call_timeout=0.1, health_check_interval=0)
+    session = manager.add("slow", FastMCPTransport(server))
+
+    async def unhealthy(timeout: float = 5.0) -> bool:
+        return False
+
+    session.is_healthy = unhealthy
+    with pytest.raises(asyncio.TimeoutError):
+        await session.call_tool("slow", {})
+    await asyncio.sleep(0.3)
+
+    assert len(calls) == 1
+    assert session.reconnects == 0
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_call_that_could_not_be_sent_is_retried(state):
+    manager = MCPSessionManager(health_check_interval=0)
+    session = manager.add("echo", FastMCPTransport(_server(state)))
+    await session.connect()
+    call_tool = session.client.call_tool
+    attempts = []
+
+    async def closed_once(name, args):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise anyio.ClosedResourceError()
+        return await call_tool(name, args)
+
+    session.client.call_tool = closed_once
+
+    assert (await session.call_tool("echo", {"text": "again"})).content[0].text == "again"
+    assert session.reconnects == 1
+    assert attempts == ["echo", "echo"]
+    await manager.close()
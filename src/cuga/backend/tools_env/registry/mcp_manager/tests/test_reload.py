@@ -0,0 +1,130 @@
+"""
+Test hot reloading the service configuration of a running MCPManager.
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig, ServiceLimitsConfig
+from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
+from cuga.backend.tools_env.registry.registry.api_registry import ApiRegistry
+
+
+def _spec(host: str, operation_id: str) -> str:
+    return json.dumps(
+        {
+            "openapi": "3.0.0",
+            "info": {"title": host, "version": "1.0.0"},
+            "paths": {
+                "/items": {"get": {"operationId": operation_id, "responses": {"200": {"description": "ok"}}}}
+            },
+        }
+    )
+
+
+SPECS = {
+    "http://pets.local/spec": _spec("pets", "listPets"),
+    "http://shop.local/spec": _spec("shop", "listOrders"),
+    "http://zoo.local/spec": _spec("zoo", "listAnimals"),
+    "http://pets.local/v2/spec": _spec("pets", "searchPets"),
+}
+FETCHED = []
+
+
+@staticmethod
+def _fetch(url_or_path, timeout=None):
+    FETCHED.append(url_or_path)
+    if url_or_path not in SPECS:
+        raise ConnectionError(f"cannot reach {url_or_path}")
+    return SPECS[url_or_path], "application/json", True
+
+
+async def _respond(request: httpx.Request):
+    await asyncio.sleep(0.1)
+    return httpx.Response(200, json={"host": request.url.host})
+
+
+def _config(**urls) -> dict:
+    return {name: ServiceConfig(name=name, url=url) for name, url in urls.items()}
+
+
+@pytest_asyncio.fixture
+async def manager():
+    FETCHED.clear()
+    manager = MCPManager(config=_config(pets="http://pets.local/spec", shop="http://shop.local/spec"))
+    manager.spec_cache = None
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_respond))
+    manager.http_pool.get_client = lambda url: client
+    with patch.object(MCPManager, "_fetch_schema", _fetch):
+        await manager.load_tools()
+        FETCHED.clear()
+        yield manager
+
+
+@pytest.mark.asyncio
+async def test_only_added_services_are_built(manager):
+    pets_server = manager.servers["pets"]
+
+    result = await manager.reload(
+        _config(pets="http://pets.local/spec", shop="http://shop.local/spec", zoo="http://zoo.local/spec")
+    )
+
+    assert (result["added"], result["changed"], result["removed"]) == (["zoo"], [], [])
+    assert result["unchanged"] == ["pets", "shop"]
+    assert FETCHED == ["http://zoo.local/spec"]
+    assert manager.servers["pets"] is pets_server
+    assert "zoo_listanimals" in manager.get_apis_for_application("zoo")
+    assert json.loads((await manager.call_tool("zoo_listanimals", {}))[0].text) == {"host": "zoo.local"}
+
+
+@pytest.mark.asyncio
+async def test_changed_and_removed_services_are_swapped(manager):
+    result = await manager.reload(_config(pets="http://pets.local/v2/spec"))
+
+    assert (result["added"], result["changed"], result["removed"]) == ([], ["pets"], ["shop"])
+    assert set(manager.server_by_tool) == {"pets_searchpets"}
+    assert list(manager.tools_by_server) == ["pets"]
+    assert list(manager.get_apis_for_application("pets")) == ["pets_searchpets"]
+    assert "shop" not in manager.schema_urls and "shop" not in manager.schemas
+    with pytest.raises(Exception, match="not found"):
+        await manager.call_tool("shop_listorders", {})
+
+
+@pytest.mark.asyncio
+async def test_failed_change_keeps_the_running_version(manager):
+    result = await manager.reload(
+        _config(pets="http://pets.local/unreachable", shop="http://shop.local/spec", zoo="http://nowhere")
+    )
+
+    assert result["failed"] == ["zoo", "pets"]
+    assert "pets_listpets" in manager.server_by_tool
+    assert "zoo" not in manager.schema_urls
+    # The failed change is retried by the next reload
+    assert manager.diff_services(_config(pets="http://pets.local/unreachable"))["changed"] == ["pets"]
+
+
+@pytest.mark.asyncio
+async def test_in_flight_calls_finish_during_reload(manager):
+    call = asyncio.create_task(manager.call_tool("shop_listorders", {}))
+    await asyncio.sleep(0.02)
+
+    await manager.reload(_config(pets="http://pets.local/spec"))
+
+    assert json.loads((await call)[0].text) == {"host": "shop.local"}
+
+
+@pytest.mark.asyncio
+async def test_registry_reload_applies_limits(manager):
+    registry = ApiRegistry(client=manager)
+    config = _config(pets="http://pets.local/spec", shop="http://shop.local/spec")
+    config["shop"].limits = ServiceLimitsConfig(max_concurrency=2)
+
+    result = await registry.reload(config)
+
+    assert result["changed"] == ["shop"]
+    assert list(registry.admission.get_stats()) == ["shop"]
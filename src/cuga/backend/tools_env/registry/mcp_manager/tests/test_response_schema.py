@@ -0,0 +1,123 @@
+"""
+Test the per-spec operation and `$ref` index used to extract response schemas.
+"""
+
+import unittest
+
+from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
+from cuga.backend.tools_env.registry.mcp_manager.openapi_parser_v0 import OpenAPITransformer
+from cuga.backend.tools_env.registry.mcp_manager.response_schema import SpecIndex, extract_response_schema
+
+
+def _schema() -> dict:
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Tree API", "version": "1.0.0"},
+        "paths": {
+            "/nodes": {
+                "get": {
+                    "operationId": "listNodes",
+                    "responses": {
+                        "200": {
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "array",
+                                        "items": {"$ref": "#/components/schemas/Node"},
+                                    }
+                                }
+                            }
+                        }
+                    },
+                },
+                "post": {
+                    "operationId": "createNode",
+                    "responses": {
+                        "201": {"content": {"*/*": {"schema": {"$ref": "#/components/schemas/Alias"}}}}
+                    },
+                },
+            }
+        },
+        "components": {
+            "schemas": {
+                "Alias": {"$ref": "#/components/schemas/Node"},
+                "Node": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "owner": {"$ref": "#/components/schemas/Owner"},
+                        "children": {"type": "array", "items": {"$ref": "#/components/schemas/Node"}},
+                    },
+                },
+                "Owner": {"type": "object", "properties": {"id": {"type": "integer"}}},
+            }
+        },
+    }
+
+
+class TestSpecIndex(unittest.TestCase):
+    def test_operations_are_indexed_case_insensitively(self):
+        index = SpecIndex(_schema())
+
+        path, method, operation = index.get_operation("LISTNODES")
+
+        self.assertEqual((path, method), ("/nodes", "get"))
+        self.assertEqual(operation["operationId"], "listNodes")
+        self.assertIsNone(index.get_operation("missing"))
+        self.assertEqual(index.response_schema("missing"), {})
+
+    def test_recursive_schemas_keep_the_back_reference(self):
+        index = SpecIndex(_schema())
+
+        node = index.response_schema("createNode")
+
+        self.assertEqual(node["properties"]["owner"]["properties"]["id"], {"type": "integer"})
+        self.assertEqual(node["properties"]["children"]["items"], {"$ref": "#/components/schemas/Node"})
+
+    def test_refs_are_resolved_once(self):
+        index = SpecIndex(_schema())
+
+        listed = index.response_schema("listNodes")
+        created = index.response_schema("createNode")
+
+        self.assertIs(listed["items"], created)
+        self.assertIs(index.response_schema("listNodes"), listed)
+        self.assertEqual(
+            set(index._refs), {"#/components/schemas/" + name for name in ("Alias", "Node", "Owner")}
+        )
+
+    def test_module_function_matches_index(self):
+        self.assertEqual(
+            extract_response_schema(_schema(), "createNode"),
+            SpecIndex(_schema()).response_schema("createNode"),
+        )
+
+    def test_manager_reuses_index_until_schema_changes(self):
+        manager = MCPManager(config={})
+        manager.schemas["tree"] = _schema()
+
+        index = manager.get_spec_index("tree")
+        self.assertIs(manager.get_spec_index("tree"), index)
+        schema = manager._get_response_schema_from_tool({"name": "tree_listNodes"}, index, "tree")
+        self.assertEqual(schema["type"], "array")
+
+        manager.schemas["tree"] = _schema()
+        manager.invalidate_api_catalog("tree")
+        self.assertIsNot(manager.get_spec_index("tree"), index)
+
+
+class TestTransformerRecursiveSchemas(unittest.TestCase):
+    def test_recursive_response_schema_is_cut(self):
+        apis = OpenAPITransformer(_schema()).transform()
+
+        success = apis["tree_createnode"]["response_schemas"]["success"]
+        self.assertEqual(success["owner"], {"id": "integer"})
+        self.assertEqual(
+            success["children"], [{"type": "circular_ref", "error": "Circular reference detected"}]
+        )
+        # Shared components are simplified once and reused across operations
+        self.assertIs(apis["tree_listnodes"]["response_schemas"]["success"][0], success)
+
+
+if __name__ == "__main__":
+    unittest.main()
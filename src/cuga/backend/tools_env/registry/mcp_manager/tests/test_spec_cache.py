@@ -0,0 +1,113 @@
+"""
+Test the on-disk compiled OpenAPI spec cache.
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from cuga.backend.tools_env.registry.config.config_loader import ApiOverride, ServiceConfig
+from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
+from cuga.backend.tools_env.registry.mcp_manager.spec_cache import SpecCache
+
+SPEC = json.dumps(
+    {
+        "openapi": "3.0.0",
+        "info": {"title": "Pets", "version": "1.0.0"},
+        "servers": [{"url": "http://pets.local"}],
+        "paths": {
+            "/pets": {
+                "get": {
+                    "operationId": "listPets",
+                    "description": "List pets",
+                    "responses": {"200": {"description": "ok"}},
+                },
+                "post": {
+                    "operationId": "createPet",
+                    "description": "Create a pet",
+                    "responses": {"201": {"description": "created"}},
+                },
+            }
+        },
+    }
+)
+
+
+def _fetch(url_or_path, timeout=None):
+    return SPEC, "application/json", True
+
+
+async def _start(cache_dir, name="pets", **config) -> MCPManager:
+    service = ServiceConfig(name=name, url="http://pets.local/openapi.json", **config)
+    manager = MCPManager(config={name: service})
+    manager.spec_cache = SpecCache(str(cache_dir))
+    with patch.object(MCPManager, "_fetch_schema", staticmethod(_fetch)):
+        await manager.initialize_servers([(name, service)])
+    return manager
+
+
+def _cache_status(manager: MCPManager) -> str:
+    return manager.startup_report.services["pets"]["spec_cache"]
+
+
+@pytest.mark.asyncio
+async def test_restart_skips_parsing(tmp_path):
+    first = await _start(tmp_path)
+    assert _cache_status(first) == "miss"
+
+    with patch.object(MCPManager, "_parse_schema", side_effect=AssertionError("parsed again")):
+        second = await _start(tmp_path)
+
+    assert _cache_status(second) == "hit"
+    assert second.schemas["pets"] == first.schemas["pets"]
+    assert second.server_by_tool.keys() == first.server_by_tool.keys() == {"pets_listpets", "pets_createpet"}
+
+
+@pytest.mark.asyncio
+async def test_override_change_invalidates_entry(tmp_path):
+    await _start(tmp_path)
+
+    filtered = await _start(tmp_path, include=["listPets"])
+
+    assert _cache_status(filtered) == "miss"
+    assert filtered.server_by_tool.keys() == {"pets_listpets"}
+
+    override = ApiOverride(operation_id="listPets", description="All the pets")
+    overridden = await _start(tmp_path, api_overrides=[override])
+    assert _cache_status(overridden) == "miss"
+
+
+@pytest.mark.asyncio
+async def test_catalog_is_persisted(tmp_path):
+    first = await _start(tmp_path)
+    catalog = first.get_apis_for_application("pets")
+    first.spec_cache.flush()
+
+    second = await _start(tmp_path)
+    with patch.object(MCPManager, "_build_apis_for_application", side_effect=AssertionError("rebuilt")):
+        assert second.get_apis_for_application("pets") == catalog
+
+
+@pytest.mark.asyncio
+async def test_apps_serving_the_same_spec_have_their_own_entries(tmp_path):
+    alpha = await _start(tmp_path, name="alpha")
+    alpha.get_apis_for_application("alpha")
+    alpha.spec_cache.flush()
+
+    beta = await _start(tmp_path, name="beta")
+
+    assert beta.startup_report.services["beta"]["spec_cache"] == "miss"
+    assert set(beta.get_apis_for_application("beta")) == {"beta_listpets", "beta_createpet"}
+    assert beta.get_api_info("beta", "beta_listpets")["app_name"] == "beta"
+
+
+@pytest.mark.asyncio
+async def test_unreadable_entry_is_ignored(tmp_path):
+    await _start(tmp_path)
+    for entry in tmp_path.iterdir():
+        entry.write_bytes(b"not a pickle")
+
+    manager = await _start(tmp_path)
+    assert _cache_status(manager) == "miss"
+    assert "pets" in manager.servers
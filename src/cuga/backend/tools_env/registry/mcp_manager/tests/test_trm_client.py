@@ -0,0 +1,95 @@
+"""
+Test TRM tool loading and routing over the pooled async HTTP client.
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from cuga.backend.tools_env.registry.config.config_loader import Auth, ServiceConfig
+from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
+from cuga.backend.utils.consts import ServiceType
+
+TOOLS = {
+    "http://trm-a.local": [
+        {"id": "a1", "name": "lookup", "binding": {"python": {"function": "lookup"}}},
+        {"id": "a2", "name": "unused", "binding": {"python": {"function": "unused"}}},
+    ],
+    "http://trm-b.local": [{"id": "b1", "name": "report", "binding": {"python": {"function": "report"}}}],
+}
+
+
+def _respond(request: httpx.Request):
+    base_url = f"{request.url.scheme}://{request.url.host}"
+    if request.url.path == "/api/v1/tools/":
+        tools = [
+            {**tool, "description": tool["name"], "input_schema": {}, "output_schema": {}}
+            for tool in TOOLS[base_url]
+        ]
+        return httpx.Response(200, json=tools)
+    tool_id = request.url.path.split("/")[-2]
+    output = {"tool": tool_id, "auth": request.headers["X-Key"], "args": json.loads(request.content)["args"]}
+    return httpx.Response(200, json={"data": {"tool_output": json.dumps(output)}})
+
+
+async def _respond_slowly(request: httpx.Request):
+    await asyncio.sleep(0.2)
+    return _respond(request)
+
+
+def _trm_service(name: str, url: str, tool: str, key: str) -> ServiceConfig:
+    return ServiceConfig(
+        name=name, url=url, tools=[tool], auth=Auth(type="X-Key", value=key), type=ServiceType.TRM
+    )
+
+
+async def _manager(respond=_respond) -> MCPManager:
+    services = {
+        "alpha": _trm_service("alpha", "http://trm-a.local", "lookup", "key-a"),
+        "beta_app": _trm_service("beta_app", "http://trm-b.local", "report", "key-b"),
+    }
+    manager = MCPManager(config=services)
+    transport = httpx.MockTransport(respond)
+    client = httpx.AsyncClient(transport=transport)
+    manager.http_pool.get_client = lambda url: client
+
+    trm = list(services.items())
+    trm_urls = {name: {"url": c.url, "tools": c.tools, "auth": c.auth} for name, c in trm}
+    await manager._initialize_trm_services(trm, trm_urls)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_calls_are_routed_to_the_requested_tool():
+    manager = await _manager()
+
+    assert set(manager.trm_tool_index) == {"alpha_lookup", "beta_app_report"}
+
+    lookup = json.loads((await manager.call_tool("alpha_lookup", {"q": 1}))[0].text)
+    report = json.loads((await manager.call_tool("beta_app_report", {}))[0].text)
+
+    assert lookup == {"tool": "a1", "auth": "key-a", "args": {"q": 1}}
+    assert report == {"tool": "b1", "auth": "key-b", "args": {}}
+
+
+@pytest.mark.asyncio
+async def test_trm_apps_are_listed_as_trm():
+    manager = await _manager()
+
+    apis = manager.get_apis_for_application("beta_app")
+
+    assert list(apis) == ["beta_app_report"]
+    assert apis["beta_app_report"]["method"] == "POST"
+
+
+@pytest.mark.asyncio
+async def test_parallel_calls_do_not_block():
+    manager = await _manager(_respond_slowly)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(manager.call_tool("alpha_lookup", {"q": i}) for i in range(5)))
+
+    assert time.perf_counter() - start < 0.6
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from cuga.backend.tools_env.registry.config.config_loader import CallLimits, ServiceLimitsConfig
+
+
+class AdmissionRejected(Exception):
+    """A call was turned away because its app's queue is full or it waited too long."""
+
+    status_code = 429
+
+    def __init__(self, app_name: str, reason: str, retry_after: float):
+        super().__init__(f"Too many requests to '{app_name}': {reason}")
+        self.app_name = app_name
+        self.retry_after = retry_after
+
+    def to_response(self, function_name: str) -> Dict[str, Any]:
+        return {
+            "status": "exception",
+            "status_code": self.status_code,
+            "message": str(self),
+            "error_type": "TooManyRequests",
+            "function_name": function_name,
+            "retry_after": round(self.retry_after, 3),
+        }
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = max(1.0, float(burst if burst is not None else rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # Callers are served one at a time, so tokens go out in arrival order
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class Bulkhead:
+    """Concurrency limit and rate limit of one app or one tool."""
+
+    def __init__(self, limits: CallLimits):
+        self.semaphore = asyncio.Semaphore(limits.max_concurrency) if limits.max_concurrency else None
+        self.bucket = TokenBucket(limits.rate_per_second, limits.burst) if limits.rate_per_second else None
+
+    async def acquire(self):
+        if self.bucket:
+            await self.bucket.acquire()
+        if self.semaphore:
+            await self.semaphore.acquire()
+
+    def release(self):
+        if self.semaphore:
+            self.semaphore.release()
+
+
+class AppAdmission:
+    """Bounded admission queue in front of an app's bulkhead and its per-tool bulkheads."""
+
+    def __init__(self, app_name: str, config: ServiceLimitsConfig):
+        self.app_name = app_name
+        self.config = config
+        self.bulkhead = Bulkhead(config)
+        self.tool_bulkheads = {name: Bulkhead(limits) for name, limits in config.tools.items()}
+        self.queued = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _tool_bulkhead(self, function_name: str) -> Optional[Bulkhead]:
+        bulkhead = self.tool_bulkheads.get(function_name)
+        if bulkhead is None and function_name.startswith(f"{self.app_name}_"):
+            bulkhead = self.tool_bulkheads.get(function_name[len(self.app_name) + 1 :])
+        return bulkhead
+
+    @asynccontextmanager
+    async def admit(self, function_name: str):
+        if self.queued >= self.config.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.app_name, "admission queue is full", self.config.queue_timeout)
+
+        # The tool's own limits first: a call waiting on them must not hold an app slot meanwhile,
+        # or one throttled tool would starve every other tool of the app
+        bulkheads = [b for b in (self._tool_bulkhead(function_name), self.bulkhead) if b]
+        acquired = []
+
+        async def acquire_all():
+            for bulkhead in bulkheads:
+                await bulkhead.acquire()
+                acquired.append(bulkhead)
+
+        self.queued += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(acquire_all(), timeout=self.config.queue_timeout)
+        except asyncio.TimeoutError:
+            for bulkhead in acquired:
+                bulkhead.release()
+            self.rejected += 1
+            raise AdmissionRejected(
+                self.app_name, f"waited longer than {self.config.queue_timeout}s", self.config.queue_timeout
+            ) from None
+        finally:
+            self.queued -= 1
+
+        waited = time.monotonic() - start
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            for bulkhead in acquired:
+                bulkhead.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait_seconds": round(self.max_wait, 4),
+        }
+
+
+class AdmissionController:
+    """Per-app admission control for apps configured with `limits` in mcp_servers.yaml."""
+
+    def __init__(self, configs: Dict[str, Optional[ServiceLimitsConfig]]):
+        self.apps = {name: AppAdmission(name, config) for name, config in configs.items() if config}
+
+    def configure(self, app_name: str, config: Optional[ServiceLimitsConfig]):
+        """Replace an app's limits. Calls already admitted finish under the old ones."""
+        if config:
+            self.apps[app_name] = AppAdmission(app_name, config)
+        else:
+            self.apps.pop(app_name, None)
+
+    @asynccontextmanager
+    async def admit(self, app_name: str, function_name: str):
+        app = self.apps.get(app_name)
+        if app is None:
+            yield
+            return
+        async with app.admit(function_name):
+            yield
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: app.get_stats() for name, app in self.apps.items()}
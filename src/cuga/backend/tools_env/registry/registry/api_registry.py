@@ -1,12 +1,19 @@
 import json
+import time
 import traceback
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
 from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
 from cuga.backend.tools_env.registry.registry.authentication.appworld_auth_manager import (
     AppWorldAuthManager,
 )
 from loguru import logger
 
+from cuga.backend.tools_env.registry.registry.admission import AdmissionController, AdmissionRejected
+from cuga.backend.tools_env.registry.registry.metrics import UNKNOWN_TOOL, CallTimer, RegistryMetrics
+from cuga.backend.tools_env.registry.registry.response_cache import SAFE_METHODS, ResponseCache
+from cuga.backend.tools_env.registry.registry.single_flight import SingleFlight
+from cuga.config import settings
 from cuga.backend.tools_env.registry.utils.types import AppDefinition
 
 
@@ -20,12 +27,34 @@ class ApiRegistry:
         logger.info("ApiRegistry: Initializing.")
         self.mcp_client = client
         self.auth_manager = None
+        self.response_cache = ResponseCache(
+            {name: config.response_cache for name, config in client.schema_urls.items()}
+        )
+        # Identical safe calls in flight at the same time share one backend request
+        self.single_flight = SingleFlight() if settings.registry.coalesce_safe_calls else None
+        # Concurrency and rate limits of apps configured with `limits`
+        self.admission = AdmissionController(
+            {name: config.limits for name, config in client.schema_urls.items()}
+        )
+        self.metrics = RegistryMetrics()
 
     async def start_servers(self):
         """Start servers and load tools"""
         await self.mcp_client.load_tools()
         logger.info("ApiRegistry: Servers started successfully.")
 
+    async def reload(self, services: Dict[str, ServiceConfig]) -> Dict[str, Any]:
+        """Apply a new service configuration, rebuilding only added and changed services."""
+        result = await self.mcp_client.reload(services)
+        for name in result["removed"] + [
+            n for n in result["added"] + result["changed"] if n not in result["failed"]
+        ]:
+            config = services.get(name)
+            self.response_cache.configure(name, config.response_cache if config else None)
+            self.admission.configure(name, config.limits if config else None)
+        logger.info("ApiRegistry: Services reloaded.")
+        return result
+
     async def show_applications(self) -> List[AppDefinition]:
         """Lists application names and their descriptions."""
         logger.debug("ApiRegistry: show_applications() called.")
@@ -39,23 +68,109 @@ class ApiRegistry:
         #      raise HTTPException(status_code=404, detail=f"Application '{app_name}' not found.")
         return self.mcp_client.get_apis_for_application(app_name, include_response_schema)
 
+    async def show_api(self, app_name: str, api_name: str) -> Dict | None:
+        """Gets a single API definition of a specific app from the cached catalog."""
+        return self.mcp_client.get_api_info(app_name, api_name)
+
     async def show_all_apis(self, include_response_schema) -> List[Dict[str, str]]:
         """Gets all API definitions."""
         logger.debug("ApiRegistry: show_all_apis() called.")
         return self.mcp_client.get_all_apis(include_response_schema)
 
     async def auth_apps(self, apps: List[str]):
-        """Gets all API definitions."""
+        """Logs in to all the apps concurrently, caching their tokens."""
         logger.debug("auth_apps: auth_apps called.")
         if not self.auth_manager:
             self.auth_manager = AppWorldAuthManager()
-        for app in apps:
-            self.auth_manager.get_access_token(app)
+        await self.auth_manager.login_all(apps)
+
+    async def reset_auth(self):
+        """Forget every token and stop refreshing them."""
+        auth_manager, self.auth_manager = self.auth_manager, None
+        if auth_manager:
+            await auth_manager.aclose()
+
+    def _api_info(self, app_name: str, function_name: str) -> Optional[Dict[str, Any]]:
+        """Catalog entry of the function, or None if the app doesn't expose it."""
+        try:
+            return self.mcp_client.get_api_info(app_name, function_name)
+        except Exception as e:
+            logger.debug(f"No catalog entry for '{function_name}' of '{app_name}': {e}")
+            return None
+
+    @staticmethod
+    def _is_safe(api_info: Optional[Dict[str, Any]]) -> bool:
+        """Whether the function is a safe (read-only) operation, e.g. an OpenAPI GET."""
+        return bool(api_info) and str(api_info.get("method", "")).upper() in SAFE_METHODS
+
+    @staticmethod
+    def _is_error_result(result) -> bool:
+        """Whether a tool result carries a failed call, such as a handler's error dict."""
+        if not result or isinstance(result, dict):
+            return True
+        try:
+            payload = json.loads(result[0].text)
+        except (AttributeError, TypeError, ValueError):
+            return False
+        return isinstance(payload, dict) and payload.get("status") == "exception"
+
+    @staticmethod
+    def _error_type(result) -> Optional[str]:
+        """Error type of a failed call, or None if it succeeded."""
+        if isinstance(result, dict):
+            return result.get("error_type") or "Error"
+        if not result:
+            return "EmptyResult"
+        text = getattr(result[0], "text", None)
+        # Handler errors are dicts starting with "status"; don't parse every successful payload
+        if not isinstance(text, str) or '"exception"' not in text[:64]:
+            return None
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            return None
+        if isinstance(payload, dict) and payload.get("status") == "exception":
+            return payload.get("error_type") or "Error"
+        return None
 
     async def call_function(
         self, app_name: str, function_name: str, arguments: Dict[str, Any], auth_config=None
     ) -> Dict[str, Any]:
         """Calls a function via the mcp_client."""
+        timer = self.metrics.call_started(app_name)
+        api_info = self._api_info(app_name, function_name)
+        error_type = None
+        try:
+            result = await self._call_function(
+                app_name, function_name, arguments, auth_config, timer, api_info
+            )
+            error_type = self._error_type(result)
+            return result
+        except BaseException as e:
+            error_type = type(e).__name__
+            raise
+        finally:
+            # Names the client made up are counted together, so they can't grow the label set
+            tool_label = function_name if api_info is not None else UNKNOWN_TOOL
+            self.metrics.call_finished(timer, tool_label, error_type)
+
+    def render_metrics(self) -> str:
+        """Prometheus exposition of the call metrics and the catalog and response cache counters."""
+        return self.metrics.render(
+            catalog_stats=self.mcp_client.catalog_stats,
+            response_cache_stats=self.response_cache.get_stats(),
+            coalesced=self.single_flight.coalesced if self.single_flight else None,
+        )
+
+    async def _call_function(
+        self,
+        app_name: str,
+        function_name: str,
+        arguments: Dict[str, Any],
+        auth_config,
+        timer: CallTimer,
+        api_info: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
         headers = {}
         logger.debug(auth_config)
         if auth_config:
@@ -63,7 +178,7 @@ class ApiRegistry:
                 if not self.auth_manager:
                     self.auth_manager = AppWorldAuthManager()
 
-                access_token = self.auth_manager.get_access_token(app_name)
+                access_token = await self.auth_manager.get_access_token(app_name)
                 if access_token:
                     headers = {"Authorization": "Bearer " + access_token}
             elif auth_config.value:
@@ -75,15 +190,53 @@ class ApiRegistry:
         try:
             # Delegate the call to the client
             args = arguments['params'] if 'params' in arguments else arguments
+            is_safe = self._is_safe(api_info)
+            call_key = self.response_cache.key(function_name, args, headers) if is_safe else None
+            use_cache = self.response_cache.enabled(app_name) and is_safe
+            if use_cache:
+                hit, cached = self.response_cache.get(app_name, call_key)
+                if hit:
+                    logger.debug(f"ApiRegistry: response cache hit for '{function_name}'")
+                    return cached
+            elif self.response_cache.enabled(app_name):
+                # A write may change what the app's lookups return
+                self.response_cache.invalidate(app_name)
             if self.auth_manager:
-                headers["_tokens"] = json.dumps(self.auth_manager.get_stored_tokens())
-            result = await self.mcp_client.call_tool(
-                tool_name=function_name,
-                args=args,
-                headers=headers,
-            )
-            logger.debug("Response:", result)
-            return result
+                # Handed over in memory: in-process handlers read the live token map directly
+                headers["_tokens"] = self.auth_manager.get_stored_tokens()
+
+            async def invoke():
+                # Taken before the call: a write finishing meanwhile makes its response stale
+                generation = self.response_cache.generation(app_name)
+                async with self.admission.admit(app_name, function_name):
+                    backend_start = time.perf_counter()
+                    try:
+                        result = await self.mcp_client.call_tool(
+                            tool_name=function_name,
+                            args=args,
+                            headers=headers,
+                        )
+                    finally:
+                        timer.backend = time.perf_counter() - backend_start
+                        if not is_safe and self.response_cache.enabled(app_name):
+                            # Lookups started while the write ran may have read the old state
+                            self.response_cache.invalidate(app_name)
+                logger.debug("Response:", result)
+                if use_cache and not self._is_error_result(result):
+                    self.response_cache.put(app_name, call_key, result, generation)
+                return result
+
+            if is_safe and self.single_flight:
+                wait_start = time.perf_counter()
+                result = await self.single_flight.do(app_name, call_key, invoke)
+                if not timer.backend:
+                    # Served by another caller's backend call
+                    timer.backend = time.perf_counter() - wait_start
+                return result
+            return await invoke()
+        except AdmissionRejected as e:
+            logger.warning(str(e))
+            return e.to_response(function_name)
         except Exception as e:
             # In a real scenario, you might catch specific client exceptions
             logger.error(traceback.format_exc())
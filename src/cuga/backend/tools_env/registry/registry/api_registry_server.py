@@ -1,3 +1,4 @@
+import asyncio
 import json
 import os
 from contextlib import asynccontextmanager
@@ -5,14 +6,20 @@ from json import JSONDecodeError
 from fastapi import FastAPI, HTTPException
 from pathlib import Path
 from mcp.types import TextContent
-from pydantic import BaseModel  # Import BaseModel for request body
-from typing import Dict, Any, List, Optional  # Add Any for flexible args/return
-from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field  # Import BaseModel for request body
+from typing import Dict, Any, List, Optional, Tuple  # Add Any for flexible args/return
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from cuga.config import PACKAGE_ROOT
 from cuga.backend.activity_tracker.tracker import ActivityTracker, Step
 from cuga.backend.tools_env.registry.config.config_loader import load_service_configs
 from cuga.backend.tools_env.registry.mcp_manager.mcp_manager import MCPManager
 from cuga.backend.tools_env.registry.registry.api_registry import ApiRegistry
+from cuga.backend.tools_env.registry.registry.metrics import CONTENT_TYPE
+from cuga.backend.tools_env.registry.registry.streaming import (
+    NDJSON_MEDIA_TYPE,
+    effective_max_bytes,
+    ndjson_lines,
+)
 from loguru import logger
 from cuga.config import settings
 
@@ -28,6 +35,13 @@ class FunctionCallRequest(BaseModel):
     args: Dict[str, Any]  # Arguments for the function
 
 
+class FunctionCallBatchRequest(BaseModel):
+    """Request body model for calling several functions in one round trip."""
+
+    calls: List[FunctionCallRequest]  # The function calls, answered in the same order
+    max_concurrency: Optional[int] = Field(None, gt=0)  # Cap on calls in flight (server limit applies)
+
+
 class FunctionCallOnboardRequest(BaseModel):
     """Request body model for calling a function."""
 
@@ -50,6 +64,29 @@ def get_config_filename():
     return resolved_path
 
 
+async def reload_services() -> Dict[str, Any]:
+    """Re-read MCP_SERVERS_FILE and apply it to the running registry."""
+    config_file = get_config_filename()
+    services = load_service_configs(config_file)
+    return await registry.reload(services)
+
+
+async def watch_config_file(config_file: Path, interval: float):
+    """Reload the services whenever the configuration file is modified."""
+    last_mtime = config_file.stat().st_mtime
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            mtime = config_file.stat().st_mtime
+            if mtime == last_mtime:
+                continue
+            last_mtime = mtime
+            logger.info(f"{config_file} changed, reloading services")
+            await reload_services()
+        except Exception as e:
+            logger.error(f"Reloading services from {config_file} failed: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global mcp_manager, registry
@@ -59,7 +96,13 @@ async def lifespan(app: FastAPI):
     mcp_manager = MCPManager(config=services)
     registry = ApiRegistry(client=mcp_manager)
     await registry.start_servers()
+    watcher = None
+    if settings.registry.config_watch_interval > 0:
+        watcher = asyncio.create_task(watch_config_file(config_file, settings.registry.config_watch_interval))
     yield
+    if watcher:
+        watcher.cancel()
+    await mcp_manager.aclose()
 
 
 # --- FastAPI Server Setup ---
@@ -125,12 +168,65 @@ async def authenticate_apps(request: AuthAppsRequest):
 async def onboard_function(request: FunctionCallOnboardRequest):
     global registry, mcp_manager
     mcp_manager.schemas[request.app_name] = request.schemas
+    mcp_manager.invalidate_api_catalog(request.app_name)
     return {"status": f"Loaded successfully {len(request.schemas)} tools"}
 
 
 # --- ENDPOINT for Calling Functions ---
+async def invoke_function_call(request: FunctionCallRequest) -> Any:
+    """Run one function call through the registry and return its raw result."""
+    api_info = await registry.show_api(request.app_name, request.function_name)
+    if api_info is None:
+        raise KeyError(request.function_name)
+    is_secure = api_info.get("secure")
+    logger.debug("is_secure:", is_secure)
+    result: TextContent = await registry.call_function(
+        app_name=request.app_name,
+        function_name=request.function_name,
+        arguments=request.args,
+        auth_config=mcp_manager.auth_config.get(request.app_name) if is_secure else None,
+    )
+    return result
+
+
+async def execute_function_call(request: FunctionCallRequest) -> Tuple[Any, Optional[int]]:
+    """
+    Run one function call through the registry.
+
+    Returns the decoded response, and for error dicts returned by the registry also
+    the HTTP status code to report it with (None on success).
+    """
+    result = await invoke_function_call(request)
+    if isinstance(result, dict):
+        return result, result.get("status_code", 500)
+
+    result_json = None
+    logger.debug(result)
+    if result and result[0]:
+        result_json = result[0].text
+        try:
+            result_json = json.loads(result[0].text)
+        except JSONDecodeError:
+            pass
+    if result[0].text == "[]":
+        result_json = []
+    return result_json, None
+
+
+def track_api_response(response: Any, trajectory_path: Optional[str]):
+    tracker.collect_step_external(
+        Step(name="api_response", data=json.dumps(response) if not isinstance(response, str) else response),
+        full_path=trajectory_path,
+    )
+
+
 @app.post("/functions/call", tags=["Functions"])
-async def call_mcp_function(request: FunctionCallRequest, trajectory_path: Optional[str] = None):
+async def call_mcp_function(
+    request: FunctionCallRequest,
+    trajectory_path: Optional[str] = None,
+    stream: bool = False,
+    max_bytes: Optional[int] = None,
+):
     global registry, mcp_manager
 
     """
@@ -138,49 +234,25 @@ async def call_mcp_function(request: FunctionCallRequest, trajectory_path: Optio
 
     - **name**: The exact name of the function to execute.
     - **args**: A dictionary containing the arguments required by the function.
+    - **stream**: Return the response as NDJSON: one `{"item": ...}` line per list element
+      (a single line otherwise), then a `{"meta": ...}` line saying whether it was truncated.
+    - **max_bytes**: Cap on the streamed items, bounded by `registry.stream_max_bytes`.
     """
     print(f"Received request to call function: {request.function_name} with args: {request.args}")
     try:
-        global mcp_manager
-        apis = await registry.show_apis_for_app(request.app_name)
-        is_secure = apis[request.function_name].get("secure")
-        logger.debug("is_secure:", is_secure)
         if trajectory_path:
             settings.update({"ADVANCED_FEATURES": {"TRACKER_ENABLED": True}}, merge=True)
             tracker.collect_step_external(
                 Step(name="api_call", data=request.model_dump_json()), full_path=trajectory_path
             )
-        result: TextContent = await registry.call_function(
-            app_name=request.app_name,
-            function_name=request.function_name,
-            arguments=request.args,
-            auth_config=mcp_manager.auth_config.get(request.app_name) if is_secure else None,
-        )
-        if isinstance(result, dict):
-            tracker.collect_step_external(
-                Step(name="api_response", data=json.dumps(result)), full_path=trajectory_path
-            )
-            return JSONResponse(status_code=result.get("status_code", 500), content=result)
-        else:
-            result_json = None
-            logger.debug(result)
-            if result and result[0]:
-                result_json = result[0].text
-                try:
-                    result_json = json.loads(result[0].text)
-                except JSONDecodeError:
-                    pass
-            if result[0].text == "[]":
-                result_json = []
-            final_response = result_json
+        if stream:
+            return await stream_function_call(request, trajectory_path, max_bytes)
+        final_response, error_status = await execute_function_call(request)
+        if error_status is not None:
+            track_api_response(final_response, trajectory_path)
+            return JSONResponse(status_code=error_status, content=final_response)
         logger.debug(f"Final response: {final_response}")
-        tracker.collect_step_external(
-            Step(
-                name="api_response",
-                data=json.dumps(final_response) if not isinstance(final_response, str) else final_response,
-            ),
-            full_path=trajectory_path,
-        )
+        track_api_response(final_response, trajectory_path)
         return final_response
     except HTTPException as e:
         logger.error(e)
@@ -194,9 +266,142 @@ async def call_mcp_function(request: FunctionCallRequest, trajectory_path: Optio
         raise HTTPException(status_code=500, detail="Internal server error processing function call.")
 
 
+async def stream_function_call(
+    request: FunctionCallRequest, trajectory_path: Optional[str], max_bytes: Optional[int]
+):
+    result = await invoke_function_call(request)
+    if isinstance(result, dict):
+        track_api_response(result, trajectory_path)
+        return JSONResponse(status_code=result.get("status_code", 500), content=result)
+    text = result[0].text if result and result[0] else ""
+    # The backend text is tracked as is rather than re-encoded from the decoded response
+    track_api_response(text, trajectory_path)
+    try:
+        payload = json.loads(text)
+    except JSONDecodeError:
+        payload = text
+    del result, text
+    return StreamingResponse(
+        ndjson_lines(payload, effective_max_bytes(max_bytes, settings.registry.stream_max_bytes)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@app.post("/functions/call_batch", tags=["Functions"])
+async def call_mcp_function_batch(request: FunctionCallBatchRequest, trajectory_path: Optional[str] = None):
+    """
+    Calls several functions concurrently in one round trip.
+
+    - **calls**: The function calls, each shaped like a `/functions/call` request.
+    - **max_concurrency**: Optional cap on calls in flight, bounded by `registry.batch_max_concurrency`.
+
+    Results are returned in request order, each with its own `status` ("success" or
+    "error"), `status_code` and `result`, so one failing call doesn't fail the batch.
+    """
+    print(f"Received batch of {len(request.calls)} function calls")
+    max_concurrency = settings.registry.batch_max_concurrency
+    if request.max_concurrency:
+        max_concurrency = min(request.max_concurrency, max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    if trajectory_path:
+        settings.update({"ADVANCED_FEATURES": {"TRACKER_ENABLED": True}}, merge=True)
+
+    async def run(call: FunctionCallRequest) -> Dict[str, Any]:
+        item = await execute(call)
+        # Each call is recorded with its response as soon as it finishes, keeping them in pairs
+        if trajectory_path:
+            tracker.collect_step_external(
+                Step(name="api_call", data=call.model_dump_json()), full_path=trajectory_path
+            )
+        track_api_response(item["result"], trajectory_path)
+        return item
+
+    async def execute(call: FunctionCallRequest) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                result, error_status = await execute_function_call(call)
+            except HTTPException as e:
+                return {
+                    "status": "error",
+                    "status_code": e.status_code,
+                    "result": {"status": "exception", "status_code": e.status_code, "message": e.detail},
+                }
+            except Exception as e:
+                logger.error(e)
+                return {
+                    "status": "error",
+                    "status_code": 500,
+                    "result": {
+                        "status": "exception",
+                        "status_code": 500,
+                        "message": str(e),
+                        "error_type": type(e).__name__,
+                        "function_name": call.function_name,
+                    },
+                }
+        if error_status is not None:
+            return {"status": "error", "status_code": error_status, "result": result}
+        return {"status": "success", "status_code": 200, "result": result}
+
+    results = await asyncio.gather(*(run(call) for call in request.calls))
+    return {"results": results}
+
+
+@app.get("/api/response_cache", tags=["APIs"])
+async def response_cache_stats():
+    """
+    Hit, miss and eviction counters and current size of the response cache, per app.
+    """
+    return registry.response_cache.get_stats()
+
+
+@app.get("/api/coalesced_calls", tags=["APIs"])
+async def coalesced_calls():
+    """
+    Number of calls per app that joined an identical call already in flight instead of
+    reaching the backend.
+    """
+    if not registry.single_flight:
+        return {}
+    return registry.single_flight.coalesced
+
+
+@app.get("/api/admission", tags=["APIs"])
+async def admission_stats():
+    """
+    Queue depth, calls in flight, admitted/rejected counts and wait times of every app
+    with concurrency or rate limits.
+    """
+    return registry.admission.get_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics: tool calls and errors per app and tool, backend vs. registry
+    latency, calls in flight, and catalog and response cache hit counters.
+    """
+    return PlainTextResponse(registry.render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.post("/admin/reload", tags=["Admin"])
+async def reload_configuration():
+    """
+    Re-read MCP_SERVERS_FILE and apply it without a restart: only added and changed
+    services are built, removed ones are dropped, and the rest keep serving throughout.
+    Returns the service diff, the services that failed to build and their startup report.
+    """
+    try:
+        return await reload_services()
+    except Exception as e:
+        logger.error(f"Reloading services failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Reload failed: {e}")
+
+
 @app.get("/api/reset")
 async def reset():
-    registry.auth_manager = None
+    await registry.reset_auth()
 
 
 @app.get("/functions/get_schema/{call_name}", tags=["Functions"])
@@ -1,32 +1,48 @@
-import requests
+import asyncio
+from typing import Optional
+
+import httpx
 from cuga.backend.tools_env.registry.registry.authentication.base_auth_manager import BaseAuthManager
 from loguru import logger
 
 
 class AppWorldAuthManager(BaseAuthManager):
-    def __init__(self, base_url="http://localhost:9000"):
-        super().__init__()
+    def __init__(
+        self, base_url="http://localhost:9000", client: Optional[httpx.AsyncClient] = None, **kwargs
+    ):
+        super().__init__(**kwargs)
         self.base_url = base_url.rstrip("/")
-        self._account_passwords = self._load_account_passwords()
-        self.profile = self._get_user_profile()
+        self._client = client or httpx.AsyncClient()
+        self._account_passwords: dict[str, str] = {}
+        self.profile = None
+
+    async def _setup(self):
+        # The supervisor's passwords and profile are fetched together, on the first login
+        self._account_passwords, self.profile = await asyncio.gather(
+            self._load_account_passwords(), self._get_user_profile()
+        )
+
+    async def aclose(self):
+        await super().aclose()
+        await self._client.aclose()
 
-    def _get_user_profile(self):
+    async def _get_user_profile(self):
         url = f"{self.base_url}/supervisor/profile"
         try:
-            r = requests.get(url)
+            r = await self._client.get(url)
             r.raise_for_status()
-        except requests.RequestException as e:
-            print(f"Error fetching user profile: {e}")
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching user profile: {e}")
             return None
         return r.json()
 
-    def _load_account_passwords(self) -> dict[str, str]:
+    async def _load_account_passwords(self) -> dict[str, str]:
         url = f"{self.base_url}/supervisor/account_passwords"
         try:
-            r = requests.get(url)
+            r = await self._client.get(url)
             r.raise_for_status()
-        except requests.RequestException as e:
-            print(f"Error fetching app credentials: {e}")
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching app credentials: {e}")
             return {}
         return {
             item["account_name"]: item["password"]
@@ -37,12 +53,11 @@ class AppWorldAuthManager(BaseAuthManager):
     def _get_credentials(self, app_name: str) -> str | None:
         return self._account_passwords.get(app_name)
 
-    def _fetch_token(self, app_name: str, password: str) -> dict:
+    async def _fetch_token(self, app_name: str, password: str) -> dict:
         logger.debug("Fetching token..")
         url = f"{self.base_url}/{app_name}/auth/token"
-        user_name = self.profile["phone_number"] if app_name == "phone" else {self.profile["email"]}
+        user_name = self.profile["phone_number"] if app_name == "phone" else self.profile["email"]
         logger.debug(f"username: {user_name}")
-        logger.debug(f"password: {password}")
-        r = requests.post(url, data={"username": user_name, "password": password})
+        r = await self._client.post(url, data={"username": user_name, "password": password})
         r.raise_for_status()
         return r.json()
@@ -1,33 +1,149 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from cuga.config import settings
 
 
 class BaseAuthManager(ABC):
-    def __init__(self):
+    """
+    Async access token cache.
+
+    Tokens are kept in memory with their expiry and handed out without I/O while valid.
+    Concurrent requests for the same app share one login, and each token is refreshed in
+    the background `refresh_margin` seconds before it expires, so callers only wait on a
+    login for an app they have never authenticated with (or whose refresh failed).
+    """
+
+    def __init__(self, token_ttl: Optional[float] = None, refresh_margin: Optional[float] = None):
+        self.token_ttl = settings.registry.auth_token_ttl if token_ttl is None else token_ttl
+        self.refresh_margin = (
+            settings.registry.auth_refresh_margin if refresh_margin is None else refresh_margin
+        )
+        # app_name -> access token; handed to tool handlers as is, so it must only hold valid tokens
         self._tokens: Dict[str, str] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._logins: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        self._setup_lock = asyncio.Lock()
+        self._is_setup = False
+
+    async def get_access_token(self, app_name: str) -> Optional[str]:
+        """Return a valid access token for app_name, logging in only if none is cached."""
+        token = self.get_stored_token(app_name)
+        if token is not None:
+            return token
+        return await self._login(app_name)
+
+    async def login_all(self, app_names: List[str]) -> Dict[str, Optional[str]]:
+        """Log in to every app concurrently. Apps that fail are logged and map to None."""
+        results = await asyncio.gather(
+            *(self.get_access_token(app_name) for app_name in app_names), return_exceptions=True
+        )
+        tokens = {}
+        for app_name, result in zip(app_names, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Authenticating with '{app_name}' failed: {result}")
+                result = None
+            tokens[app_name] = result
+        return tokens
+
+    def get_stored_token(self, app_name: str) -> Optional[str]:
+        """Get token from memory by app_name, or None if there is none or it expired."""
+        token = self._tokens.get(app_name)
+        if token is not None and time.monotonic() >= self._expires_at[app_name]:
+            self._drop(app_name)
+            return None
+        return token
 
-    def get_access_token(self, app_name: str) -> Optional[str]:
-        """Fetch a new access token for app_name."""
+    def get_stored_tokens(self) -> Dict[str, str]:
+        """The in-memory token map, by app_name. Not a copy: it follows logins and refreshes."""
+        for app_name in [name for name, expires in self._expires_at.items() if time.monotonic() >= expires]:
+            self._drop(app_name)
+        return self._tokens
+
+    async def aclose(self):
+        """Stop the background refreshes and forget every token."""
+        tasks = list(self._refresh_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refresh_tasks.clear()
+        self._tokens.clear()
+        self._expires_at.clear()
+
+    async def _login(self, app_name: str) -> Optional[str]:
+        # Callers racing on the same app wait for the login already in flight
+        pending = self._logins.get(app_name)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._logins[app_name] = future
+        try:
+            token = await self._fetch_and_store(app_name)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        else:
+            future.set_result(token)
+            return token
+        finally:
+            del self._logins[app_name]
+
+    async def _fetch_and_store(self, app_name: str) -> Optional[str]:
+        await self._ensure_setup()
         creds = self._get_credentials(app_name)
         if creds is None:
             return None
 
-        token_info = self._fetch_token(app_name, creds)
+        token_info = await self._fetch_token(app_name, creds)
         token = token_info.get("access_token")
         if not token:
             raise Exception("Failed to obtain access token")
 
-        # Store the token in memory
+        ttl = float(token_info.get("expires_in") or self.token_ttl)
         self._tokens[app_name] = token
+        self._expires_at[app_name] = time.monotonic() + ttl
+        self._schedule_refresh(app_name, ttl - self.refresh_margin)
         return token
 
-    def get_stored_token(self, app_name: str) -> Optional[str]:
-        """Get token from memory by app_name."""
-        return self._tokens.get(app_name)
+    def _schedule_refresh(self, app_name: str, delay: float):
+        previous = self._refresh_tasks.pop(app_name, None)
+        if previous is not None and previous is not asyncio.current_task():
+            previous.cancel()
+        if delay > 0:
+            self._refresh_tasks[app_name] = asyncio.create_task(self._refresh_later(app_name, delay))
 
-    def get_stored_tokens(self) -> dict:
-        """Get token from memory by app_name."""
-        return self._tokens
+    async def _refresh_later(self, app_name: str, delay: float):
+        await asyncio.sleep(delay)
+        try:
+            await self._login(app_name)
+        except Exception as e:
+            # The current token stays in use until it expires; the next call then logs in again
+            logger.warning(f"Refreshing the access token of '{app_name}' failed: {e}")
+
+    async def _ensure_setup(self):
+        if self._is_setup:
+            return
+        async with self._setup_lock:
+            if not self._is_setup:
+                await self._setup()
+                self._is_setup = True
+
+    def _drop(self, app_name: str):
+        self._tokens.pop(app_name, None)
+        self._expires_at.pop(app_name, None)
+
+    async def _setup(self):
+        """Load whatever the credentials depend on, once, before the first login."""
 
     @abstractmethod
     def _get_credentials(self, app_name: str) -> Optional[str]:
@@ -35,6 +151,6 @@ class BaseAuthManager(ABC):
         pass
 
     @abstractmethod
-    def _fetch_token(self, app_name: str, creds: str) -> dict:
+    async def _fetch_token(self, app_name: str, creds: str) -> dict:
         """Hit your auth endpoint and return its JSON response."""
         pass
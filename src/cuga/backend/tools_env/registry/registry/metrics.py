@@ -0,0 +1,180 @@
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds, from in-process dispatch up to slow backends
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# `tool` label of calls to functions no app exposes
+UNKNOWN_TOOL = "unknown"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Latency histogram per label set, with fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # labels -> [count per bucket (+Inf last), sum, count]
+        self.series: Dict[Tuple, List] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+
+class CallTimer:
+    """Timing of one call: when it started and how much of it was spent waiting on the backend."""
+
+    __slots__ = ("app_name", "start", "backend")
+
+    def __init__(self, app_name: str):
+        self.app_name = app_name
+        self.start = time.perf_counter()
+        self.backend = 0.0
+
+
+class RegistryMetrics:
+    """
+    Call counters, error counters, latency histograms and in-flight gauges of the registry,
+    rendered in the Prometheus text exposition format by `/metrics`.
+
+    Calls are recorded on the event loop thread only, so plain dict updates are enough and
+    the hot path takes no locks.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Tuple[str, str, str], int] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.backend_latency = Histogram()
+        self.overhead_latency = Histogram()
+
+    def call_started(self, app_name: str) -> CallTimer:
+        self.in_flight[app_name] = self.in_flight.get(app_name, 0) + 1
+        return CallTimer(app_name)
+
+    def call_finished(self, timer: CallTimer, function_name: str, error_type: Optional[str] = None):
+        app_name = timer.app_name
+        elapsed = time.perf_counter() - timer.start
+        self.in_flight[app_name] -= 1
+        key = (app_name, function_name, "error" if error_type else "ok")
+        self.calls[key] = self.calls.get(key, 0) + 1
+        if error_type:
+            error_key = (app_name, error_type)
+            self.errors[error_key] = self.errors.get(error_key, 0) + 1
+        if timer.backend:
+            self.backend_latency.observe((app_name,), timer.backend)
+        self.overhead_latency.observe((app_name,), max(elapsed - timer.backend, 0.0))
+
+    @staticmethod
+    def _family(name: str, kind: str, help_text: str, label_names: Tuple[str, ...], samples: Iterable):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(label_names, labels)} {_number(value)}")
+        return lines
+
+    @staticmethod
+    def _histogram(name: str, help_text: str, label_names: Tuple[str, ...], histogram: Histogram):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        bounds = [_number(bound) for bound in histogram.buckets] + ["+Inf"]
+        for labels, (counts, total, count) in sorted(histogram.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_labels(label_names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(label_names, labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(label_names, labels)} {count}")
+        return lines
+
+    def render(
+        self,
+        catalog_stats: Optional[Dict[str, int]] = None,
+        response_cache_stats: Optional[Dict[str, Dict[str, int]]] = None,
+        coalesced: Optional[Dict[str, int]] = None,
+    ) -> str:
+        """Render every metric, plus the cache and coalescing counters kept by other components."""
+        lines = []
+        lines += self._family(
+            "registry_tool_calls_total",
+            "counter",
+            "Tool calls handled by the registry.",
+            ("app", "tool", "status"),
+            sorted(self.calls.items()),
+        )
+        lines += self._family(
+            "registry_tool_errors_total",
+            "counter",
+            "Failed tool calls by error type.",
+            ("app", "error_type"),
+            sorted(self.errors.items()),
+        )
+        lines += self._family(
+            "registry_calls_in_flight",
+            "gauge",
+            "Tool calls currently being handled.",
+            ("app",),
+            sorted(((app,), count) for app, count in self.in_flight.items()),
+        )
+        lines += self._histogram(
+            "registry_backend_seconds",
+            "Time spent waiting on the backend of a tool call.",
+            ("app",),
+            self.backend_latency,
+        )
+        lines += self._histogram(
+            "registry_overhead_seconds",
+            "Time spent in the registry itself per tool call, including admission queueing.",
+            ("app",),
+            self.overhead_latency,
+        )
+        if catalog_stats is not None:
+            lines += self._family(
+                "registry_catalog_requests_total",
+                "counter",
+                "API catalog lookups, by whether the catalog was already built.",
+                ("result",),
+                [(("hit",), catalog_stats.get("hits", 0)), (("miss",), catalog_stats.get("misses", 0))],
+            )
+        if response_cache_stats is not None:
+            lines += self._family(
+                "registry_response_cache_requests_total",
+                "counter",
+                "Response cache lookups per app, by result.",
+                ("app", "result"),
+                [
+                    ((app, result), stats.get(counter, 0))
+                    for app, stats in sorted(response_cache_stats.items())
+                    for result, counter in (("hit", "hits"), ("miss", "misses"))
+                ],
+            )
+        if coalesced is not None:
+            lines += self._family(
+                "registry_coalesced_calls_total",
+                "counter",
+                "Calls served by an identical call already in flight.",
+                ("app",),
+                sorted(((app,), count) for app, count in coalesced.items()),
+            )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from cuga.backend.tools_env.registry.config.config_loader import ResponseCacheConfig
+
+# Safe operations: their responses may be cached and identical calls coalesced
+SAFE_METHODS = {"GET", "HEAD"}
+
+
+class ResponseCache:
+    """
+    Per-app TTL + LRU cache of tool responses, for apps that opt in with a
+    `response_cache` section in mcp_servers.yaml.
+
+    Entries are keyed by function, canonicalized arguments and the auth headers the
+    call was made with, so responses are never shared between credentials.
+
+    Each invalidation starts a new generation of the app's cache: a response is only
+    stored if no invalidation happened since its call started, since it may predate a write.
+    """
+
+    def __init__(self, configs: Dict[str, ResponseCacheConfig]):
+        self.configs = configs
+        self._entries: Dict[str, OrderedDict] = {}
+        self._generations: Dict[str, int] = {}
+        # Bumped when every app is invalidated at once
+        self._epoch = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def configure(self, app_name: str, config: Optional[ResponseCacheConfig]):
+        """Replace an app's cache settings, dropping what it cached so far."""
+        self.configs[app_name] = config
+        self.invalidate(app_name)
+
+    def enabled(self, app_name: str) -> bool:
+        return self.configs.get(app_name) is not None
+
+    @staticmethod
+    def key(function_name: str, args: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> str:
+        # The stored tokens of other apps don't change this app's response
+        auth = {k: v for k, v in (headers or {}).items() if k != "_tokens"}
+        canonical = json.dumps(
+            [function_name, args, auth], sort_keys=True, default=str, separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _count(self, app_name: str, counter: str):
+        app_stats = self.stats.setdefault(app_name, {})
+        app_stats[counter] = app_stats.get(counter, 0) + 1
+
+    def get(self, app_name: str, key: str) -> Tuple[bool, Any]:
+        """Return (True, response) on a fresh hit, (False, None) otherwise."""
+        entries = self._entries.get(app_name)
+        entry = entries.get(key) if entries else None
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del entries[key]
+            self._count(app_name, "misses")
+            return False, None
+        entries.move_to_end(key)
+        self._count(app_name, "hits")
+        return True, entry[1]
+
+    def generation(self, app_name: str) -> Tuple[int, int]:
+        """Changes whenever the app's cache is invalidated; taken before a call, handed to `put`."""
+        return self._epoch, self._generations.get(app_name, 0)
+
+    def put(self, app_name: str, key: str, response: Any, generation: Optional[Tuple[int, int]] = None):
+        """Store response, unless the cache was invalidated or disabled since generation was taken."""
+        config = self.configs.get(app_name)
+        if config is None or (generation is not None and generation != self.generation(app_name)):
+            return
+        entries = self._entries.setdefault(app_name, OrderedDict())
+        entries[key] = (time.monotonic() + config.ttl_seconds, response)
+        entries.move_to_end(key)
+        while len(entries) > config.max_entries:
+            entries.popitem(last=False)
+            self._count(app_name, "evictions")
+
+    def invalidate(self, app_name: Optional[str] = None):
+        if app_name is None:
+            self._entries.clear()
+            self._epoch += 1
+        else:
+            self._entries.pop(app_name, None)
+            self._generations[app_name] = self._generations.get(app_name, 0) + 1
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit, miss and eviction counters and current size of every caching app."""
+        return {
+            app_name: {
+                "hits": 0,
+                "misses": 0,
+                "evictions": 0,
+                **self.stats.get(app_name, {}),
+                "size": len(self._entries.get(app_name, ())),
+            }
+            for app_name, config in self.configs.items()
+            if config
+        }
@@ -0,0 +1,35 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller starts the call and every
+    caller that arrives while it is in flight awaits the same task and gets the same
+    result (or exception).
+
+    The call runs as its own task, so a cancelled caller doesn't cancel it for the rest.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.coalesced: Dict[str, int] = {}
+
+    async def do(self, app_name: str, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        flight_key = f"{app_name}:{key}"
+        task = self._in_flight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._in_flight[flight_key] = task
+            task.add_done_callback(lambda _: self._done(flight_key, task))
+        else:
+            self.coalesced[app_name] = self.coalesced.get(app_name, 0) + 1
+        return await asyncio.shield(task)
+
+    def _done(self, flight_key: str, task: asyncio.Task):
+        if self._in_flight.get(flight_key) is task:
+            del self._in_flight[flight_key]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
@@ -0,0 +1,50 @@
+import json
+from typing import Any, Iterator, Optional
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Lines are sent in chunks of about this many bytes
+CHUNK_BYTES = 64 * 1024
+
+
+def effective_max_bytes(requested: Optional[int], limit: int) -> int:
+    """The byte cap of a streamed response: the requested one, bounded by the server limit (0 = none)."""
+    if requested and requested > 0:
+        return min(requested, limit) if limit else requested
+    return limit
+
+
+def ndjson_lines(payload: Any, max_bytes: int = 0) -> Iterator[bytes]:
+    """
+    Encode a tool response as NDJSON, one item at a time.
+
+    A list response becomes one `{"item": ...}` line per element, any other response a
+    single such line. The last line is `{"meta": {...}}` with the number of items sent,
+    the total number of items and whether the items were cut at `max_bytes` (0 = no cap).
+    The first item is always sent, even past the cap, so a large response is never reduced
+    to no data at all. Items are encoded lazily, so the full encoded response never exists in memory at once.
+    """
+    items = payload if isinstance(payload, list) else [payload]
+    sent_bytes = 0
+    sent = 0
+    truncated = False
+    chunk = []
+    chunk_bytes = 0
+    for item in items:
+        line = (json.dumps({"item": item}) + "\n").encode("utf-8")
+        if max_bytes and sent and sent_bytes + len(line) > max_bytes:
+            truncated = True
+            break
+        sent_bytes += len(line)
+        sent += 1
+        chunk.append(line)
+        chunk_bytes += len(line)
+        if chunk_bytes >= CHUNK_BYTES:
+            yield b"".join(chunk)
+            chunk = []
+            chunk_bytes = 0
+    meta = {"items": sent, "total_items": len(items), "bytes": sent_bytes, "truncated": truncated}
+    if truncated:
+        meta["max_bytes"] = max_bytes
+    chunk.append((json.dumps({"meta": meta}) + "\n").encode("utf-8"))
+    yield b"".join(chunk)
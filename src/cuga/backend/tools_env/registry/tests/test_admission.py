@@ -0,0 +1,148 @@
+"""
+Tests for per-app and per-tool admission control in the API Registry
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from mcp.types import TextContent
+
+from cuga.backend.tools_env.registry.config.config_loader import (
+    CallLimits,
+    ServiceConfig,
+    ServiceLimitsConfig,
+    _create_service_config,
+)
+from cuga.backend.tools_env.registry.registry.admission import TokenBucket
+from cuga.backend.tools_env.registry.registry.api_registry import ApiRegistry
+
+
+class TrackingMCPManager:
+    """Records the peak number of concurrent calls per tool; every tool is a POST."""
+
+    def __init__(self, limits: ServiceLimitsConfig, delay: float = 0.05):
+        self.schema_urls = {
+            "pets": ServiceConfig(name="pets", limits=limits),
+            "other": ServiceConfig(name="other"),
+        }
+        self.delay = delay
+        self.active = {}
+        self.peak = {}
+        self.total_active = 0
+        self.total_peak = 0
+
+    def get_api_info(self, app_name, api_name):
+        return {"method": "POST"}
+
+    async def call_tool(self, tool_name, args, headers=None):
+        self.active[tool_name] = self.active.get(tool_name, 0) + 1
+        self.peak[tool_name] = max(self.peak.get(tool_name, 0), self.active[tool_name])
+        self.total_active += 1
+        self.total_peak = max(self.total_peak, self.total_active)
+        await asyncio.sleep(self.delay)
+        self.active[tool_name] -= 1
+        self.total_active -= 1
+        return [TextContent(type="text", text=json.dumps({"ok": True}))]
+
+
+def _calls(registry, tool_name, count, app_name="pets"):
+    return [registry.call_function(app_name, tool_name, {}) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_app_and_tool_concurrency_limits():
+    limits = ServiceLimitsConfig(max_concurrency=3, tools={"slow": CallLimits(max_concurrency=1)})
+    manager = TrackingMCPManager(limits)
+    registry = ApiRegistry(client=manager)
+
+    await asyncio.gather(*_calls(registry, "pets_fast", 6), *_calls(registry, "pets_slow", 3))
+
+    assert manager.peak["pets_slow"] == 1
+    assert manager.total_peak == 3
+    stats = registry.admission.get_stats()["pets"]
+    assert stats["admitted"] == 9
+    assert stats["queued"] == stats["in_flight"] == stats["rejected"] == 0
+    assert stats["max_wait_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_throttled_tool_does_not_hold_app_slots():
+    limits = ServiceLimitsConfig(max_concurrency=2, tools={"slow": CallLimits(max_concurrency=1)})
+    manager = TrackingMCPManager(limits)
+    started = []
+    call_tool = manager.call_tool
+
+    async def recording_call_tool(tool_name, args, headers=None):
+        started.append(tool_name)
+        return await call_tool(tool_name, args, headers)
+
+    manager.call_tool = recording_call_tool
+    registry = ApiRegistry(client=manager)
+
+    await asyncio.gather(*_calls(registry, "pets_slow", 3), *_calls(registry, "pets_fast", 1))
+
+    # The queued slow calls wait on their tool's limit, leaving the app's second slot free
+    assert started == ["pets_slow", "pets_fast", "pets_slow", "pets_slow"]
+
+
+@pytest.mark.asyncio
+async def test_unlimited_apps_are_not_queued():
+    manager = TrackingMCPManager(ServiceLimitsConfig(max_concurrency=1))
+    registry = ApiRegistry(client=manager)
+
+    await asyncio.gather(*_calls(registry, "other_tool", 5, app_name="other"))
+
+    assert manager.peak["other_tool"] == 5
+    assert "other" not in registry.admission.get_stats()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_429():
+    manager = TrackingMCPManager(ServiceLimitsConfig(max_concurrency=1, max_queue=2), delay=0.1)
+    registry = ApiRegistry(client=manager)
+
+    results = await asyncio.gather(*_calls(registry, "pets_tool", 5))
+
+    rejected = [r for r in results if isinstance(r, dict)]
+    assert len(rejected) == 2
+    assert rejected[0]["status_code"] == 429
+    assert rejected[0]["error_type"] == "TooManyRequests"
+    assert registry.admission.get_stats()["pets"]["rejected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_is_rejected_with_429():
+    manager = TrackingMCPManager(ServiceLimitsConfig(max_concurrency=1, queue_timeout=0.05), delay=0.2)
+    registry = ApiRegistry(client=manager)
+
+    first, second = await asyncio.gather(*_calls(registry, "pets_tool", 2))
+
+    assert isinstance(first, list)
+    assert second["status_code"] == 429
+    assert "waited longer" in second["message"]
+    # The slot taken by the first call was released
+    assert registry.admission.get_stats()["pets"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_rate():
+    bucket = TokenBucket(rate=20, burst=2)
+
+    start = time.perf_counter()
+    for _ in range(4):
+        await bucket.acquire()
+    elapsed = time.perf_counter() - start
+
+    # Two calls fit in the burst, the next two wait 1/20s each
+    assert 0.08 <= elapsed < 0.3
+
+
+def test_limits_config_from_yaml():
+    config = _create_service_config(
+        "pets", {"url": "u", "limits": {"max_concurrency": 4, "tools": {"list": {"rate_per_second": 2}}}}
+    )
+    assert config.limits.max_concurrency == 4
+    assert config.limits.tools["list"].rate_per_second == 2
+    assert _create_service_config("other", {"url": "u"}).limits is None
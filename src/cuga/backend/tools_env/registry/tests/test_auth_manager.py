@@ -0,0 +1,137 @@
+"""
+Tests for the async token cache of the AppWorld auth manager
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from mcp.types import TextContent
+
+from cuga.backend.tools_env.registry.config.config_loader import Auth, ServiceConfig
+from cuga.backend.tools_env.registry.registry.api_registry import ApiRegistry
+from cuga.backend.tools_env.registry.registry.authentication.appworld_auth_manager import (
+    AppWorldAuthManager,
+)
+
+
+class FakeAppWorld:
+    def __init__(self, expires_in=None):
+        self.expires_in = expires_in
+        self.logins = []
+
+    async def __call__(self, request: httpx.Request):
+        path = request.url.path
+        if path == "/supervisor/account_passwords":
+            return httpx.Response(
+                200,
+                json=[
+                    {"account_name": "spotify", "password": "s3cret"},
+                    {"account_name": "phone", "password": "p4ss"},
+                    {"account_name": "broken", "password": "x"},
+                ],
+            )
+        if path == "/supervisor/profile":
+            return httpx.Response(200, json={"email": "jo@example.com", "phone_number": "555"})
+        app_name = path.split("/")[1]
+        await asyncio.sleep(0.02)
+        if app_name == "broken":
+            return httpx.Response(500)
+        self.logins.append((app_name, request.content.decode()))
+        token = {"access_token": f"{app_name}-{len(self.logins)}"}
+        if self.expires_in is not None:
+            token["expires_in"] = self.expires_in
+        return httpx.Response(200, json=token)
+
+
+def _manager(appworld: FakeAppWorld, **kwargs) -> AppWorldAuthManager:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(appworld))
+    return AppWorldAuthManager(base_url="http://appworld", client=client, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_login():
+    appworld = FakeAppWorld()
+    manager = _manager(appworld)
+
+    tokens = await asyncio.gather(*(manager.get_access_token("spotify") for _ in range(5)))
+
+    assert tokens == ["spotify-1"] * 5
+    assert appworld.logins == [("spotify", "username=jo%40example.com&password=s3cret")]
+    assert await manager.get_access_token("spotify") == "spotify-1"
+    assert len(appworld.logins) == 1
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_login_all_is_concurrent_and_skips_failures():
+    appworld = FakeAppWorld()
+    manager = _manager(appworld)
+
+    tokens = await manager.login_all(["spotify", "phone", "broken", "unknown"])
+
+    assert tokens["broken"] is None and tokens["unknown"] is None
+    assert set(manager.get_stored_tokens()) == {"spotify", "phone"}
+    assert ("phone", "username=555&password=p4ss") in appworld.logins
+    await manager.aclose()
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_refreshed_before_they_expire():
+    appworld = FakeAppWorld(expires_in=0.2)
+    manager = _manager(appworld, refresh_margin=0.1)
+
+    assert await manager.get_access_token("spotify") == "spotify-1"
+    await asyncio.sleep(0.2)
+
+    # The refresh happened in the background, so the token never lapsed
+    assert manager.get_stored_token("spotify") == "spotify-2"
+    await manager.aclose()
+    assert manager.get_stored_tokens() == {}
+
+
+@pytest.mark.asyncio
+async def test_expired_tokens_are_not_handed_out():
+    appworld = FakeAppWorld(expires_in=0.05)
+    manager = _manager(appworld, refresh_margin=0.1)
+
+    await manager.get_access_token("spotify")
+    await asyncio.sleep(0.06)
+
+    assert manager.get_stored_tokens() == {}
+    assert await manager.get_access_token("spotify") == "spotify-2"
+    await manager.aclose()
+
+
+class FakeMCPManager:
+    def __init__(self):
+        self.schema_urls = {"spotify": ServiceConfig(name="spotify")}
+        self.auth_config = {}
+        self.catalog_stats = {"hits": 0, "misses": 0}
+        self.headers = []
+
+    def get_api_info(self, app_name, api_name):
+        return {"method": "POST", "secure": True}
+
+    async def call_tool(self, tool_name, args, headers=None):
+        self.headers.append(headers)
+        return [TextContent(type="text", text=json.dumps({"ok": True}))]
+
+
+@pytest.mark.asyncio
+async def test_registry_hands_the_token_map_over_in_memory():
+    appworld = FakeAppWorld()
+    mcp_manager = FakeMCPManager()
+    registry = ApiRegistry(client=mcp_manager)
+    registry.auth_manager = _manager(appworld)
+
+    for _ in range(2):
+        await registry.call_function("spotify", "spotify_play", {}, auth_config=Auth(type="oauth2"))
+
+    assert len(appworld.logins) == 1
+    headers = mcp_manager.headers[-1]
+    assert headers["Authorization"] == "Bearer spotify-1"
+    assert headers["_tokens"] is registry.auth_manager.get_stored_tokens()
+    await registry.reset_auth()
+    assert registry.auth_manager is None
@@ -0,0 +1,109 @@
+"""
+Tests for the /functions/call_batch endpoint of the API Registry server
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from mcp.types import TextContent
+
+from cuga.backend.tools_env.registry.registry import api_registry_server
+
+
+class FakeRegistry:
+    """Answers every call after a short delay; `missing` is unknown and `broken` fails upstream."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def show_api(self, app_name, api_name):
+        return None if api_name == "missing" else {"secure": False}
+
+    async def call_function(self, app_name, function_name, arguments, auth_config=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.1)
+        self.in_flight -= 1
+        if function_name == "broken":
+            return {"status": "exception", "status_code": 502, "message": "upstream down"}
+        return [TextContent(type="text", text=json.dumps({"id": arguments["id"]}))]
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fake = FakeRegistry()
+    monkeypatch.setattr(api_registry_server, "registry", fake, raising=False)
+    monkeypatch.setattr(api_registry_server, "mcp_manager", SimpleNamespace(auth_config={}), raising=False)
+    return fake
+
+
+async def _post_batch(payload):
+    transport = httpx.ASGITransport(app=api_registry_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://registry") as client:
+        return await client.post("/functions/call_batch", json=payload)
+
+
+def _call(function_name, **args):
+    return {"app_name": "pets", "function_name": function_name, "args": args}
+
+
+@pytest.mark.asyncio
+async def test_batch_results_in_order_with_per_item_status(registry):
+    response = await _post_batch(
+        {"calls": [_call("get", id=1), _call("missing"), _call("broken"), _call("get", id=2)]}
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["status"] for item in results] == ["success", "error", "error", "success"]
+    assert results[0]["result"] == {"id": 1}
+    assert results[1]["status_code"] == 500
+    assert results[1]["result"]["error_type"] == "KeyError"
+    assert results[2]["status_code"] == 502
+    assert results[2]["result"]["message"] == "upstream down"
+    assert results[3]["result"] == {"id": 2}
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_concurrently_within_limit(registry):
+    calls = [_call("get", id=i) for i in range(8)]
+
+    start = time.perf_counter()
+    response = await _post_batch({"calls": calls, "max_concurrency": 4})
+    elapsed = time.perf_counter() - start
+
+    assert [item["result"]["id"] for item in response.json()["results"]] == list(range(8))
+    assert registry.peak == 4
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_concurrency", [0, -1])
+async def test_batch_rejects_invalid_concurrency(registry, max_concurrency):
+    response = await _post_batch({"calls": [_call("get", id=1)], "max_concurrency": max_concurrency})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_tracks_each_call_with_its_response(registry, monkeypatch):
+    steps = []
+    monkeypatch.setattr(
+        api_registry_server.tracker, "collect_step_external", lambda step, full_path: steps.append(step)
+    )
+    transport = httpx.ASGITransport(app=api_registry_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://registry") as client:
+        await client.post(
+            "/functions/call_batch",
+            params={"trajectory_path": "trajectory"},
+            json={"calls": [_call("get", id=i) for i in range(3)]},
+        )
+
+    assert [step.name for step in steps] == ["api_call", "api_response"] * 3
+    for call, response in zip(steps[::2], steps[1::2]):
+        assert json.loads(call.data)["args"] == json.loads(response.data)
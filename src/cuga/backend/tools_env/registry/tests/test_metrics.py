@@ -0,0 +1,118 @@
+"""
+Tests for the Prometheus metrics of the API Registry
+"""
+
+import asyncio
+import json
+import re
+
+import httpx
+import pytest
+from mcp.types import TextContent
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.registry import api_registry_server
+from cuga.backend.tools_env.registry.registry.api_registry import ApiRegistry
+from cuga.backend.tools_env.registry.registry.metrics import Histogram, RegistryMetrics
+
+METHODS = {"pets_list_pets": "GET", "pets_create_pet": "POST", "pets_fail": "POST", "pets_crash": "POST"}
+
+
+class FakeMCPManager:
+    def __init__(self):
+        self.schema_urls = {"pets": ServiceConfig(name="pets")}
+        self.auth_config = {}
+        self.catalog_stats = {"hits": 0, "misses": 0}
+
+    def get_api_info(self, app_name, api_name):
+        self.catalog_stats["hits"] += 1
+        return {"method": METHODS[api_name], "secure": False}
+
+    async def call_tool(self, tool_name, args, headers=None):
+        await asyncio.sleep(0.02)
+        if tool_name == "pets_crash":
+            raise ConnectionError("backend unreachable")
+        if tool_name == "pets_fail":
+            error = {"status": "exception", "error_type": "HTTPStatusError", "message": "404"}
+            return [TextContent(type="text", text=json.dumps(error, indent=2))]
+        return [TextContent(type="text", text=json.dumps({"ok": True}))]
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    manager = FakeMCPManager()
+    registry = ApiRegistry(client=manager)
+    monkeypatch.setattr(api_registry_server, "registry", registry, raising=False)
+    monkeypatch.setattr(api_registry_server, "mcp_manager", manager, raising=False)
+    return registry
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(label_text)}\}} (\S+)$", text, re.MULTILINE)
+    assert match, f"{name}{{{label_text}}} not found"
+    return float(match.group(1))
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(registry):
+    transport = httpx.ASGITransport(app=api_registry_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://registry") as client:
+        for function_name in [
+            "pets_list_pets",
+            "pets_list_pets",
+            "pets_create_pet",
+            "pets_fail",
+            "pets_crash",
+        ]:
+            await client.post(
+                "/functions/call", json={"app_name": "pets", "function_name": function_name, "args": {}}
+            )
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert _sample(text, "registry_tool_calls_total", app="pets", tool="pets_list_pets", status="ok") == 2
+    assert _sample(text, "registry_tool_calls_total", app="pets", tool="pets_fail", status="error") == 1
+    assert _sample(text, "registry_tool_errors_total", app="pets", error_type="HTTPStatusError") == 1
+    assert _sample(text, "registry_tool_errors_total", app="pets", error_type="ConnectionError") == 1
+    assert _sample(text, "registry_calls_in_flight", app="pets") == 0
+    assert _sample(text, "registry_backend_seconds_count", app="pets") == 5
+    assert _sample(text, "registry_backend_seconds_bucket", app="pets", le="0.01") == 0
+    assert _sample(text, "registry_backend_seconds_bucket", app="pets", le="+Inf") == 5
+    assert _sample(text, "registry_backend_seconds_sum", app="pets") >= 0.1
+    assert _sample(text, "registry_overhead_seconds_count", app="pets") == 5
+    assert _sample(text, "registry_catalog_requests_total", result="hit") > 0
+    assert "# TYPE registry_backend_seconds histogram" in text
+
+
+@pytest.mark.asyncio
+async def test_coalesced_calls_count_their_wait_as_backend_time(registry):
+    await asyncio.gather(*(registry.call_function("pets", "pets_list_pets", {}) for _ in range(3)))
+
+    counts, total, count = registry.metrics.backend_latency.series[("pets",)]
+    assert count == 3
+    assert total >= 0.05
+    assert registry.metrics.calls[("pets", "pets_list_pets", "ok")] == 3
+
+
+@pytest.mark.asyncio
+async def test_unknown_functions_share_one_tool_label(registry):
+    for i in range(3):
+        await registry.call_function("pets", f"pets_made_up_{i}", {})
+
+    assert registry.metrics.calls[("pets", "unknown", "ok")] == 3
+    assert not any(tool.startswith("pets_made_up") for _, tool, _ in registry.metrics.calls)
+
+
+def test_histogram_buckets_and_label_escaping():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(("a",), value)
+    assert histogram.series[("a",)][0] == [2, 1, 1]
+
+    metrics = RegistryMetrics()
+    timer = metrics.call_started('we"ird')
+    metrics.call_finished(timer, "tool\nname", "Boom")
+    assert 'registry_tool_calls_total{app="we\\"ird",tool="tool\\nname",status="error"} 1' in metrics.render()
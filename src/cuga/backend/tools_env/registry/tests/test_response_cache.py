@@ -0,0 +1,149 @@
+"""
+Tests for the opt-in response cache of the API Registry
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from mcp.types import TextContent
+
+from cuga.backend.tools_env.registry.config.config_loader import (
+    ResponseCacheConfig,
+    ServiceConfig,
+    _create_service_config,
+)
+from cuga.backend.tools_env.registry.registry.api_registry import ApiRegistry
+from cuga.backend.tools_env.registry.registry.response_cache import ResponseCache
+
+METHODS = {"pets_list_pets": "GET", "pets_create_pet": "POST", "pets_broken": "GET"}
+
+
+class FakeMCPManager:
+    """Counts backend calls; GET lookups return the current number of pets."""
+
+    def __init__(self, configs):
+        self.schema_urls = configs
+        self.calls = 0
+        self.pets = 0
+
+    def get_api_info(self, app_name, api_name):
+        return {"method": METHODS[api_name]} if api_name in METHODS else None
+
+    async def call_tool(self, tool_name, args, headers=None):
+        self.calls += 1
+        if tool_name == "pets_create_pet":
+            self.pets += 1
+        if tool_name == "pets_broken":
+            payload = {"status": "exception", "status_code": 503}
+        else:
+            payload = {"pets": self.pets, "args": args}
+        return [TextContent(type="text", text=json.dumps(payload))]
+
+
+def _registry(**cache) -> tuple:
+    config = ServiceConfig(name="pets", response_cache=ResponseCacheConfig(**cache))
+    manager = FakeMCPManager({"pets": config, "other": ServiceConfig(name="other")})
+    return ApiRegistry(client=manager), manager
+
+
+@pytest.mark.asyncio
+async def test_get_calls_are_served_from_cache():
+    registry, manager = _registry()
+
+    first = await registry.call_function("pets", "pets_list_pets", {"limit": 5, "kind": "cat"})
+    second = await registry.call_function("pets", "pets_list_pets", {"kind": "cat", "limit": 5})
+    await registry.call_function("pets", "pets_list_pets", {"limit": 6})
+
+    assert second is first
+    assert manager.calls == 2
+    assert registry.response_cache.get_stats()["pets"] == {"hits": 1, "misses": 2, "evictions": 0, "size": 2}
+
+
+@pytest.mark.asyncio
+async def test_writes_and_errors_are_not_cached():
+    registry, manager = _registry()
+
+    await registry.call_function("pets", "pets_list_pets", {})
+    await registry.call_function("pets", "pets_create_pet", {"name": "rex"})
+    after_write = await registry.call_function("pets", "pets_list_pets", {})
+    await registry.call_function("pets", "pets_broken", {})
+    await registry.call_function("pets", "pets_broken", {})
+
+    assert json.loads(after_write[0].text)["pets"] == 1
+    assert manager.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_lookup_overlapping_a_write_or_reload_is_not_cached():
+    registry, manager = _registry()
+    call_tool = manager.call_tool
+    lookup_started = asyncio.Event()
+    finish_lookup = asyncio.Event()
+
+    async def slow_lookup(tool_name, args, headers=None):
+        if tool_name == "pets_list_pets" and args.get("slow"):
+            lookup_started.set()
+            await finish_lookup.wait()
+        return await call_tool(tool_name, args, headers)
+
+    manager.call_tool = slow_lookup
+
+    lookup = asyncio.create_task(registry.call_function("pets", "pets_list_pets", {"slow": True}))
+    await lookup_started.wait()
+    await registry.call_function("pets", "pets_create_pet", {"name": "rex"})
+    finish_lookup.set()
+    await lookup
+    assert registry.response_cache.get_stats()["pets"]["size"] == 0
+
+    # The app's cache is switched off by a reload while a lookup is in flight
+    lookup_started.clear()
+    finish_lookup.clear()
+    lookup = asyncio.create_task(registry.call_function("pets", "pets_list_pets", {"slow": True}))
+    await lookup_started.wait()
+    registry.response_cache.configure("pets", None)
+    finish_lookup.set()
+    result = await lookup
+
+    assert json.loads(result[0].text)["pets"] == 1
+    assert not registry.response_cache.enabled("pets")
+
+
+@pytest.mark.asyncio
+async def test_auth_headers_are_part_of_the_key():
+    registry, manager = _registry()
+    auth = SimpleNamespace(type="X-Api-Key", value="one")
+
+    await registry.call_function("pets", "pets_list_pets", {}, auth_config=auth)
+    auth.value = "two"
+    await registry.call_function("pets", "pets_list_pets", {}, auth_config=auth)
+
+    assert manager.calls == 2
+
+
+def test_ttl_expiry_and_lru_eviction():
+    cache = ResponseCache({"pets": ResponseCacheConfig(ttl_seconds=10, max_entries=2)})
+
+    with patch("cuga.backend.tools_env.registry.registry.response_cache.time.monotonic", return_value=0):
+        cache.put("pets", "a", 1)
+        cache.put("pets", "b", 2)
+        assert cache.get("pets", "a") == (True, 1)
+        cache.put("pets", "c", 3)
+        # "b" was the least recently used entry
+        assert cache.get("pets", "b") == (False, None)
+        assert cache.get("pets", "a") == (True, 1)
+
+    with patch("cuga.backend.tools_env.registry.registry.response_cache.time.monotonic", return_value=11):
+        assert cache.get("pets", "a") == (False, None)
+
+    assert cache.get_stats()["pets"]["evictions"] == 1
+
+
+def test_response_cache_config_from_yaml():
+    assert _create_service_config("a", {"url": "u"}).response_cache is None
+    assert _create_service_config("b", {"url": "u", "response_cache": False}).response_cache is None
+    assert _create_service_config("c", {"url": "u", "response_cache": True}).response_cache.ttl_seconds == 60
+    cfg = _create_service_config("d", {"url": "u", "response_cache": {"ttl_seconds": 5, "max_entries": 3}})
+    assert (cfg.response_cache.ttl_seconds, cfg.response_cache.max_entries) == (5, 3)
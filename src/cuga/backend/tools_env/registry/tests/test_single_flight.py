@@ -0,0 +1,93 @@
+"""
+Tests for coalescing identical in-flight calls in the API Registry
+"""
+
+import asyncio
+import json
+
+import pytest
+from mcp.types import TextContent
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.registry.api_registry import ApiRegistry
+from cuga.backend.tools_env.registry.registry.single_flight import SingleFlight
+
+METHODS = {"pets_list_pets": "GET", "pets_create_pet": "POST", "pets_fail": "GET"}
+
+
+class SlowMCPManager:
+    def __init__(self):
+        self.schema_urls = {"pets": ServiceConfig(name="pets")}
+        self.calls = 0
+
+    def get_api_info(self, app_name, api_name):
+        return {"method": METHODS[api_name]}
+
+    async def call_tool(self, tool_name, args, headers=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if tool_name == "pets_fail":
+            raise ConnectionError("backend unreachable")
+        return [TextContent(type="text", text=json.dumps(args))]
+
+
+@pytest.mark.asyncio
+async def test_identical_safe_calls_share_one_request():
+    manager = SlowMCPManager()
+    registry = ApiRegistry(client=manager)
+
+    results = await asyncio.gather(
+        *(registry.call_function("pets", "pets_list_pets", {"kind": "cat"}) for _ in range(5)),
+        registry.call_function("pets", "pets_list_pets", {"kind": "dog"}),
+    )
+
+    assert manager.calls == 2
+    assert all(result is results[0] for result in results[:5])
+    assert json.loads(results[5][0].text) == {"kind": "dog"}
+    assert registry.single_flight.coalesced == {"pets": 4}
+    assert registry.single_flight.in_flight == 0
+
+    # Once finished, the next call goes to the backend again
+    await registry.call_function("pets", "pets_list_pets", {"kind": "cat"})
+    assert manager.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_unsafe_calls_are_not_coalesced():
+    manager = SlowMCPManager()
+    registry = ApiRegistry(client=manager)
+
+    await asyncio.gather(
+        *(registry.call_function("pets", "pets_create_pet", {"name": "rex"}) for _ in range(3))
+    )
+
+    assert manager.calls == 3
+    assert registry.single_flight.coalesced == {}
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller():
+    manager = SlowMCPManager()
+    registry = ApiRegistry(client=manager)
+
+    results = await asyncio.gather(*(registry.call_function("pets", "pets_fail", {}) for _ in range(3)))
+
+    assert manager.calls == 1
+    assert [result["error_type"] for result in results] == ["ConnectionError"] * 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_call():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("pets", "key", call))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(flight.do("pets", "key", call))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
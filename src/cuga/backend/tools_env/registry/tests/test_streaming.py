@@ -0,0 +1,110 @@
+"""
+Tests for streamed (NDJSON) responses of /functions/call
+"""
+
+import json
+
+import httpx
+import pytest
+from mcp.types import TextContent
+
+from cuga.backend.tools_env.registry.config.config_loader import ServiceConfig
+from cuga.backend.tools_env.registry.registry import api_registry_server
+from cuga.backend.tools_env.registry.registry.api_registry import ApiRegistry
+from cuga.backend.tools_env.registry.registry.streaming import effective_max_bytes, ndjson_lines
+
+SONGS = [{"id": i, "title": f"song {i}"} for i in range(1000)]
+
+
+class FakeMCPManager:
+    def __init__(self):
+        self.schema_urls = {"music": ServiceConfig(name="music")}
+        self.auth_config = {}
+        self.catalog_stats = {"hits": 0, "misses": 0}
+
+    def get_api_info(self, app_name, api_name):
+        return {"method": "GET", "secure": False}
+
+    async def call_tool(self, tool_name, args, headers=None):
+        if tool_name == "music_songs":
+            return [TextContent(type="text", text=json.dumps(SONGS))]
+        if tool_name == "music_missing":
+            raise ConnectionError("backend unreachable")
+        return [TextContent(type="text", text=json.dumps(SONGS[0]))]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    manager = FakeMCPManager()
+    registry = ApiRegistry(client=manager)
+    monkeypatch.setattr(api_registry_server, "registry", registry, raising=False)
+    monkeypatch.setattr(api_registry_server, "mcp_manager", manager, raising=False)
+    transport = httpx.ASGITransport(app=api_registry_server.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://registry")
+
+
+async def _stream(client, function_name, **params):
+    body = {"app_name": "music", "function_name": function_name, "args": {}}
+    response = await client.post("/functions/call", params={"stream": "true", **params}, json=body)
+    return response, [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_list_response_is_streamed_item_by_item(client):
+    async with client:
+        response, lines = await _stream(client, "music_songs")
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [line["item"] for line in lines[:-1]] == SONGS
+    assert lines[-1]["meta"]["items"] == lines[-1]["meta"]["total_items"] == 1000
+    assert lines[-1]["meta"]["truncated"] is False
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_is_capped(client):
+    async with client:
+        _, lines = await _stream(client, "music_songs", max_bytes=1000)
+        _, single = await _stream(client, "music_song")
+
+    meta = lines[-1]["meta"]
+    assert meta["truncated"] is True and meta["max_bytes"] == 1000
+    assert meta["items"] == len(lines) - 1 < 1000 and meta["bytes"] <= 1000
+    assert [line["item"] for line in lines[:-1]] == SONGS[: meta["items"]]
+    assert single == [
+        {"item": SONGS[0]},
+        {"meta": {"items": 1, "total_items": 1, "bytes": 39, "truncated": False}},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_streamed_errors_keep_their_status(client):
+    async with client:
+        response, _ = await _stream(client, "music_missing")
+
+    assert response.status_code == 500
+    assert response.json()["error_type"] == "ConnectionError"
+
+
+def test_chunks_and_cap():
+    chunks = list(ndjson_lines(list(range(50000))))
+
+    assert len(chunks) > 1
+    assert b"".join(chunks).count(b"\n") == 50001
+    assert effective_max_bytes(None, 100) == 100
+    assert effective_max_bytes(500, 100) == 100
+    assert effective_max_bytes(50, 100) == 50
+    assert effective_max_bytes(500, 0) == 500
+
+
+def test_first_item_is_sent_past_the_cap():
+    large = {"text": "x" * 1000}
+
+    lines = [json.loads(line) for line in b"".join(ndjson_lines(large, max_bytes=100)).splitlines()]
+    assert lines == [
+        {"item": large},
+        {"meta": {"items": 1, "total_items": 1, "bytes": 1023, "truncated": False}},
+    ]
+
+    lines = b"".join(ndjson_lines([large, large], max_bytes=100)).splitlines()
+    assert json.loads(lines[0]) == {"item": large}
+    assert json.loads(lines[-1])["meta"]["truncated"] is True
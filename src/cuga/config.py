@@ -21,6 +21,7 @@ PACKAGE_ROOT = Path(__file__).parent.resolve()
 LOGGING_DIR = os.environ.get("CUGA_LOGGING_DIR", os.path.join(PACKAGE_ROOT, "./logging"))
 TRAJECTORY_DATA_DIR = os.path.join(LOGGING_DIR, "trajectory_data")
 TRACES_DIR = os.path.join(LOGGING_DIR, "traces")
+SPEC_CACHE_DIR = os.path.join(LOGGING_DIR, "cache", "openapi_specs")
 # Define all path variables at the top (with environment variable overrides)
 ENV_FILE_PATH = os.getenv("ENV_FILE_PATH") or os.path.join(PACKAGE_ROOT, "..", "..", ".env")
 
@@ -119,6 +120,41 @@ validators = [
     Validator("advanced_features.tracker_enabled", default=False),
     Validator("features.chat", default=True),
     Validator("playwright_args", default=[]),
+    Validator("registry.http_max_connections", default=100),
+    Validator("registry.http_max_keepalive_connections", default=20),
+    Validator("registry.http_keepalive_expiry", default=30.0),
+    Validator("registry.http_timeout", default=30.0),
+    Validator("registry.http_connect_timeout", default=10.0),
+    Validator("registry.http2", default=True),
+    Validator("registry.mcp_max_concurrent_calls", default=16),
+    Validator("registry.mcp_call_timeout", default=60.0),
+    Validator("registry.mcp_health_check_interval", default=30.0),
+    Validator("registry.bootstrap_max_concurrency", default=8),
+    Validator("registry.bootstrap_service_timeout", default=30.0),
+    Validator("registry.sse_apps", default=[]),
+    Validator("registry.spec_cache_enabled", default=True),
+    Validator("registry.spec_cache_dir", default=""),
+    Validator("registry.batch_max_concurrency", default=16),
+    Validator("registry.coalesce_safe_calls", default=True),
+    Validator("registry.config_watch_interval", default=0.0),
+    Validator("registry.auth_token_ttl", default=3600.0),
+    Validator("registry.auth_refresh_margin", default=60.0),
+    Validator("registry.stream_max_bytes", default=8388608),
+    Validator("sandbox.container_pool_size", default=2),
+    Validator("sandbox.container_max_runs", default=50),
+    Validator("sandbox.container_health_check_interval", default=30.0),
+    Validator("sandbox.container_reset_command", default="sh -c 'rm -rf /tmp/* /sandbox/*'"),
+    Validator("sandbox.local_worker_pool_size", default=4),
+    Validator("sandbox.local_worker_max_runs", default=100),
+    Validator("sandbox.execution_timeout", default=120.0),
+    Validator("sandbox.execution_cpu_seconds", default=60),
+    Validator("sandbox.execution_memory_limit_mb", default=2048),
+    Validator("sandbox.max_output_chars", default=1000000),
+    Validator("sandbox.api_max_connections", default=16),
+    Validator("sandbox.parallelize_api_calls", default=False),
+    Validator("variables.memory_budget_mb", default=256),
+    Validator("variables.spill_min_bytes", default=65536),
+    Validator("variables.max_sessions", default=32),
 ]
 base_settings = Dynaconf(
     root_path=PACKAGE_ROOT,